@@ -148,8 +148,8 @@ class ContentUpdateScanLogAdmin(admin.ModelAdmin):
 
 class ChatbotMessageInline(admin.TabularInline):
     model = ChatbotMessage
-    fields = ['role', 'content', 'created_at', 'processing_time_ms']
-    readonly_fields = ['created_at', 'processing_time_ms']
+    fields = ['role', 'content', 'created_at', 'processing_time_ms', 'time_to_first_token_ms']
+    readonly_fields = ['created_at', 'processing_time_ms', 'time_to_first_token_ms']
     extra = 0
     can_delete = False
     
@@ -176,7 +176,7 @@ class ChatbotMessageAdmin(admin.ModelAdmin):
     list_display = ['id', 'conversation', 'role', 'content_preview', 'created_at', 'processing_time_ms']
     list_filter = ['role', 'created_at']
     search_fields = ['content', 'conversation__user__username']
-    readonly_fields = ['created_at', 'processing_time_ms']
+    readonly_fields = ['created_at', 'processing_time_ms', 'time_to_first_token_ms']
     
     def content_preview(self, obj):
         return obj.content[:50] + '...' if len(obj.content) > 50 else obj.content
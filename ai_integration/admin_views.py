@@ -26,6 +26,9 @@ from .serializers import (
     ContentUpdateScanConfigSerializer,
     ContentUpdateScanLogSerializer
 )
+from .llm_client import get_llm_client
+from .request_scheduler import get_request_scheduler
+from .evaluation_cache import get_evaluation_cache
 
 
 class AdminAIFeedbackTemplateViewSet(viewsets.ModelViewSet):
@@ -147,7 +150,10 @@ class AdminAIEvaluationLogViewSet(viewsets.ReadOnlyModelViewSet):
             'failed_evaluations': failed_evaluations,
             'success_rate': (successful_evaluations / total_evaluations * 100) if total_evaluations > 0 else 0,
             'average_processing_time_ms': round(avg_processing_time, 2),
-            'by_question_type': list(by_question_type)
+            'by_question_type': list(by_question_type),
+            'evaluation_cache': get_evaluation_cache().get_stats(),
+            'openai_client': get_llm_client().get_metrics(),
+            'openai_scheduler': get_request_scheduler().get_stats()
         })
 
 
@@ -1,9 +1,29 @@
+import os
+import sys
 from django.apps import AppConfig
 
 
+def is_server_process():
+    """
+    Check whether this process serves requests (gunicorn, uvicorn, runserver) rather than
+    running a management command or the test suite.
+    """
+    if os.path.basename(sys.argv[0]) not in ('manage.py', 'django-admin'):
+        return 'pytest' not in sys.modules
+    if len(sys.argv) < 2 or sys.argv[1] != 'runserver':
+        return False
+    # The autoreloader's parent process only watches files; the child serves requests
+    return os.environ.get('RUN_MAIN') == 'true' or '--noreload' in sys.argv
+
+
 class AIIntegrationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ai_integration'
-    
+
     def ready(self):
-        import ai_integration.signals 
\ No newline at end of file
+        from .task_executor import celery_broker_configured, get_task_executor
+
+        # Without a broker, recovery, outbox retries and the stalled grading sweep only run on
+        # the in-process executor's idle workers - start them rather than waiting for a submit
+        if is_server_process() and not celery_broker_configured():
+            get_task_executor().start()
@@ -0,0 +1,107 @@
+import re
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from django.conf import settings
+
+
+class EvaluationCache:
+    """
+    In-process LRU cache of AI answer evaluations with a time-to-live.
+    Entries are keyed by a hash of everything that determines the evaluation
+    (see make_key), so identical answers to the same question reuse the stored
+    AI response instead of making a new OpenAI request.
+    """
+
+    def __init__(self, max_entries=None, ttl_seconds=None):
+        self.max_entries = max_entries or getattr(settings, 'AI_EVALUATION_CACHE_MAX_ENTRIES', 10000)
+        self.ttl_seconds = ttl_seconds or getattr(settings, 'AI_EVALUATION_CACHE_TTL_SECONDS', 86400)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def normalize_answer(text, question_type=None):
+        """
+        Normalize answer text so trivially different submissions share a key.
+        Calculation answers only have their whitespace normalized, as case, signs and
+        punctuation ("1.5" vs "15") change their meaning.
+        """
+        if not text:
+            return ''
+        text = re.sub(r'\s+', ' ', str(text)).strip()
+        if question_type == 'CALCULATION':
+            return text
+        return text.casefold().strip(' .,!?;:')
+
+    @classmethod
+    def make_key(cls, question, template, answer_text, calculation_input, max_possible_score, language='en'):
+        """
+        Build the cache key from the question (and when it last changed), the template
+        version, the normalized answer, the maximum score and the response language.
+        """
+        parts = [
+            str(question.id),
+            question.updated_at.isoformat() if question.updated_at else '',
+            f"{template.id}:{template.updated_at.isoformat()}" if template else 'default',
+            cls.normalize_answer(answer_text, question.question_type),
+            json.dumps(calculation_input, sort_keys=True) if calculation_input else '',
+            str(float(max_possible_score or 0)),
+            language or 'en',
+        ]
+        return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Get a cached AI response, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, ai_response):
+        """Store an AI response, evicting the least recently used entries if full."""
+        with self._lock:
+            self._entries[key] = (ai_response, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self):
+        """Get hit/miss counters for this process."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups * 100, 2) if lookups else 0,
+                'entries': len(self._entries),
+                'evictions': self.evictions,
+            }
+
+
+_evaluation_cache = None
+_evaluation_cache_lock = threading.Lock()
+
+
+def get_evaluation_cache():
+    """Get the process-wide evaluation cache."""
+    global _evaluation_cache
+    with _evaluation_cache_lock:
+        if _evaluation_cache is None:
+            _evaluation_cache = EvaluationCache()
+        return _evaluation_cache
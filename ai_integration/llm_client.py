@@ -0,0 +1,237 @@
+import time
+import random
+import logging
+import asyncio
+import threading
+import weakref
+from collections import defaultdict, deque
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LLMClient:
+    """
+    Process-wide client for OpenAI chat completions.
+    Keeps one pooled keep-alive HTTP session, retries 429/5xx responses and
+    connection errors with jittered exponential backoff, and records latency
+    metrics per call purpose (evaluation, translation, content_scan, chatbot, ...).
+    """
+
+    CHAT_COMPLETIONS_URL = 'https://api.openai.com/v1/chat/completions'
+    RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+    LATENCY_SAMPLE_SIZE = 500  # Recent latencies kept per purpose for percentiles
+
+    # Optional callable(delay_seconds) told about 429 responses (set by the request scheduler)
+    on_rate_limited = None
+    # Optional callable() run before each retry, e.g. to wait for rate limit budget (set by the request scheduler)
+    on_retry = None
+
+    def __init__(self, pool_size=None, max_retries=None, timeout=None, connect_timeout=None,
+                 backoff_base=None, backoff_max=None):
+        self.pool_size = pool_size or getattr(settings, 'OPENAI_HTTP_POOL_SIZE', 20)
+        self.max_retries = max_retries if max_retries is not None else getattr(settings, 'OPENAI_MAX_RETRIES', 2)
+        self.timeout = timeout or getattr(settings, 'OPENAI_TIMEOUT_SECONDS', 30)
+        self.connect_timeout = connect_timeout or getattr(settings, 'OPENAI_CONNECT_TIMEOUT_SECONDS', 5)
+        self.backoff_base = backoff_base or getattr(settings, 'OPENAI_RETRY_BACKOFF_SECONDS', 0.5)
+        self.backoff_max = backoff_max or getattr(settings, 'OPENAI_RETRY_BACKOFF_MAX_SECONDS', 8)
+
+        self.http_session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        self.http_session.mount('https://', adapter)
+
+        self._metrics_lock = threading.Lock()
+        self._metrics = defaultdict(self._empty_metrics)
+
+    def _empty_metrics(self):
+        return {
+            'calls': 0,
+            'errors': 0,
+            'retries': 0,
+            'total_latency_ms': 0,
+            'max_latency_ms': 0,
+            'latencies': deque(maxlen=self.LATENCY_SAMPLE_SIZE),
+        }
+
+    def chat_completion(self, messages, model=None, timeout=None, purpose='default', **params):
+        """
+        Send a chat completion request.
+        Extra keyword arguments (temperature, max_tokens, response_format, ...) are
+        passed through in the request body.
+        Returns (content, processing_time_ms, error) like the service helpers do.
+        """
+        start_time = time.time()
+
+        if not getattr(settings, 'OPENAI_API_KEY', None):
+            return None, 0, "OpenAI API not configured"
+
+        headers = {
+            'Authorization': f"Bearer {settings.OPENAI_API_KEY}",
+            'Content-Type': 'application/json'
+        }
+        data = {
+            'model': model or getattr(settings, 'OPENAI_MODEL', None) or 'gpt-4o-mini',
+            'messages': messages,
+        }
+        data.update(params)
+
+        content, error, retries = None, None, 0
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            rate_limited = False
+            try:
+                response = self.http_session.post(
+                    self.CHAT_COMPLETIONS_URL,
+                    headers=headers,
+                    json=data,
+                    timeout=(self.connect_timeout, timeout or self.timeout)
+                )
+                if response.status_code == 200:
+                    content = response.json()['choices'][0]['message']['content']
+                    error = None
+                    break
+
+                error = f"OpenAI API error: {response.status_code} - {response.text}"
+                if response.status_code not in self.RETRY_STATUS_CODES:
+                    break
+                retry_after = response.headers.get('Retry-After')
+                rate_limited = response.status_code == 429
+            except requests.exceptions.Timeout:
+                error = "OpenAI API request timed out"
+            except requests.exceptions.ConnectionError as e:
+                error = f"Error connecting to OpenAI API: {str(e)}"
+            except Exception as e:
+                error = f"Error calling OpenAI API: {str(e)}"
+                break
+
+            delay = self._backoff_delay(attempt, retry_after)
+            if rate_limited and self.on_rate_limited:
+                self.on_rate_limited(delay)
+            if attempt < self.max_retries:
+                retries += 1
+                time.sleep(delay)
+                if self.on_retry:
+                    self.on_retry()
+
+        processing_time = int((time.time() - start_time) * 1000)
+        self._record(purpose, processing_time, error is not None, retries)
+
+        if error:
+            logger.error(f"OpenAI {purpose} call failed after {retries + 1} attempt(s): {error}")
+        return content, processing_time, error
+
+    def _backoff_delay(self, attempt, retry_after=None):
+        """Full-jitter exponential backoff, honouring Retry-After when the API sends one."""
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _record(self, purpose, latency_ms, failed, retries):
+        with self._metrics_lock:
+            metrics = self._metrics[purpose]
+            metrics['calls'] += 1
+            metrics['errors'] += int(failed)
+            metrics['retries'] += retries
+            metrics['total_latency_ms'] += latency_ms
+            metrics['max_latency_ms'] = max(metrics['max_latency_ms'], latency_ms)
+            metrics['latencies'].append(latency_ms)
+
+    def get_metrics(self):
+        """Get call counts and latency statistics per purpose for this process."""
+        with self._metrics_lock:
+            result = {}
+            for purpose, metrics in self._metrics.items():
+                latencies = sorted(metrics['latencies'])
+                result[purpose] = {
+                    'calls': metrics['calls'],
+                    'errors': metrics['errors'],
+                    'retries': metrics['retries'],
+                    'average_latency_ms': round(metrics['total_latency_ms'] / metrics['calls'], 2) if metrics['calls'] else 0,
+                    'p50_latency_ms': latencies[len(latencies) // 2] if latencies else 0,
+                    'p95_latency_ms': latencies[int(len(latencies) * 0.95)] if latencies else 0,
+                    'max_latency_ms': metrics['max_latency_ms'],
+                }
+            return result
+
+
+_llm_client = None
+_openai_sdk_client = None
+_async_openai_clients = weakref.WeakKeyDictionary()
+_client_lock = threading.Lock()
+
+
+def get_llm_client():
+    """Get the process-wide LLMClient."""
+    global _llm_client
+    with _client_lock:
+        if _llm_client is None:
+            _llm_client = LLMClient()
+        return _llm_client
+
+
+def get_openai_sdk_client():
+    """
+    Get a process-wide OpenAI SDK client for APIs the chat completion helper does not
+    cover (e.g. the Responses API used for web search). The SDK pools its own connections.
+    """
+    global _openai_sdk_client
+    with _client_lock:
+        if _openai_sdk_client is None:
+            from openai import OpenAI
+            _openai_sdk_client = OpenAI(
+                api_key=settings.OPENAI_API_KEY,
+                timeout=getattr(settings, 'OPENAI_TIMEOUT_SECONDS', 30),
+                max_retries=getattr(settings, 'OPENAI_MAX_RETRIES', 2)
+            )
+        return _openai_sdk_client
+
+
+def get_async_openai_client():
+    """
+    Get the AsyncOpenAI client of the running event loop.
+    The SDK's connection pool is bound to the loop it was opened on, so each loop gets its own
+    client (an ASGI server runs a single loop, so this is one client per process there).
+    """
+    loop = asyncio.get_running_loop()
+    with _client_lock:
+        client = _async_openai_clients.get(loop)
+        if client is None:
+            from openai import AsyncOpenAI
+            client = AsyncOpenAI(
+                api_key=settings.OPENAI_API_KEY,
+                timeout=getattr(settings, 'OPENAI_TIMEOUT_SECONDS', 30),
+                max_retries=getattr(settings, 'OPENAI_MAX_RETRIES', 2)
+            )
+            _async_openai_clients[loop] = client
+        return client
+
+
+async def stream_chat_completion(messages, model=None, purpose='default', **params):
+    """
+    Stream a chat completion, yielding the content deltas as they arrive.
+    The SDK retries failed connection attempts; errors after the first delta are raised to the
+    caller. Calls are recorded in the LLMClient metrics like blocking completions.
+    """
+    if not getattr(settings, 'OPENAI_API_KEY', None):
+        raise RuntimeError("OpenAI API not configured")
+
+    start_time = time.time()
+    failed = True
+    try:
+        stream = await get_async_openai_client().chat.completions.create(
+            model=model or getattr(settings, 'OPENAI_MODEL', None) or 'gpt-4o-mini',
+            messages=messages,
+            stream=True,
+            **params
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+        failed = False
+    finally:
+        get_llm_client()._record(purpose, int((time.time() - start_time) * 1000), failed, 0)
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from ai_integration.models import AIEvaluationJob
+from ai_integration.services import EvaluationOutboxService
+
+
+class Command(BaseCommand):
+    help = 'Evaluate the outstanding jobs of the AI evaluation outbox (e.g. after a restart)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retry-failed',
+            action='store_true',
+            help='Queue jobs that ran out of attempts again before draining',
+        )
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            retried = AIEvaluationJob.objects.filter(status='FAILED').update(
+                status='PENDING', attempts=0, claim_token=None, next_attempt_at=None
+            )
+            self.stdout.write(f'  Failed jobs queued again: {retried}')
+
+        processed = EvaluationOutboxService.drain()
+        failed = AIEvaluationJob.objects.filter(status='FAILED').count()
+
+        self.stdout.write(f'  Jobs processed: {processed}')
+        self.stdout.write(f'  Failed jobs: {failed}')
+        self.stdout.write(self.style.SUCCESS('✓ Evaluation outbox drained'))
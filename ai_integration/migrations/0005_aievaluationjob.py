@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_integration', '0004_chatbotconversation_chatbotmessage_and_more'),
+        ('assessment', '0007_examsession_analytics_recorded_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AIEvaluationJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('PROCESSING', 'Processing'), ('FAILED', 'Failed')], default='PENDING', max_length=20)),
+                ('attempts', models.IntegerField(default=0)),
+                ('claim_token', models.CharField(blank=True, db_index=True, max_length=32, null=True)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user_answer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='evaluation_job', to='assessment.useranswer')),
+            ],
+            options={
+                'db_table': 'ai_integration_aievaluationjob',
+                'indexes': [models.Index(fields=['status', 'created_at'], name='ai_integrat_status_9a8839_idx')],
+            },
+        ),
+    ]
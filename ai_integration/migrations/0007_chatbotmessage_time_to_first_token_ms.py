@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_integration', '0006_queuedtask'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatbotmessage',
+            name='time_to_first_token_ms',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_integration', '0007_chatbotmessage_time_to_first_token_ms'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aievaluationjob',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -166,6 +166,7 @@ class ChatbotMessage(models.Model):
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     processing_time_ms = models.IntegerField(null=True, blank=True)
+    time_to_first_token_ms = models.IntegerField(null=True, blank=True)  # Streamed replies only
     
     class Meta:
         db_table = 'ai_integration_chatbotmessage'
@@ -174,4 +175,65 @@ class ChatbotMessage(models.Model):
         ordering = ['created_at']
     
     def __str__(self):
-        return f"{self.role} message in conversation {self.conversation.id}" 
\ No newline at end of file
+        return f"{self.role} message in conversation {self.conversation.id}"
+
+
+class AIEvaluationJob(models.Model):
+    """
+    Transactional outbox entry for the AI evaluation of a user answer.
+    A job is written in the same transaction as its answer and drained after commit;
+    finished jobs are deleted, so the table only holds outstanding work.
+    """
+    STATUS_CHOICES = (
+        ('PENDING', 'Pending'),
+        ('PROCESSING', 'Processing'),
+        ('FAILED', 'Failed'),
+    )
+
+    user_answer = models.OneToOneField(UserAnswer, on_delete=models.CASCADE, related_name='evaluation_job')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.IntegerField(default=0)
+    claim_token = models.CharField(max_length=32, null=True, blank=True, db_index=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)  # Set while a failed job backs off
+    last_error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'ai_integration_aievaluationjob'
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Evaluation job for answer {self.user_answer_id} - {self.status}"
+
+
+class QueuedTask(models.Model):
+    """
+    Durable queue entry of a background task run by the in-process task executor when no
+    Celery broker is configured. Finished tasks are deleted; queued ones survive restarts.
+    """
+    STATUS_CHOICES = (
+        ('QUEUED', 'Queued'),
+        ('RUNNING', 'Running'),
+        ('FAILED', 'Failed'),
+    )
+
+    task_name = models.CharField(max_length=255)
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='QUEUED')
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'ai_integration_queuedtask'
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.task_name} - {self.status}"
@@ -0,0 +1,268 @@
+import time
+import heapq
+import logging
+import itertools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from django.conf import settings
+from .llm_client import get_llm_client
+
+logger = logging.getLogger(__name__)
+
+# Lower values are dispatched first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+
+class TokenBucket:
+    """
+    Budget that refills continuously up to per_minute units each minute.
+    Not thread-safe on its own; RequestScheduler guards it with its lock.
+    """
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.available = float(per_minute)
+        self.refill_per_second = self.capacity / 60.0
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now):
+        self.available = min(self.capacity, self.available + (now - self.updated_at) * self.refill_per_second)
+        self.updated_at = now
+
+    def time_until_available(self, amount, now):
+        """Seconds until amount units can be consumed (0 if they can be consumed now)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.available >= amount:
+            return 0
+        return (amount - self.available) / self.refill_per_second
+
+    def consume(self, amount, now):
+        self._refill(now)
+        self.available -= min(amount, self.capacity)
+
+
+class _ScheduledRequest:
+    __slots__ = ('messages', 'purpose', 'params', 'tokens', 'reservation', 'enqueued_at', 'future')
+
+    def __init__(self, messages, purpose, params, tokens, reservation=False):
+        self.messages = messages
+        self.purpose = purpose
+        self.params = params
+        self.tokens = tokens
+        self.reservation = reservation
+        self.enqueued_at = time.monotonic()
+        self.future = Future()
+
+
+class RequestScheduler:
+    """
+    Central scheduler for OpenAI chat completions.
+    Requests wait in a priority queue until the requests-per-minute and tokens-per-minute
+    budgets allow them; interactive traffic (chatbot, practice feedback) is dispatched before
+    batch traffic (end-of-exam grading, content scans, translations). A 429 from the API
+    pauses dispatching for the Retry-After period instead of sending more requests into it,
+    and the client's retries take request budget too. The budgets are this process's share
+    of the account limits (see OPENAI_SCHEDULER_PROCESSES).
+
+    submit() returns a concurrent.futures.Future resolving to (content, processing_time_ms, error);
+    asyncio callers can await it with asyncio.wrap_future(). chat_completion() blocks for the result.
+    reserve() only takes the budget of a request the caller sends itself (e.g. a streamed one).
+    """
+
+    PURPOSE_PRIORITIES = {
+        'chatbot': PRIORITY_INTERACTIVE,
+        'evaluation': PRIORITY_INTERACTIVE,
+        'grading': PRIORITY_BATCH,
+        'content_scan': PRIORITY_BATCH,
+        'translation': PRIORITY_BATCH,
+    }
+    DEFAULT_COMPLETION_TOKENS = 500  # Assumed response size when max_tokens is not given
+
+    def __init__(self, client=None, requests_per_minute=None, tokens_per_minute=None, max_workers=None):
+        self.client = client or get_llm_client()
+        # The account limits are shared by all processes; each one gets an even share
+        processes = max(1, getattr(settings, 'OPENAI_SCHEDULER_PROCESSES', 1))
+        self.request_bucket = TokenBucket(
+            requests_per_minute or (getattr(settings, 'OPENAI_REQUESTS_PER_MINUTE', 500) / processes)
+        )
+        self.token_bucket = TokenBucket(
+            tokens_per_minute or (getattr(settings, 'OPENAI_TOKENS_PER_MINUTE', 200000) / processes)
+        )
+        self.max_workers = max_workers or getattr(
+            settings, 'OPENAI_SCHEDULER_WORKERS', getattr(settings, 'OPENAI_HTTP_POOL_SIZE', 20)
+        )
+
+        self._queue = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._paused_until = 0
+        self._dispatcher = None
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='openai')
+        self._max_queue_wait_ms = 0
+
+        # Back off the whole queue when the API reports a rate limit, and make retries
+        # draw from the request budget like new requests
+        self.client.on_rate_limited = self.pause
+        self.client.on_retry = self.charge_retry
+
+    @classmethod
+    def estimate_tokens(cls, messages, params):
+        """Rough token estimate of a request: ~4 characters per prompt token plus the response budget."""
+        prompt_chars = sum(len(message.get('content') or '') for message in messages)
+        return prompt_chars // 4 + (params.get('max_tokens') or cls.DEFAULT_COMPLETION_TOKENS)
+
+    def submit(self, messages, purpose='default', priority=None, **params):
+        """
+        Queue a chat completion and return a Future (the deferred handle).
+        The priority defaults to the one of the purpose; unknown purposes are treated as batch traffic.
+        """
+        if priority is None:
+            priority = self.PURPOSE_PRIORITIES.get(purpose, PRIORITY_BATCH)
+
+        request = _ScheduledRequest(messages, purpose, params, self.estimate_tokens(messages, params))
+        return self._enqueue(request, priority)
+
+    def reserve(self, messages, purpose='default', priority=None, **params):
+        """
+        Queue a reservation of one request and its estimated tokens, and return a Future that
+        resolves to None once the budgets allow the request. The caller then sends it itself;
+        reservations do not take a worker.
+        """
+        if priority is None:
+            priority = self.PURPOSE_PRIORITIES.get(purpose, PRIORITY_BATCH)
+
+        request = _ScheduledRequest(messages, purpose, params, self.estimate_tokens(messages, params), reservation=True)
+        return self._enqueue(request, priority)
+
+    def _enqueue(self, request, priority):
+        with self._condition:
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(
+                    target=self._dispatch_loop, name='openai-scheduler', daemon=True
+                )
+                self._dispatcher.start()
+            heapq.heappush(self._queue, (priority, next(self._sequence), request))
+            self._condition.notify_all()
+        return request.future
+
+    def chat_completion(self, messages, purpose='default', priority=None, queue_timeout=None, **params):
+        """
+        Queue a chat completion and wait for it.
+        Returns (content, processing_time_ms, error) like LLMClient.chat_completion.
+        """
+        queue_timeout = queue_timeout or getattr(settings, 'OPENAI_SCHEDULER_QUEUE_TIMEOUT_SECONDS', 300)
+        start_time = time.time()
+        future = self.submit(messages, purpose=purpose, priority=priority, **params)
+        try:
+            return future.result(timeout=queue_timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            error = f"OpenAI {purpose} request was not completed within {queue_timeout} seconds"
+            logger.error(error)
+            return None, int((time.time() - start_time) * 1000), error
+
+    def pause(self, seconds):
+        """Stop dispatching new requests for the given number of seconds."""
+        with self._condition:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._condition.notify_all()
+
+    def charge_retry(self):
+        """Take one request of budget for a retry of a dispatched request, waiting until it is available."""
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                wait = max(self._paused_until - now, self.request_bucket.time_until_available(1, now))
+                if wait <= 0:
+                    self.request_bucket.consume(1, now)
+                    return
+                self._condition.wait(wait)
+
+    def _dispatch_loop(self):
+        while True:
+            with self._condition:
+                request = self._next_request()
+            self._executor.submit(self._run, request)
+
+    def _next_request(self):
+        """Wait until the head of the queue fits the budgets and a worker is free, then pop it."""
+        while True:
+            if not self._queue:
+                self._condition.wait()
+                continue
+
+            request = self._queue[0][2]
+            if self._in_flight >= self.max_workers and not request.reservation:
+                self._condition.wait()
+                continue
+            if request.future.cancelled():
+                heapq.heappop(self._queue)
+                continue
+
+            now = time.monotonic()
+            wait = max(
+                self._paused_until - now,
+                self.request_bucket.time_until_available(1, now),
+                self.token_bucket.time_until_available(request.tokens, now)
+            )
+            if wait > 0:
+                # Wakes early when a higher priority request arrives or a pause is extended
+                self._condition.wait(wait)
+                continue
+
+            heapq.heappop(self._queue)
+            if not request.future.set_running_or_notify_cancel():
+                continue
+
+            self.request_bucket.consume(1, now)
+            self.token_bucket.consume(request.tokens, now)
+            if request.reservation:
+                request.future.set_result(None)
+                continue
+            self._in_flight += 1
+            self._max_queue_wait_ms = max(self._max_queue_wait_ms, int((now - request.enqueued_at) * 1000))
+            return request
+
+    def _run(self, request):
+        try:
+            request.future.set_result(
+                self.client.chat_completion(request.messages, purpose=request.purpose, **request.params)
+            )
+        except Exception as e:
+            request.future.set_exception(e)
+        finally:
+            with self._condition:
+                self._in_flight -= 1
+                self._condition.notify_all()
+
+    def get_stats(self):
+        """Get the queue state and remaining budgets for this process."""
+        with self._condition:
+            now = time.monotonic()
+            self.request_bucket._refill(now)
+            self.token_bucket._refill(now)
+            return {
+                'queued_interactive': sum(1 for item in self._queue if item[0] <= PRIORITY_INTERACTIVE),
+                'queued_batch': sum(1 for item in self._queue if item[0] > PRIORITY_INTERACTIVE),
+                'in_flight': self._in_flight,
+                'paused_for_seconds': round(max(self._paused_until - now, 0), 2),
+                'requests_available': int(self.request_bucket.available),
+                'tokens_available': int(self.token_bucket.available),
+                'max_queue_wait_ms': self._max_queue_wait_ms,
+            }
+
+
+_request_scheduler = None
+_request_scheduler_lock = threading.Lock()
+
+
+def get_request_scheduler():
+    """Get the process-wide RequestScheduler."""
+    global _request_scheduler
+    with _request_scheduler_lock:
+        if _request_scheduler is None:
+            _request_scheduler = RequestScheduler()
+        return _request_scheduler
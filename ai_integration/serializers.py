@@ -201,8 +201,8 @@ class ChatbotMessageSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = ChatbotMessage
-        fields = ['id', 'role', 'content', 'created_at', 'processing_time_ms']
-        read_only_fields = ['id', 'created_at', 'processing_time_ms']
+        fields = ['id', 'role', 'content', 'created_at', 'processing_time_ms', 'time_to_first_token_ms']
+        read_only_fields = ['id', 'created_at', 'processing_time_ms', 'time_to_first_token_ms']
 
 
 class ChatbotConversationSerializer(serializers.ModelSerializer):
@@ -1,11 +1,14 @@
 import time
 import json
+import asyncio
+import uuid
 import logging
-import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from django.conf import settings
 from django.utils import timezone
 from django.db import transaction
+from django.db.models import F, Q
 from .models import (
     AIFeedbackTemplate, 
     AIEvaluationLog, 
@@ -13,10 +16,16 @@ from .models import (
     ContentUpdateScanConfig, 
     ContentUpdateScanLog,
     ChatbotConversation,
-    ChatbotMessage
+    ChatbotMessage,
+    AIEvaluationJob
 )
+from .llm_client import get_openai_sdk_client
+from .request_scheduler import get_request_scheduler
+from exam_prep_platform.cache import SharedCache
+from .evaluation_cache import EvaluationCache, get_evaluation_cache
 from assessment.models import UserAnswer
 from questions.models import Topic, Question
+from questions.services import QuestionSnapshotService
 from exams.models import Exam
 
 logger = logging.getLogger(__name__)
@@ -133,8 +142,12 @@ Please respond in JSON format using the following structure:
     @classmethod
     def prepare_prompt(cls, template, user_answer):
         """Prepare the prompt using the template and user answer data."""
-        # Get question type first
-        question_type = user_answer.question.question_type
+        # The question, its topic and exam are read from the cached question snapshot
+        question = QuestionSnapshotService.get(user_answer.question_id)
+        if question is None:
+            logger.error(f"Question {user_answer.question_id} of user answer {user_answer.id} not found")
+            return None
+        question_type = question.question_type
         
         # If a custom template is provided, use it
         if template and template.template_content.strip():
@@ -142,7 +155,7 @@ Please respond in JSON format using the following structure:
         else:
             # Use default prompts based on question type
             if question_type == 'OPEN_ENDED':
-                if user_answer.question.model_answer_text:
+                if question.model_answer_text:
                     prompt = cls.OPEN_ENDED_PROMPT
                 else:
                     prompt = cls.OPEN_ENDED_NO_MODEL_PROMPT
@@ -152,15 +165,10 @@ Please respond in JSON format using the following structure:
                 logger.error(f"Unsupported question type: {question_type}")
                 return None
         
-        # Get related objects
-        question = user_answer.question
-        topic = question.topic
-        exam = question.exam
-        
         # Prepare template variables
         template_vars = {
-            'exam_name': exam.name if exam else "Unknown Exam",
-            'topic_name': topic.name if topic else "Unknown Topic",
+            'exam_name': question.exam_name or "Unknown Exam",
+            'topic_name': question.topic_name or "Unknown Topic",
             'question_text': question.text,
             'max_possible_score': user_answer.max_possible_score,
             'submitted_answer_text': user_answer.submitted_answer_text or "",
@@ -188,22 +196,13 @@ Please respond in JSON format using the following structure:
         return prompt
     
     @classmethod
-    def call_openai_api(cls, prompt):
+    def call_openai_api(cls, prompt, purpose='evaluation'):
         """Call OpenAI API to evaluate the answer."""
         if not prompt:
             return None, None, "No prompt available"
         
-        start_time = time.time()
-        
-        try:
-            # OpenAI API call
-            headers = {
-                'Authorization': f"Bearer {settings.OPENAI_API_KEY}",
-                'Content-Type': 'application/json'
-            }
-            
-            # Enhanced system message to ensure proper JSON response
-            system_message = """You are an expert educational evaluator. You MUST always respond in valid JSON format.
+        # Enhanced system message to ensure proper JSON response
+        system_message = """You are an expert educational evaluator. You MUST always respond in valid JSON format.
             
 CRITICAL INSTRUCTIONS:
 - NEVER return error messages or explanations outside of JSON
@@ -212,53 +211,58 @@ CRITICAL INSTRUCTIONS:
 - Use the exact JSON structure requested in the prompt
 
 If the input appears invalid or incomplete, still provide evaluation feedback within the JSON structure."""
-            
-            data = {
-                'model': settings.OPENAI_MODEL or "gpt-4",
-                'messages': [
-                    {'role': 'system', 'content': system_message},
-                    {'role': 'user', 'content': prompt}
-                ],
-                'temperature': 0.2,
-                'response_format': {'type': 'json_object'}  # Ensure JSON response
-            }
-            
-            response = requests.post(
-                'https://api.openai.com/v1/chat/completions',
-                headers=headers,
-                json=data,
-                timeout=30  # Add timeout
-            )
-            
-            if response.status_code != 200:
-                error_msg = f"OpenAI API error: {response.status_code} - {response.text}"
-                logger.error(error_msg)
-                return None, int((time.time() - start_time) * 1000), error_msg
-            
-            result = response.json()
-            ai_response = result['choices'][0]['message']['content']
-            processing_time = int((time.time() - start_time) * 1000)  # in ms
-            
-            # Validate that the response is valid JSON
-            try:
-                json.loads(ai_response)
-            except json.JSONDecodeError:
-                error_msg = f"AI returned invalid JSON: {ai_response}"
-                logger.error(error_msg)
-                return None, processing_time, error_msg
-            
-            return ai_response, processing_time, None
         
-        except requests.exceptions.Timeout:
-            error_msg = "OpenAI API request timed out"
-            logger.exception(error_msg)
-            processing_time = int((time.time() - start_time) * 1000)
-            return None, processing_time, error_msg
-        except Exception as e:
-            error_msg = f"Error calling OpenAI API: {str(e)}"
-            logger.exception(error_msg)
-            processing_time = int((time.time() - start_time) * 1000)  # in ms
+        ai_response, processing_time, error = get_request_scheduler().chat_completion(
+            [
+                {'role': 'system', 'content': system_message},
+                {'role': 'user', 'content': prompt}
+            ],
+            model=settings.OPENAI_MODEL or "gpt-4",
+            purpose=purpose,
+            temperature=0.2,
+            response_format={'type': 'json_object'}  # Ensure JSON response
+        )
+        if error:
+            return None, processing_time, error
+        
+        # Validate that the response is valid JSON
+        try:
+            json.loads(ai_response)
+        except json.JSONDecodeError:
+            error_msg = f"AI returned invalid JSON: {ai_response}"
+            logger.error(error_msg)
             return None, processing_time, error_msg
+        
+        return ai_response, processing_time, None
+    
+    @classmethod
+    def get_evaluation_cache_key(cls, user_answer, template, language='en'):
+        """Get the evaluation cache key for an answer and the template used to grade it."""
+        return EvaluationCache.make_key(
+            user_answer.question,
+            template,
+            user_answer.submitted_answer_text,
+            user_answer.submitted_calculation_input,
+            user_answer.max_possible_score,
+            language
+        )
+    
+    @classmethod
+    def call_openai_api_cached(cls, prompt, cache_key, purpose='evaluation'):
+        """
+        Call OpenAI API unless an evaluation for the same cache key is stored.
+        Cache hits return the stored response with a processing time of 0.
+        """
+        cache_enabled = cache_key and getattr(settings, 'AI_EVALUATION_CACHE_ENABLED', True)
+        if cache_enabled:
+            ai_response = get_evaluation_cache().get(cache_key)
+            if ai_response is not None:
+                return ai_response, 0, None
+        
+        ai_response, processing_time, error = cls.call_openai_api(prompt, purpose=purpose)
+        if cache_enabled and not error:
+            get_evaluation_cache().set(cache_key, ai_response)
+        return ai_response, processing_time, error
     
     @classmethod
     def parse_ai_response(cls, ai_response, question_type):
@@ -445,8 +449,10 @@ If the input appears invalid or incomplete, still provide evaluation feedback wi
                     logger.warning(f"Cannot mark answer {user_answer_id} as error - answer no longer exists")
                 return
             
-            # Call OpenAI API
-            ai_response, processing_time, error = cls.call_openai_api(prompt)
+            # Call OpenAI API (identical earlier answers are served from the evaluation cache)
+            ai_response, processing_time, error = cls.call_openai_api_cached(
+                prompt, cls.get_evaluation_cache_key(user_answer, template)
+            )
             
             # Try to log the evaluation (but don't fail the evaluation if logging fails)
             try:
@@ -488,34 +494,7 @@ If the input appears invalid or incomplete, still provide evaluation feedback wi
                         logger.warning(f"User answer {user_answer_id} no longer exists during evaluation - likely replaced by newer submission")
                         return
                     
-                    # Ensure raw_score is within reasonable bounds (0 to max_possible_score)
-                    if raw_score > user_answer.max_possible_score:
-                        # If raw_score seems to be in the 0-1 range, scale it
-                        if raw_score <= 1:
-                            weighted_score = raw_score * user_answer.max_possible_score
-                        else:
-                            # Cap at max possible score
-                            weighted_score = min(raw_score, user_answer.max_possible_score)
-                    else:
-                        weighted_score = raw_score
-                    
-                    user_answer.ai_feedback = feedback
-                    user_answer.raw_score = raw_score
-                    user_answer.weighted_score = weighted_score
-                    user_answer.is_correct = is_correct
-                    user_answer.evaluation_status = 'EVALUATED'
-                    
-                    # Store additional metadata if provided
-                    if metadata and isinstance(metadata, dict):
-                        # Get existing metadata or initialize empty dict
-                        existing_metadata = user_answer.metadata or {}
-                        # Update with new metadata
-                        existing_metadata.update({
-                            'ai_evaluation_metadata': metadata,
-                            'evaluation_timestamp': timezone.now().isoformat()
-                        })
-                        user_answer.metadata = existing_metadata
-                    
+                    cls._apply_evaluation(user_answer, feedback, raw_score, is_correct, metadata)
                     user_answer.save()
                 
                 logger.info(f"Successfully evaluated answer {user_answer_id}: score={raw_score}, correct={is_correct}")
@@ -536,6 +515,144 @@ If the input appears invalid or incomplete, still provide evaluation feedback wi
             except:
                 pass
     
+    @staticmethod
+    def _apply_evaluation(user_answer, feedback, raw_score, is_correct, metadata):
+        """Copy a parsed AI evaluation onto a user answer without saving it."""
+        # Ensure raw_score is within reasonable bounds (0 to max_possible_score)
+        if raw_score > user_answer.max_possible_score:
+            # If raw_score seems to be in the 0-1 range, scale it
+            if raw_score <= 1:
+                weighted_score = raw_score * user_answer.max_possible_score
+            else:
+                # Cap at max possible score
+                weighted_score = min(raw_score, user_answer.max_possible_score)
+        else:
+            weighted_score = raw_score
+        
+        user_answer.ai_feedback = feedback
+        user_answer.raw_score = raw_score
+        user_answer.weighted_score = weighted_score
+        user_answer.is_correct = is_correct
+        user_answer.evaluation_status = 'EVALUATED'
+        
+        # Store additional metadata if provided
+        if metadata and isinstance(metadata, dict):
+            # Get existing metadata or initialize empty dict
+            existing_metadata = user_answer.metadata or {}
+            # Update with new metadata
+            existing_metadata.update({
+                'ai_evaluation_metadata': metadata,
+                'evaluation_timestamp': timezone.now().isoformat()
+            })
+            user_answer.metadata = existing_metadata
+
+    @classmethod
+    def evaluate_user_answers_batch(cls, user_answer_ids, max_concurrency=None):
+        """
+        Evaluate a batch of user answers with concurrent OpenAI requests.
+        Prompts are prepared up front, up to max_concurrency requests run at once over
+        the shared pooled HTTP session, and the results are written back with one bulk_update
+        and one bulk_create of AIEvaluationLog rows.
+        Returns a dict with the number of evaluated, failed and skipped answers.
+        """
+        max_concurrency = max_concurrency or getattr(settings, 'AI_EVALUATION_CONCURRENCY', 8)
+        user_answer_ids = list(user_answer_ids)
+        
+        answers = list(
+            UserAnswer.objects.filter(
+                id__in=user_answer_ids,
+                evaluation_status='PENDING',
+                question__question_type__in=['OPEN_ENDED', 'CALCULATION']
+            ).select_related('question')
+        )
+        result = {'evaluated': 0, 'errors': 0, 'skipped': len(user_answer_ids) - len(answers)}
+        if not answers:
+            return result
+        
+        # Prepare every prompt before any network traffic; one lookup warms the snapshots they read
+        QuestionSnapshotService.get_many(user_answer.question_id for user_answer in answers)
+        templates = {}
+        prompts = {}
+        for user_answer in answers:
+            question_type = user_answer.question.question_type
+            if question_type not in templates:
+                templates[question_type] = cls.get_template_for_question_type(question_type)
+            prompts[user_answer.id] = cls.prepare_prompt(templates[question_type], user_answer)
+        
+        # Identical answers to the same question share one request
+        cache_keys = {}
+        unique_answers = {}
+        for user_answer in answers:
+            cache_key = cls.get_evaluation_cache_key(
+                user_answer, templates[user_answer.question.question_type]
+            )
+            cache_keys[user_answer.id] = cache_key
+            unique_answers.setdefault(cache_key, user_answer)
+        
+        def evaluate(user_answer):
+            prompt = prompts[user_answer.id]
+            if not prompt:
+                return None, 0, "Failed to prepare prompt"
+            # Batch grading yields to interactive requests in the OpenAI scheduler
+            return cls.call_openai_api_cached(prompt, cache_keys[user_answer.id], purpose='grading')
+        
+        # Requests share the pooled keep-alive session of the process-wide LLM client
+        with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='ai-eval') as executor:
+            unique_responses = dict(zip(
+                unique_answers.keys(), executor.map(evaluate, unique_answers.values())
+            ))
+        responses = [unique_responses[cache_keys[user_answer.id]] for user_answer in answers]
+        
+        # Answers replaced or evaluated elsewhere while we waited are left alone
+        still_pending = set(
+            UserAnswer.objects.filter(
+                id__in=[user_answer.id for user_answer in answers],
+                evaluation_status='PENDING'
+            ).values_list('id', flat=True)
+        )
+        
+        answers_to_update = []
+        evaluation_logs = []
+        for user_answer, (ai_response, processing_time, error) in zip(answers, responses):
+            if user_answer.id not in still_pending:
+                result['skipped'] += 1
+                continue
+            
+            if prompts[user_answer.id]:
+                evaluation_logs.append(AIEvaluationLog(
+                    user_answer=user_answer,
+                    prompt_used=prompts[user_answer.id],
+                    ai_response=ai_response if ai_response else "",
+                    processing_time_ms=processing_time or 0,
+                    success=error is None,
+                    error_message=error
+                ))
+            
+            if error:
+                user_answer.evaluation_status = 'ERROR'
+                user_answer.ai_feedback = f"Evaluation error: {error}"
+                logger.error(f"Evaluation error for answer {user_answer.id}: {error}")
+                result['errors'] += 1
+            else:
+                feedback, raw_score, is_correct, metadata = cls.parse_ai_response(
+                    ai_response, user_answer.question.question_type
+                )
+                cls._apply_evaluation(user_answer, feedback, raw_score, is_correct, metadata)
+                result['evaluated'] += 1
+            answers_to_update.append(user_answer)
+        
+        with transaction.atomic():
+            UserAnswer.objects.bulk_update(answers_to_update, [
+                'ai_feedback', 'raw_score', 'weighted_score', 'is_correct', 'evaluation_status', 'metadata'
+            ])
+            AIEvaluationLog.objects.bulk_create(evaluation_logs)
+        
+        logger.info(
+            f"Batch evaluation finished: {result['evaluated']} evaluated, "
+            f"{result['errors']} errors, {result['skipped']} skipped"
+        )
+        return result
+
     @staticmethod
     def _mark_as_error(user_answer, error_message):
         """Mark a user answer as having an evaluation error."""
@@ -585,8 +702,10 @@ If the input appears invalid or incomplete, still provide evaluation feedback wi
         language_instruction = f"\n\nIMPORTANT: Provide your response in {language_name}. All feedback must be in {language_name}.\n"
         prompt += language_instruction
         
-        # Call the OpenAI API
-        return cls.call_openai_api(prompt)
+        # Call the OpenAI API (identical earlier answers are served from the evaluation cache)
+        return cls.call_openai_api_cached(
+            prompt, cls.get_evaluation_cache_key(temp_user_answer, template, language)
+        )
         
     @classmethod
     def get_language_name(cls, language_code):
@@ -599,6 +718,113 @@ If the input appears invalid or incomplete, still provide evaluation feedback wi
         return language_map.get(language_code, "English")
 
 
+class EvaluationOutboxService:
+    """
+    Service for the transactional outbox of AI answer evaluations.
+    enqueue() writes one AIEvaluationJob per answer in the caller's transaction and requests
+    a drain once it commits, so answers are never evaluated before they are visible and
+    answers of rolled back transactions are never evaluated at all. Drains claim batches of
+    jobs with a conditional update and evaluate them with the concurrent batch evaluator;
+    claims of crashed workers expire after CLAIM_TIMEOUT seconds. Jobs of a failed batch are
+    retried after an exponential backoff (RETRY_BACKOFF_SECONDS, doubled per attempt), so a
+    short OpenAI outage does not use up their attempts.
+    """
+
+    BATCH_SIZE = 20
+    CLAIM_TIMEOUT = 15 * 60
+    MAX_ATTEMPTS = 3
+    RETRY_BACKOFF_SECONDS = 60
+
+    @classmethod
+    def enqueue(cls, user_answer_ids):
+        """
+        Queue the evaluation of user answers, resetting existing jobs of the same answers.
+        Returns the number of jobs written.
+        """
+        jobs = [AIEvaluationJob(user_answer_id=user_answer_id) for user_answer_id in set(user_answer_ids)]
+        if not jobs:
+            return 0
+        AIEvaluationJob.objects.bulk_create(
+            jobs,
+            update_conflicts=True,
+            unique_fields=['user_answer'],
+            update_fields=['status', 'attempts', 'claim_token', 'claimed_at', 'next_attempt_at', 'last_error']
+        )
+
+        from .tasks import dispatch_evaluation_outbox
+        transaction.on_commit(dispatch_evaluation_outbox)
+        return len(jobs)
+
+    @classmethod
+    def claim_batch(cls, limit):
+        """
+        Claim up to limit outstanding jobs that are due, oldest first.
+        Returns (claim_token, list of claimed user answer IDs).
+        """
+        now = timezone.now()
+        claimable = (Q(status='PENDING') & (Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now))) | Q(
+            status='PROCESSING', claimed_at__lt=now - timedelta(seconds=cls.CLAIM_TIMEOUT)
+        )
+        job_ids = list(
+            AIEvaluationJob.objects.filter(claimable).order_by('created_at', 'id').values_list('id', flat=True)[:limit]
+        )
+        if not job_ids:
+            return None, []
+
+        # Jobs claimed by another worker in the meantime no longer match
+        claim_token = uuid.uuid4().hex
+        AIEvaluationJob.objects.filter(claimable, id__in=job_ids).update(
+            status='PROCESSING', claim_token=claim_token, claimed_at=now, attempts=F('attempts') + 1
+        )
+        user_answer_ids = list(
+            AIEvaluationJob.objects.filter(claim_token=claim_token).values_list('user_answer_id', flat=True)
+        )
+        return claim_token, user_answer_ids
+
+    @classmethod
+    def process_batch(cls):
+        """
+        Claim and evaluate one batch of jobs.
+        Returns (number of jobs claimed, whether the batch was evaluated).
+        """
+        claim_token, user_answer_ids = cls.claim_batch(cls.BATCH_SIZE)
+        if not user_answer_ids:
+            return 0, True
+
+        claimed = AIEvaluationJob.objects.filter(claim_token=claim_token)
+        try:
+            AIAnswerEvaluationService.evaluate_user_answers_batch(user_answer_ids)
+        except Exception as e:
+            logger.exception(f"Error evaluating outbox batch of {len(user_answer_ids)} answers: {e}")
+            # Retry after a backoff that doubles with every attempt, until the jobs run out of attempts
+            now = timezone.now()
+            for attempt in range(1, cls.MAX_ATTEMPTS):
+                claimed.filter(attempts=attempt).update(
+                    status='PENDING', claim_token=None, last_error=str(e),
+                    next_attempt_at=now + timedelta(seconds=cls.RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+                )
+            claimed.update(status='FAILED', claim_token=None, next_attempt_at=None, last_error=str(e))
+            return len(user_answer_ids), False
+
+        # Results live on the answers and in AIEvaluationLog
+        claimed.delete()
+        return len(user_answer_ids), True
+
+    @classmethod
+    def drain(cls):
+        """
+        Process batches until no due jobs are left or a batch fails; the jobs of a failed batch
+        are picked up by a later drain once their backoff has passed.
+        Returns the number of jobs processed.
+        """
+        processed = 0
+        while True:
+            claimed, evaluated = cls.process_batch()
+            processed += claimed
+            if not claimed or not evaluated:
+                return processed
+
+
 class ContentUpdateService:
     """
     Service for scanning the web for content updates and creating alerts.
@@ -657,8 +883,8 @@ Respond in the following JSON format:
         return ContentUpdateScanConfig.objects.filter(
             is_active=True
         ).filter(
-            models.Q(next_scheduled_run__isnull=True) | 
-            models.Q(next_scheduled_run__lte=now)
+            Q(next_scheduled_run__isnull=True) | 
+            Q(next_scheduled_run__lte=now)
         )
     
     @classmethod
@@ -668,9 +894,7 @@ Respond in the following JSON format:
         Returns a list of search results.
         """
         try:
-            from openai import OpenAI
-            
-            client = OpenAI(api_key=settings.OPENAI_API_KEY)
+            client = get_openai_sdk_client()
             
             search_term = topic_name
             if additional_keywords:
@@ -784,21 +1008,19 @@ Respond in the following JSON format:
         Returns (ai_response, error_message).
         """
         try:
-            from openai import OpenAI
-            
-            client = OpenAI(api_key=settings.OPENAI_API_KEY)
-            
-            response = client.chat.completions.create(
-                model=settings.OPENAI_MODEL or "gpt-4o-mini",
-                messages=[
+            ai_response, processing_time, error = get_request_scheduler().chat_completion(
+                [
                     {'role': 'system', 'content': 'You are an expert content monitor for a professional exam platform. Always respond in valid JSON format.'},
                     {'role': 'user', 'content': prompt}
                 ],
+                model=settings.OPENAI_MODEL or "gpt-4o-mini",
+                purpose='content_scan',
                 temperature=0.2,
                 response_format={'type': 'json_object'}
             )
+            if error:
+                return None, error
             
-            ai_response = response.choices[0].message.content
             return ai_response, None
         
         except Exception as e:
@@ -1091,7 +1313,11 @@ RESPONSE GUIDELINES:
     def get_available_exams(cls):
         """Retrieve list of available exams in the system."""
         try:
-            return list(Exam.objects.filter(is_active=True).values_list('name', flat=True))
+            return SharedCache.get_or_compute(
+                SharedCache.make_key('exams', 'active_names'),
+                lambda: list(Exam.objects.filter(is_active=True).values_list('name', flat=True)),
+                getattr(settings, 'CATALOG_CACHE_TIMEOUT_SECONDS', 3600)
+            )
         except Exception as e:
             logger.error(f"Error retrieving exams: {str(e)}")
             return []
@@ -1377,41 +1603,145 @@ Is there anything specific I can help you with?"""
             raise Exception("OpenAI API not configured")
         
         try:
-            from openai import OpenAI
-            
-            # Initialize OpenAI client
-            client = OpenAI(api_key=settings.OPENAI_API_KEY)
-            
-            # Prepare the final message with relevant FAQs
-            relevant_faqs = cls.get_relevant_faq_items(user_query)
-            faq_text = ""
-            if relevant_faqs:
-                faq_text = "\n".join([f"Q: {faq['question']}\nA: {faq['answer']}" for faq in relevant_faqs])
-            
-            # Update the last system message with current context
-            if messages and messages[0]['role'] == 'system':
-                messages[0]['content'] = cls.DEFAULT_CHATBOT_PROMPT.format(
-                    list_of_exams=", ".join(cls.get_available_exams()),
-                    subscription_details=", ".join([f"{plan['name']}: {plan['price']}" for plan in cls.get_subscription_details()]),
-                    user_query=user_query,
-                    relevant_faq_items=faq_text
-                )
+            cls._add_prompt_context(messages, user_query)
             
             # Make API request
-            response = client.chat.completions.create(
+            content, processing_time, error = get_request_scheduler().chat_completion(
+                messages,
                 model="gpt-3.5-turbo",
-                messages=messages,
+                purpose='chatbot',
                 max_tokens=500,
                 temperature=0.7
             )
+            if error:
+                raise Exception(error)
             
-            return response.choices[0].message.content.strip()
+            return content.strip()
             
-        except ImportError:
-            raise Exception("OpenAI library not installed")
         except Exception as e:
             raise Exception(f"OpenAI API error: {str(e)}")
 
+    @classmethod
+    def _add_prompt_context(cls, messages, user_query):
+        """
+        Fill the system message with the current exams, plans and the FAQs relevant to the query.
+        """
+        relevant_faqs = cls.get_relevant_faq_items(user_query)
+        faq_text = ""
+        if relevant_faqs:
+            faq_text = "\n".join([f"Q: {faq['question']}\nA: {faq['answer']}" for faq in relevant_faqs])
+        
+        # Update the last system message with current context
+        if messages and messages[0]['role'] == 'system':
+            messages[0]['content'] = cls.DEFAULT_CHATBOT_PROMPT.format(
+                list_of_exams=", ".join(cls.get_available_exams()),
+                subscription_details=", ".join([f"{plan['name']}: {plan['price']}" for plan in cls.get_subscription_details()]),
+                user_query=user_query,
+                relevant_faq_items=faq_text
+            )
+        return messages
+
+    @classmethod
+    def _start_streamed_message(cls, user, message):
+        """
+        Store the user message and build the prompt of a streamed reply.
+        Returns (conversation, messages), or (None, None) if no conversation could be created.
+        """
+        conversation = cls.get_active_conversation(user)
+        if not conversation:
+            return None, None
+        
+        ChatbotMessage.objects.create(conversation=conversation, role='USER', content=message)
+        messages = cls.prepare_conversation_history(conversation)
+        try:
+            cls._add_prompt_context(messages, message)
+        except Exception as e:
+            logger.warning(f"Could not add chatbot prompt context: {str(e)}")
+        return conversation, messages
+
+    @classmethod
+    @transaction.atomic
+    def _finish_streamed_message(cls, conversation, content, processing_time, time_to_first_token):
+        """Store the assembled assistant reply of a streamed message."""
+        ai_message = ChatbotMessage.objects.create(
+            conversation=conversation,
+            role='ASSISTANT',
+            content=content,
+            processing_time_ms=processing_time,
+            time_to_first_token_ms=time_to_first_token
+        )
+        ChatbotConversation.objects.filter(pk=conversation.pk).update(updated_at=timezone.now())
+        return ai_message
+
+    @classmethod
+    async def stream_message(cls, user, message, language='en'):
+        """
+        Send a message to the chatbot and stream the response.
+        Yields (event, data) pairs: a 'delta' per chunk of the reply as it arrives from OpenAI,
+        then 'done' with the stored message, or 'error'. The assistant message is stored once,
+        when the stream has finished, with its total processing time and time to first token.
+        If OpenAI fails before sending anything, the fallback response is sent as one delta.
+        """
+        from asgiref.sync import sync_to_async
+        from .llm_client import stream_chat_completion
+        
+        try:
+            conversation, messages = await sync_to_async(cls._start_streamed_message)(user, message)
+        except Exception as e:
+            logger.error(f"Error sending message for user {user.id}: {str(e)}")
+            yield 'error', {"error": f"Failed to send message: {str(e)}"}
+            return
+        if not conversation:
+            yield 'error', {"error": "Could not create conversation"}
+            return
+        
+        start_time = time.time()
+        time_to_first_token = None
+        chunks = []
+        try:
+            # Take the request and token budget from the scheduler, so streams cannot push
+            # the scheduled traffic into rate limits
+            await asyncio.wait_for(
+                asyncio.wrap_future(get_request_scheduler().reserve(messages, purpose='chatbot', max_tokens=500)),
+                getattr(settings, 'OPENAI_SCHEDULER_QUEUE_TIMEOUT_SECONDS', 300)
+            )
+            async for delta in stream_chat_completion(
+                messages, model="gpt-3.5-turbo", purpose='chatbot', max_tokens=500, temperature=0.7
+            ):
+                if time_to_first_token is None:
+                    time_to_first_token = int((time.time() - start_time) * 1000)
+                chunks.append(delta)
+                yield 'delta', {"content": delta}
+        except Exception as e:
+            if chunks:
+                # Keep the part of the reply the user has already seen
+                logger.error(f"OpenAI stream failed after {len(chunks)} chunks: {str(e)}")
+            else:
+                logger.warning(f"OpenAI API failed, using fallback response: {str(e)}")
+                fallback = await sync_to_async(cls._generate_fallback_response)(message)
+                time_to_first_token = int((time.time() - start_time) * 1000)
+                chunks.append(fallback)
+                yield 'delta', {"content": fallback}
+        
+        content = "".join(chunks).strip()
+        processing_time = int((time.time() - start_time) * 1000)
+        try:
+            ai_message = await sync_to_async(cls._finish_streamed_message)(
+                conversation, content, processing_time, time_to_first_token
+            )
+        except Exception as e:
+            logger.error(f"Error storing streamed message for user {user.id}: {str(e)}")
+            yield 'error', {"error": f"Failed to store message: {str(e)}"}
+            return
+        
+        yield 'done', {
+            "message_id": ai_message.id,
+            "content": content,
+            "processing_time_ms": processing_time,
+            "time_to_first_token_ms": time_to_first_token,
+            "conversation_id": conversation.id
+        }
+
     @classmethod
     def prepare_conversation_history(cls, conversation):
         """
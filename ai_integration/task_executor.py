@@ -0,0 +1,267 @@
+import os
+import time
+import queue
+import atexit
+import logging
+import threading
+from datetime import timedelta
+from celery import Task
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+def celery_broker_configured():
+    """Check whether tasks can be sent to a Celery broker."""
+    return (
+        not getattr(settings, 'TESTING', False) and
+        bool(getattr(settings, 'CELERY_BROKER_URL', None)) and
+        settings.CELERY_BROKER_URL != 'redis://localhost:6379'  # Default Redis that might not be running
+    )
+
+
+class InProcessTaskExecutor:
+    """
+    Celery fallback for nodes without a broker: a fixed number of worker threads reading a
+    bounded in-memory queue.
+
+    enqueue() stores the task as a QueuedTask row in the caller's transaction and hands its ID
+    to the workers once the transaction commits; rows the workers never got to (full queue,
+    restart, crash) are picked up again by an idle worker every RECOVERY_INTERVAL seconds.
+    submit() queues a plain callable for work that is already durable elsewhere. The recovery
+    pass also queues the PERIODIC_TASKS, as Celery beat would with a broker.
+
+    Workers start with the first submitted item, or with start(), which AIIntegrationConfig.ready()
+    calls in server processes so recovery and the periodic tasks also run on a process that never
+    submits anything.
+
+    A full queue blocks submitters for up to submit_timeout seconds before the work is left to
+    recovery (or, for callables, rejected), so memory stays bounded under load. shutdown() stops
+    taking new work and lets the workers finish the queue for up to shutdown_timeout seconds.
+    """
+
+    RECOVERY_INTERVAL = 60
+    IDLE_POLL_SECONDS = 1
+
+    def __init__(self, max_workers=None, queue_size=None, submit_timeout=None, shutdown_timeout=None,
+                 max_attempts=None, stale_seconds=None):
+        self.max_workers = max_workers or getattr(settings, 'TASK_EXECUTOR_WORKERS', 4)
+        self.submit_timeout = submit_timeout if submit_timeout is not None else getattr(
+            settings, 'TASK_EXECUTOR_SUBMIT_TIMEOUT_SECONDS', 5
+        )
+        self.shutdown_timeout = shutdown_timeout if shutdown_timeout is not None else getattr(
+            settings, 'TASK_EXECUTOR_SHUTDOWN_TIMEOUT_SECONDS', 30
+        )
+        self.max_attempts = max_attempts or getattr(settings, 'TASK_EXECUTOR_MAX_ATTEMPTS', 3)
+        self.stale_seconds = stale_seconds or getattr(settings, 'TASK_EXECUTOR_STALE_SECONDS', 3600)
+
+        self._queue = queue.Queue(maxsize=queue_size or getattr(settings, 'TASK_EXECUTOR_QUEUE_SIZE', 100))
+        self._lock = threading.Lock()
+        self._workers = []
+        self._stopping = threading.Event()
+        self._shutdown_deadline = None
+        self._last_recovery = 0
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._workers or self._stopping.is_set():
+                return
+            for i in range(self.max_workers):
+                worker = threading.Thread(target=self._worker_loop, name=f'task-executor-{i}', daemon=True)
+                worker.start()
+                self._workers.append(worker)
+            atexit.register(self.shutdown)
+
+    @property
+    def started(self):
+        return bool(self._workers)
+
+    def start(self):
+        """Start the worker threads, if they are not running yet."""
+        self._ensure_started()
+
+    def _put(self, item):
+        """Queue an item, waiting for a free slot up to submit_timeout. Returns False if it was not queued."""
+        if self._stopping.is_set():
+            return False
+        self._ensure_started()
+        try:
+            self._queue.put(item, timeout=self.submit_timeout)
+        except queue.Full:
+            return False
+        return True
+
+    def submit(self, func, *args):
+        """Queue a callable that is not stored in the database. Returns False if the queue stayed full."""
+        queued = self._put((func, args))
+        if not queued:
+            logger.warning(f"Task executor queue is full - {func.__name__} was not queued")
+        return queued
+
+    def enqueue(self, task_name, args=None, kwargs=None):
+        """Store a task and queue it once the current transaction commits. Returns the QueuedTask."""
+        from .models import QueuedTask
+
+        task = QueuedTask.objects.create(task_name=task_name, args=list(args or ()), kwargs=dict(kwargs or {}))
+
+        def hand_over():
+            if not self._put(task.id):
+                logger.warning(f"Task executor queue is full - task {task.id} ({task_name}) waits for recovery")
+        transaction.on_commit(hand_over)
+        return task
+
+    def run_task(self, task_id):
+        """Claim and run a stored task. Returns True if the task was claimed by this call."""
+        from .models import QueuedTask
+
+        claimed = QueuedTask.objects.filter(pk=task_id, status='QUEUED').update(
+            status='RUNNING', attempts=F('attempts') + 1, started_at=timezone.now()
+        )
+        if not claimed:
+            return False
+
+        task = QueuedTask.objects.get(pk=task_id)
+        try:
+            import_string(task.task_name)(*task.args, **task.kwargs)
+        except Exception as e:
+            logger.exception(f"Queued task {task.id} ({task.task_name}) failed: {e}")
+            # Failed tasks are retried by the next recovery pass until they run out of attempts
+            QueuedTask.objects.filter(pk=task_id).update(
+                status='QUEUED' if task.attempts < self.max_attempts else 'FAILED', last_error=str(e)
+            )
+            return True
+
+        QueuedTask.objects.filter(pk=task_id).delete()
+        return True
+
+    def recover(self):
+        """
+        Queue stored tasks that are not in the in-memory queue: queued rows, and running rows
+        whose worker died more than stale_seconds ago. Stops when the queue is full.
+        Returns the number of tasks queued.
+        """
+        from .models import QueuedTask
+
+        QueuedTask.objects.filter(
+            status='RUNNING', started_at__lt=timezone.now() - timedelta(seconds=self.stale_seconds)
+        ).update(status='QUEUED')
+
+        recovered = 0
+        task_ids = QueuedTask.objects.filter(status='QUEUED').order_by('created_at', 'id').values_list('id', flat=True)
+        for task_id in task_ids[:self._queue.maxsize]:
+            try:
+                self._queue.put_nowait(task_id)
+            except queue.Full:
+                break
+            recovered += 1
+        return recovered
+
+    def _worker_loop(self):
+        while True:
+            stopping = self._stopping.is_set()
+            if stopping and time.monotonic() >= self._shutdown_deadline:
+                return
+            try:
+                item = self._queue.get(timeout=self.IDLE_POLL_SECONDS)
+            except queue.Empty:
+                if stopping:
+                    return
+                self._recover_when_due()
+                continue
+
+            try:
+                if isinstance(item, tuple):
+                    func, args = item
+                    func(*args)
+                else:
+                    self.run_task(item)
+            except Exception as e:
+                logger.exception(f"Background task failed: {e}")
+            finally:
+                self._queue.task_done()
+                close_old_connections()
+
+    def _recover_when_due(self):
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_recovery < self.RECOVERY_INTERVAL:
+                return
+            self._last_recovery = now
+        try:
+            recovered = self.recover()
+            if recovered:
+                logger.info(f"Task executor recovered {recovered} queued tasks")
+        except Exception as e:
+            logger.exception(f"Task executor recovery failed: {e}")
+        finally:
+            close_old_connections()
+        self.submit_periodic_tasks()
+
+    def submit_periodic_tasks(self):
+        """Queue the PERIODIC_TASKS; they are not stored, as the next pass queues them again."""
+        for task_name in getattr(settings, 'PERIODIC_TASKS', []):
+            try:
+                self.submit(import_string(task_name))
+            except ImportError as e:
+                logger.error(f"Periodic task {task_name} could not be imported: {e}")
+
+    def shutdown(self, timeout=None):
+        """
+        Stop taking new work and wait up to timeout seconds for the workers to finish the queue.
+        Stored tasks still queued afterwards are run by the next process.
+        """
+        timeout = self.shutdown_timeout if timeout is None else timeout
+        with self._lock:
+            self._shutdown_deadline = time.monotonic() + timeout
+            self._stopping.set()
+            workers = list(self._workers)
+        for worker in workers:
+            worker.join(max(0, self._shutdown_deadline - time.monotonic()))
+        if not self._queue.empty():
+            logger.warning(f"Task executor stopped with {self._queue.qsize()} queued items left")
+
+
+_task_executor = None
+_task_executor_lock = threading.Lock()
+
+
+def get_task_executor():
+    """Get the process-wide InProcessTaskExecutor."""
+    global _task_executor
+    with _task_executor_lock:
+        if _task_executor is None:
+            _task_executor = InProcessTaskExecutor()
+        return _task_executor
+
+
+def _restart_task_executor_after_fork():
+    """
+    Worker threads do not survive a fork (e.g. gunicorn's preload_app), so a forked child gets
+    a fresh executor, started if the parent's was.
+    """
+    global _task_executor, _task_executor_lock
+    _task_executor_lock = threading.Lock()
+    executor, _task_executor = _task_executor, None
+    if executor is not None and executor.started:
+        get_task_executor().start()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_task_executor_after_fork)
+
+
+class FallbackTask(Task):
+    """
+    Celery task base that runs on the in-process task executor when no broker is configured.
+    delay() and apply_async() keep their Celery signature; without a broker they return the
+    stored QueuedTask, whose id identifies the task like a Celery task id.
+    """
+
+    def apply_async(self, args=None, kwargs=None, **options):
+        if celery_broker_configured():
+            return super().apply_async(args, kwargs, **options)
+        return get_task_executor().enqueue(self.name, args, kwargs)
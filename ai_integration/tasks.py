@@ -1,9 +1,20 @@
+import logging
+import threading
 from celery import shared_task
-from .services import AIAnswerEvaluationService, ContentUpdateService
+from django.conf import settings
+from .services import AIAnswerEvaluationService, ContentUpdateService, EvaluationOutboxService
 from .models import ContentUpdateScanConfig
+from .task_executor import FallbackTask, celery_broker_configured, get_task_executor
 
+logger = logging.getLogger(__name__)
 
-@shared_task
+# In-process outbox drainers and whether a drain was requested since they last looked
+_outbox_lock = threading.Lock()
+_outbox_drainers = 0
+_outbox_drain_requested = False
+
+
+@shared_task(base=FallbackTask)
 def evaluate_user_answer(user_answer_id):
     """
     Celery task to evaluate a user answer asynchronously.
@@ -11,16 +22,92 @@ def evaluate_user_answer(user_answer_id):
     AIAnswerEvaluationService.evaluate_user_answer(user_answer_id)
 
 
-@shared_task
+@shared_task(base=FallbackTask)
 def evaluate_user_answers_batch(user_answer_ids):
     """
     Celery task to evaluate a batch of user answers asynchronously.
+    The OpenAI requests of the batch run concurrently.
+    """
+    return AIAnswerEvaluationService.evaluate_user_answers_batch(user_answer_ids)
+
+
+@shared_task(base=FallbackTask)
+def grade_exam_session(exam_session_id, user_answer_ids):
+    """
+    Celery task to evaluate the pending answers of a session in GRADING state
+    and finalize the session once they are graded.
+    """
+    from assessment.services import ExamSessionGradingService
+
+    AIAnswerEvaluationService.evaluate_user_answers_batch(user_answer_ids)
+    ExamSessionGradingService.record_answer_graded(exam_session_id)
+
+
+@shared_task(base=FallbackTask)
+def finalize_stalled_grading_sessions():
+    """
+    Periodic task finalizing exam sessions left in GRADING by a lost worker.
     """
-    for user_answer_id in user_answer_ids:
-        AIAnswerEvaluationService.evaluate_user_answer(user_answer_id)
+    from assessment.services import ExamSessionGradingService
+
+    return ExamSessionGradingService.finalize_stalled_sessions()
+
+
+def dispatch_exam_session_grading(exam_session_id, user_answer_ids):
+    """
+    Grade the answers of a session in GRADING state in the background, on Celery or the
+    in-process task executor. The answers themselves are evaluated concurrently by the batch evaluator.
+    """
+    grade_exam_session.delay(exam_session_id, user_answer_ids)
+
+
+@shared_task(base=FallbackTask)
+def drain_evaluation_outbox():
+    """
+    Celery task to evaluate the outstanding jobs of the evaluation outbox.
+    """
+    return EvaluationOutboxService.drain()
+
+
+def dispatch_evaluation_outbox():
+    """
+    Drain the evaluation outbox in the background; called once the enqueuing transaction commits.
+    Uses Celery when a broker is configured, otherwise at most AI_EVALUATION_OUTBOX_WORKERS
+    drainers on the in-process task executor. The jobs are durable in the outbox, so drains are
+    not stored as queued tasks; requests arriving while every drainer is busy are picked up by a
+    running drainer before it stops.
+    """
+    global _outbox_drainers, _outbox_drain_requested
+    if celery_broker_configured():
+        drain_evaluation_outbox.delay()
+        return
+
+    with _outbox_lock:
+        _outbox_drain_requested = True
+        if _outbox_drainers >= getattr(settings, 'AI_EVALUATION_OUTBOX_WORKERS', 2):
+            return
+        _outbox_drainers += 1
+    if not get_task_executor().submit(_drain_evaluation_outbox_in_executor):
+        # The jobs stay in the outbox for the next drain
+        with _outbox_lock:
+            _outbox_drainers -= 1
+
+
+def _drain_evaluation_outbox_in_executor():
+    global _outbox_drainers, _outbox_drain_requested
+    while True:
+        with _outbox_lock:
+            if not _outbox_drain_requested:
+                _outbox_drainers -= 1
+                return
+            _outbox_drain_requested = False
+        try:
+            EvaluationOutboxService.drain()
+        except Exception as e:
+            logger.exception(f"Draining the evaluation outbox failed: {e}")
 
 
-@shared_task
+@shared_task(base=FallbackTask)
 def run_content_update_scan(scan_config_id):
     """
     Celery task to run a content update scan for a specific configuration.
@@ -28,7 +115,7 @@ def run_content_update_scan(scan_config_id):
     return ContentUpdateService.run_content_update_scan(scan_config_id)
 
 
-@shared_task
+@shared_task(base=FallbackTask)
 def check_and_schedule_content_update_scans():
     """
     Celery task to check for due content update scans and schedule them.
@@ -1,8 +1,10 @@
-from django.test import TestCase
+import json
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
 from unittest.mock import patch, MagicMock
 from .models import AIContentAlert, AIEvaluationLog, ChatbotConversation, ChatbotMessage
 from .services import AIAnswerEvaluationService
@@ -46,7 +48,11 @@ class AIServiceTestCase(TestCase):
     """Basic tests for AI services"""
     
     def setUp(self):
+        from django.core.cache import cache
+        from .evaluation_cache import get_evaluation_cache
         self.ai_service = AIAnswerEvaluationService()
+        get_evaluation_cache().clear()
+        cache.clear()
         
     def test_ai_service_initialization(self):
         """Test AI service initialization"""
@@ -54,6 +60,329 @@ class AIServiceTestCase(TestCase):
         # For now, it's just a placeholder to ensure the test file loads
         self.assertIsNotNone(self.ai_service)
 
+    def test_batch_evaluation_writes_results_in_bulk(self):
+        """Test that batch evaluation runs requests concurrently and stores all results"""
+        import json
+        import threading
+        from django.utils import timezone
+        from exams.models import Exam
+        from questions.models import Question
+        from assessment.models import UserAnswer
+
+        user = User.objects.create_user(username='student', email='student@example.com', password='testpass123')
+        exam = Exam.objects.create(name='Test Exam', slug='test-exam')
+        question = Question.objects.create(
+            exam=exam, text='Explain', question_type='OPEN_ENDED', difficulty='EASY', points=10
+        )
+        answers = [
+            UserAnswer.objects.create(
+                user=user, question=question, submitted_answer_text=f'Answer {i}',
+                max_possible_score=10, evaluation_status='EVALUATED', submission_time=timezone.now()
+            )
+            for i in range(4)
+        ]
+        answer_ids = [answer.id for answer in answers]
+        # Set PENDING without triggering the evaluation signal
+        UserAnswer.objects.filter(id__in=answer_ids).update(evaluation_status='PENDING')
+
+        barrier = threading.Barrier(4, timeout=5)
+
+        def fake_call(prompt, **kwargs):
+            # Every request must be in flight at the same time to pass the barrier
+            barrier.wait()
+            return json.dumps({'raw_score': 7, 'is_correct': True, 'ai_feedback': 'Good'}), 5, None
+
+        with patch.object(AIAnswerEvaluationService, 'call_openai_api', side_effect=fake_call):
+            result = AIAnswerEvaluationService.evaluate_user_answers_batch(answer_ids, max_concurrency=4)
+
+        self.assertEqual(result, {'evaluated': 4, 'errors': 0, 'skipped': 0})
+        self.assertEqual(
+            UserAnswer.objects.filter(id__in=answer_ids, evaluation_status='EVALUATED', raw_score=7).count(), 4
+        )
+        self.assertEqual(AIEvaluationLog.objects.filter(user_answer_id__in=answer_ids, success=True).count(), 4)
+
+
+    def test_calculation_answers_only_normalize_whitespace(self):
+        """Test that calculation answers differing in more than whitespace get different cache keys"""
+        from .evaluation_cache import EvaluationCache
+
+        self.assertEqual(EvaluationCache.normalize_answer('  Photosynthesis. '), 'photosynthesis')
+        self.assertEqual(EvaluationCache.normalize_answer(' 1.5\n m/s ', 'CALCULATION'), '1.5 m/s')
+        normalized = {
+            EvaluationCache.normalize_answer(text, 'CALCULATION')
+            for text in ['1.5', '15', '1.5.', '-1.5', 'x = 1.5', 'X = 1.5']
+        }
+        self.assertEqual(len(normalized), 6)
+
+    def test_identical_answers_reuse_cached_evaluation(self):
+        """Test that answers equal after normalization are evaluated only once"""
+        import json
+        from django.utils import timezone
+        from exams.models import Exam
+        from questions.models import Question
+        from assessment.models import UserAnswer
+
+        user = User.objects.create_user(username='student', email='student@example.com', password='testpass123')
+        exam = Exam.objects.create(name='Test Exam', slug='test-exam')
+        question = Question.objects.create(
+            exam=exam, text='Explain', question_type='OPEN_ENDED', difficulty='EASY', points=10
+        )
+        answers = [
+            UserAnswer.objects.create(
+                user=user, question=question, submitted_answer_text=text,
+                max_possible_score=10, evaluation_status='EVALUATED', submission_time=timezone.now()
+            )
+            for text in ['Photosynthesis.', '  photosynthesis ', 'Respiration', 'PHOTOSYNTHESIS']
+        ]
+        answer_ids = [answer.id for answer in answers]
+        UserAnswer.objects.filter(id__in=answer_ids).update(evaluation_status='PENDING')
+
+        ai_response = json.dumps({'raw_score': 7, 'is_correct': True, 'ai_feedback': 'Good'})
+        with patch.object(AIAnswerEvaluationService, 'call_openai_api', return_value=(ai_response, 5, None)) as call:
+            result = AIAnswerEvaluationService.evaluate_user_answers_batch(answer_ids[:3])
+            self.assertEqual(call.call_count, 2)
+
+            # A later identical answer is served from the cache
+            AIAnswerEvaluationService.evaluate_user_answer(answer_ids[3])
+            self.assertEqual(call.call_count, 2)
+
+        self.assertEqual(result, {'evaluated': 3, 'errors': 0, 'skipped': 0})
+        self.assertEqual(
+            UserAnswer.objects.filter(id__in=answer_ids, evaluation_status='EVALUATED', raw_score=7).count(), 4
+        )
+
+    def test_evaluation_outbox_drains_committed_jobs(self):
+        """Test that queued evaluations run after commit, once per answer, and back off before giving up on failures"""
+        import json
+        from django.utils import timezone
+        from exams.models import Exam
+        from questions.models import Question
+        from assessment.models import UserAnswer
+        from .models import AIEvaluationJob
+        from .services import EvaluationOutboxService
+
+        user = User.objects.create_user(username='student', email='student@example.com', password='testpass123')
+        exam = Exam.objects.create(name='Test Exam', slug='test-exam')
+        question = Question.objects.create(
+            exam=exam, text='Explain', question_type='OPEN_ENDED', difficulty='EASY', points=10
+        )
+        answers = [
+            UserAnswer.objects.create(
+                user=user, question=question, submitted_answer_text=f'Answer {i}',
+                max_possible_score=10, evaluation_status='PENDING', submission_time=timezone.now()
+            )
+            for i in range(3)
+        ]
+        # Saving answers alone queues nothing
+        self.assertFalse(AIEvaluationJob.objects.exists())
+
+        with patch('ai_integration.tasks.dispatch_evaluation_outbox') as dispatch:
+            with self.captureOnCommitCallbacks() as callbacks:
+                EvaluationOutboxService.enqueue([answers[0].id, answers[1].id, answers[0].id])
+            self.assertEqual(AIEvaluationJob.objects.count(), 2)
+            self.assertEqual(len(callbacks), 1)
+            dispatch.assert_not_called()
+
+        ai_response = json.dumps({'raw_score': 7, 'is_correct': True, 'ai_feedback': 'Good'})
+        with patch.object(AIAnswerEvaluationService, 'call_openai_api', return_value=(ai_response, 5, None)):
+            self.assertEqual(EvaluationOutboxService.drain(), 2)
+        self.assertFalse(AIEvaluationJob.objects.exists())
+        self.assertEqual(UserAnswer.objects.filter(evaluation_status='EVALUATED').count(), 2)
+
+        with self.captureOnCommitCallbacks():
+            EvaluationOutboxService.enqueue([answers[2].id])
+        with patch.object(
+            AIAnswerEvaluationService, 'evaluate_user_answers_batch', side_effect=RuntimeError('down')
+        ) as evaluate:
+            # A failed batch stops the drain and is not retried before its backoff has passed
+            self.assertEqual(EvaluationOutboxService.drain(), 1)
+            job = AIEvaluationJob.objects.get(user_answer=answers[2])
+            self.assertEqual((job.status, job.attempts), ('PENDING', 1))
+            self.assertGreater(job.next_attempt_at, timezone.now())
+            self.assertEqual(EvaluationOutboxService.drain(), 0)
+
+            for _ in range(EvaluationOutboxService.MAX_ATTEMPTS - 1):
+                AIEvaluationJob.objects.update(next_attempt_at=timezone.now())
+                self.assertEqual(EvaluationOutboxService.drain(), 1)
+        self.assertEqual(evaluate.call_count, EvaluationOutboxService.MAX_ATTEMPTS)
+        job = AIEvaluationJob.objects.get(user_answer=answers[2])
+        self.assertEqual((job.status, job.attempts, job.last_error), ('FAILED', 3, 'down'))
+
+
+class LLMClientTestCase(TestCase):
+    """Tests for the shared OpenAI client"""
+
+    def _response(self, status_code, content=None, headers=None):
+        response = MagicMock(status_code=status_code, text='error', headers=headers or {})
+        response.json.return_value = {'choices': [{'message': {'content': content}}]}
+        return response
+
+    @override_settings(OPENAI_API_KEY='test-key')
+    def test_retries_rate_limited_requests(self):
+        """Test that 429 responses are retried and recorded in the metrics"""
+        from .llm_client import LLMClient
+
+        client = LLMClient(max_retries=2, backoff_base=0.001)
+        responses = [self._response(429, headers={'Retry-After': '0'}), self._response(200, '{"ok": true}')]
+        with patch.object(client.http_session, 'post', side_effect=responses) as post:
+            content, processing_time, error = client.chat_completion(
+                [{'role': 'user', 'content': 'Hi'}], purpose='evaluation'
+            )
+
+        self.assertEqual(content, '{"ok": true}')
+        self.assertIsNone(error)
+        self.assertEqual(post.call_count, 2)
+        metrics = client.get_metrics()['evaluation']
+        self.assertEqual(metrics['calls'], 1)
+        self.assertEqual(metrics['retries'], 1)
+        self.assertEqual(metrics['errors'], 0)
+
+    @override_settings(OPENAI_API_KEY='test-key')
+    def test_client_errors_are_not_retried(self):
+        """Test that non-retryable errors fail immediately"""
+        from .llm_client import LLMClient
+
+        client = LLMClient(max_retries=2)
+        with patch.object(client.http_session, 'post', return_value=self._response(400)) as post:
+            content, processing_time, error = client.chat_completion([{'role': 'user', 'content': 'Hi'}])
+
+        self.assertIsNone(content)
+        self.assertIn('400', error)
+        self.assertEqual(post.call_count, 1)
+
+
+class RequestSchedulerTestCase(TestCase):
+    """Tests for the rate-limit-aware OpenAI request scheduler"""
+
+    def test_interactive_requests_are_dispatched_before_batch_requests(self):
+        """Test that queued chatbot requests overtake queued grading requests"""
+        import threading
+        from .request_scheduler import RequestScheduler
+
+        started = threading.Event()
+        release = threading.Event()
+        order = []
+
+        def fake_completion(messages, purpose='default', **params):
+            if purpose == 'blocker':
+                started.set()
+                release.wait(5)
+            order.append(purpose)
+            return 'ok', 1, None
+
+        client = MagicMock()
+        client.chat_completion.side_effect = fake_completion
+        scheduler = RequestScheduler(client=client, requests_per_minute=1000, tokens_per_minute=10 ** 6, max_workers=1)
+
+        blocker = scheduler.submit([{'role': 'user', 'content': 'Hi'}], purpose='blocker')
+        self.assertTrue(started.wait(5))
+        batch = [scheduler.submit([{'role': 'user', 'content': 'Hi'}], purpose='grading') for _ in range(2)]
+        interactive = scheduler.submit([{'role': 'user', 'content': 'Hi'}], purpose='chatbot')
+        release.set()
+
+        for future in [blocker, interactive] + batch:
+            self.assertEqual(future.result(timeout=5), ('ok', 1, None))
+        self.assertEqual(order, ['blocker', 'chatbot', 'grading', 'grading'])
+
+    def test_reservations_take_budget_without_a_worker(self):
+        """Test that a reservation resolves while all workers are busy and draws from the budgets"""
+        import threading
+        from .request_scheduler import RequestScheduler
+
+        started = threading.Event()
+        release = threading.Event()
+
+        def fake_completion(messages, purpose='default', **params):
+            started.set()
+            release.wait(5)
+            return 'ok', 1, None
+
+        client = MagicMock()
+        client.chat_completion.side_effect = fake_completion
+        scheduler = RequestScheduler(client=client, requests_per_minute=1000, tokens_per_minute=10 ** 6, max_workers=1)
+
+        blocker = scheduler.submit([{'role': 'user', 'content': 'Hi'}], purpose='grading')
+        self.assertTrue(started.wait(5))
+        reservation = scheduler.reserve([{'role': 'user', 'content': 'Hi'}], purpose='chatbot', max_tokens=100)
+        self.assertIsNone(reservation.result(timeout=5))
+        self.assertEqual(client.chat_completion.call_count, 1)
+        self.assertLessEqual(scheduler.get_stats()['requests_available'], 998)
+        release.set()
+        self.assertEqual(blocker.result(timeout=5), ('ok', 1, None))
+
+    @override_settings(OPENAI_REQUESTS_PER_MINUTE=600, OPENAI_TOKENS_PER_MINUTE=90000, OPENAI_SCHEDULER_PROCESSES=3)
+    def test_limits_are_split_between_processes_and_retries_are_charged(self):
+        """Test that each process gets its share of the account limits and retries draw from it"""
+        from .request_scheduler import RequestScheduler
+
+        client = MagicMock()
+        scheduler = RequestScheduler(client=client, max_workers=1)
+        self.assertEqual(scheduler.request_bucket.capacity, 200)
+        self.assertEqual(scheduler.token_bucket.capacity, 30000)
+
+        client.on_retry()
+        self.assertEqual(scheduler.get_stats()['requests_available'], 199)
+
+    def test_token_bucket_waits_for_budget(self):
+        """Test that the bucket reports the wait until enough budget has refilled"""
+        from .request_scheduler import TokenBucket
+
+        bucket = TokenBucket(per_minute=60)
+        now = bucket.updated_at
+        self.assertEqual(bucket.time_until_available(60, now), 0)
+        bucket.consume(60, now)
+        self.assertAlmostEqual(bucket.time_until_available(2, now), 2.0)
+        self.assertEqual(bucket.time_until_available(2, now + 2), 0)
+
+
+class ChatbotStreamingTestCase(TestCase):
+    """Tests for the streamed chatbot replies"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='streamuser',
+            email='stream@example.com',
+            password='testpass123'
+        )
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+
+    @override_settings(OPENAI_API_KEY='test-key')
+    async def test_stream_relays_deltas_and_stores_reply_once(self):
+        """Test that deltas are sent as events and the assembled reply is stored at the end"""
+        async def fake_stream(messages, **params):
+            for delta in ['Hello', ', how can', ' I help?']:
+                yield delta
+
+        with patch('ai_integration.llm_client.stream_chat_completion', side_effect=fake_stream):
+            response = await self.async_client.post(
+                reverse('chatbot-message-stream'),
+                {'message': 'Hi there'},
+                content_type='application/json',
+                headers={'Authorization': f'Bearer {self.token}'}
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+            body = ''.join([chunk.decode() async for chunk in response.streaming_content])
+
+        events = [event.split('\n', 1) for event in body.strip().split('\n\n')]
+        self.assertEqual([name for name, data in events], ['event: delta'] * 3 + ['event: done'])
+        done = json.loads(events[-1][1][len('data: '):])
+        self.assertEqual(done['content'], 'Hello, how can I help?')
+        self.assertIsNotNone(done['time_to_first_token_ms'])
+
+        replies = [message async for message in ChatbotMessage.objects.filter(role='ASSISTANT')]
+        self.assertEqual(len(replies), 1)
+        self.assertEqual(replies[0].content, 'Hello, how can I help?')
+        self.assertEqual(replies[0].time_to_first_token_ms, done['time_to_first_token_ms'])
+        self.assertEqual(replies[0].processing_time_ms, done['processing_time_ms'])
+
+    async def test_stream_requires_authentication(self):
+        """Test that anonymous requests are rejected before streaming starts"""
+        response = await self.async_client.post(
+            reverse('chatbot-message-stream'), {'message': 'Hi'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 401)
+
 
 class AIIntegrationAPITestCase(APITestCase):
     """Basic API tests for AI integration endpoints"""
@@ -70,4 +399,89 @@ class AIIntegrationAPITestCase(APITestCase):
         """Test that AI integration endpoints are accessible"""
         # This is a basic test to ensure endpoints exist
         # Add more specific tests as needed based on actual endpoints
-        pass 
\ No newline at end of file
+        pass 
+
+class TaskExecutorTestCase(TestCase):
+    """Tests for the in-process Celery fallback"""
+
+    def test_tasks_without_broker_are_stored_and_retried(self):
+        """Test that delay() stores the task, hands it over after commit and retries failures"""
+        from .models import QueuedTask
+        from .task_executor import InProcessTaskExecutor
+        from .tasks import evaluate_user_answers_batch
+
+        executor = InProcessTaskExecutor(max_workers=1, queue_size=1, max_attempts=2)
+        with patch('ai_integration.task_executor.get_task_executor', return_value=executor):
+            with self.captureOnCommitCallbacks() as callbacks:
+                task = evaluate_user_answers_batch.delay([1, 2])
+        self.assertEqual(len(callbacks), 1)
+        stored = QueuedTask.objects.get(pk=task.id)
+        self.assertEqual((stored.task_name, stored.args, stored.status), (
+            'ai_integration.tasks.evaluate_user_answers_batch', [[1, 2]], 'QUEUED'
+        ))
+
+        with patch.object(AIAnswerEvaluationService, 'evaluate_user_answers_batch', side_effect=RuntimeError('down')):
+            self.assertTrue(executor.run_task(task.id))
+            self.assertEqual(QueuedTask.objects.get(pk=task.id).status, 'QUEUED')
+            self.assertTrue(executor.run_task(task.id))
+        stored = QueuedTask.objects.get(pk=task.id)
+        self.assertEqual((stored.status, stored.attempts, stored.last_error), ('FAILED', 2, 'down'))
+        self.assertFalse(executor.run_task(task.id))
+
+        with patch('ai_integration.task_executor.get_task_executor', return_value=executor):
+            with self.captureOnCommitCallbacks():
+                task = evaluate_user_answers_batch.delay([3])
+        with patch.object(AIAnswerEvaluationService, 'evaluate_user_answers_batch') as evaluate:
+            self.assertTrue(executor.run_task(task.id))
+        evaluate.assert_called_once_with([3])
+        self.assertFalse(QueuedTask.objects.filter(pk=task.id).exists())
+
+    def test_bounded_queue_applies_backpressure_and_drains_on_shutdown(self):
+        """Test that a full queue rejects work after the submit timeout and shutdown finishes queued work"""
+        import threading
+        from .task_executor import InProcessTaskExecutor
+
+        executor = InProcessTaskExecutor(max_workers=1, queue_size=1, submit_timeout=0, shutdown_timeout=5)
+        started = threading.Event()
+        release = threading.Event()
+        ran = []
+
+        def blocker():
+            started.set()
+            release.wait(5)
+            ran.append('blocker')
+
+        with patch.object(executor, 'recover', return_value=0):
+            self.assertTrue(executor.submit(blocker))
+            self.assertTrue(started.wait(5))
+            self.assertTrue(executor.submit(ran.append, 'queued'))
+            self.assertFalse(executor.submit(ran.append, 'rejected'))
+
+            release.set()
+            executor.shutdown()
+        self.assertEqual(ran, ['blocker', 'queued'])
+        self.assertFalse(executor.submit(ran.append, 'late'))
+
+    def test_executor_starts_with_server_processes_only(self):
+        """Test that app loading starts the executor in servers but not in management commands"""
+        import sys
+        from django.apps import apps
+        from .apps import is_server_process
+
+        with patch.object(sys, 'argv', ['manage.py', 'test']):
+            self.assertFalse(is_server_process())
+        with patch.object(sys, 'argv', ['manage.py', 'runserver', '--noreload']):
+            self.assertTrue(is_server_process())
+        with patch.object(sys, 'argv', ['/srv/venv/bin/gunicorn', 'exam_prep_platform.wsgi:application']), \
+                patch.dict(sys.modules):
+            sys.modules.pop('pytest', None)
+            self.assertTrue(is_server_process())
+
+        executor = MagicMock()
+        with patch('ai_integration.task_executor.get_task_executor', return_value=executor):
+            with patch('ai_integration.apps.is_server_process', return_value=False):
+                apps.get_app_config('ai_integration').ready()
+            executor.start.assert_not_called()
+            with patch('ai_integration.apps.is_server_process', return_value=True):
+                apps.get_app_config('ai_integration').ready()
+            executor.start.assert_called_once_with()
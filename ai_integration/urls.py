@@ -7,7 +7,8 @@ from .views import (
     GetAIExplanation,
     ContentUpdateScanConfigViewSet,
     ContentUpdateScanLogViewSet,
-    ChatbotViewSet
+    ChatbotViewSet,
+    stream_chatbot_message
 )
 
 # Setup the router for viewsets
@@ -23,4 +24,5 @@ urlpatterns = [
     path('evaluate/batch/', TriggerBatchEvaluation.as_view(), name='evaluate-batch'),
     path('explain/', GetAIExplanation.as_view(), name='get-ai-explanation'),
     path('chatbot/conversations/<int:conversation_id>/messages/', ChatbotViewSet.as_view({'post': 'send_message'}), name='chatbot-message-create'),
+    path('chatbot/messages/stream/', stream_chatbot_message, name='chatbot-message-stream'),
 ] 
\ No newline at end of file
@@ -1,4 +1,8 @@
+import json
+from asgiref.sync import sync_to_async
 from rest_framework import viewsets, permissions, status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework.views import APIView
@@ -7,6 +11,10 @@ from exam_prep_platform.permissions import IsAdminUser
 from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from django.db import transaction
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 from .models import (
     AIContentAlert, 
     ContentUpdateScanConfig, 
@@ -19,7 +27,6 @@ from .models import (
 from assessment.models import UserAnswer
 from questions.models import Question
 from .tasks import (
-    evaluate_user_answer, 
     evaluate_user_answers_batch, 
     run_content_update_scan
 )
@@ -37,7 +44,7 @@ from .serializers import (
     ChatbotMessageRequestSerializer,
     ChatbotMessageCreateSerializer
 )
-from .services import AIAnswerEvaluationService, ContentUpdateService, ChatbotService
+from .services import AIAnswerEvaluationService, ContentUpdateService, ChatbotService, EvaluationOutboxService
 
 
 class AIContentAlertViewSet(viewsets.ModelViewSet):
@@ -97,14 +104,15 @@ class TriggerUserAnswerEvaluation(APIView):
             # Get the user answer to ensure it exists
             user_answer = get_object_or_404(UserAnswer, id=user_answer_id)
             
-            # Reset the evaluation status to PENDING if it was previously evaluated
-            if user_answer.evaluation_status in ['EVALUATED', 'ERROR']:
-                user_answer.evaluation_status = 'PENDING'
-                user_answer.ai_feedback = None
-                user_answer.save()
-            
-            # Queue the evaluation task
-            evaluate_user_answer.delay(user_answer_id)
+            with transaction.atomic():
+                # Reset the evaluation status to PENDING if it was previously evaluated
+                if user_answer.evaluation_status in ['EVALUATED', 'ERROR']:
+                    user_answer.evaluation_status = 'PENDING'
+                    user_answer.ai_feedback = None
+                    user_answer.save()
+                
+                # Queue the evaluation through the outbox
+                EvaluationOutboxService.enqueue([user_answer_id])
             
             return Response(
                 {"detail": f"Evaluation of user answer {user_answer_id} has been queued."},
@@ -323,6 +331,55 @@ class ChatbotViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+def _sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@csrf_exempt
+@require_POST
+async def stream_chatbot_message(request):
+    """
+    Send a message to the chatbot and stream the response as Server-Sent Events.
+    Takes the same body as send_message and sends 'delta' events with the reply as it is
+    generated, then a 'done' event with the stored message (or an 'error' event).
+    A plain async Django view, since DRF views cannot stream from the event loop. It only
+    streams under ASGI; deploy.sh routes this path to the uvicorn process (see asgi.py).
+    """
+    try:
+        authenticated = await sync_to_async(JWTAuthentication().authenticate)(request)
+    except AuthenticationFailed as e:
+        return JsonResponse({"error": str(e.detail)}, status=status.HTTP_401_UNAUTHORIZED)
+    if authenticated is None:
+        return JsonResponse(
+            {"error": "Authentication credentials were not provided."},
+            status=status.HTTP_401_UNAUTHORIZED
+        )
+    user = authenticated[0]
+    
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        data = None
+    serializer = ChatbotMessageCreateSerializer(data=data)
+    if not serializer.is_valid():
+        return JsonResponse({"error": "Invalid message data"}, status=status.HTTP_400_BAD_REQUEST)
+    
+    message = serializer.validated_data.get("message", "")
+    if not message.strip():
+        return JsonResponse({"error": "Message cannot be empty"}, status=status.HTTP_400_BAD_REQUEST)
+    
+    language = serializer.validated_data.get("language", "en")
+    
+    async def events():
+        async for event, payload in ChatbotService.stream_message(user, message, language=language):
+            yield _sse_event(event, payload)
+    
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Keep nginx from buffering the stream
+    return response
+
+
 class GetAIExplanation(APIView):
     """
     API endpoint for getting AI-generated explanations for user answers.
@@ -0,0 +1,116 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from analytics.models import UserPerformanceRecord
+from analytics.views import PerformanceByTopicView, PerformanceByDifficultyView
+from questions.models import Topic
+import time
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the topic and difficulty analytics for users with growing numbers of daily records'
+
+    QUESTION_TYPES = ('MCQ', 'OPEN_ENDED', 'CALCULATION')
+    DIFFICULTIES = ('EASY', 'MEDIUM', 'HARD')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=[100, 1000, 5000],
+            help='Numbers of performance records to benchmark with (default: 100 1000 5000)',
+        )
+        parser.add_argument(
+            '--topics',
+            type=int,
+            default=20,
+            help='Number of topics the records are spread over (default: 20)',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Timed runs per size; the median is reported (default: 5)',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('records  topic_ms  topic_queries  difficulty_ms  difficulty_queries')
+
+        for size in options['sizes']:
+            # Everything created for the benchmark is rolled back
+            with transaction.atomic():
+                user = self.create_records(size, options['topics'])
+                end_date = timezone.now().date()
+                start_date = end_date - timedelta(days=size)
+
+                topic_ms, topic_queries = self.measure(
+                    lambda: PerformanceByTopicView().get_topic_data(user, start_date, end_date),
+                    options['repeat']
+                )
+                difficulty_ms, difficulty_queries = self.measure(
+                    lambda: PerformanceByDifficultyView().get_difficulty_data(user, start_date, end_date),
+                    options['repeat']
+                )
+                self.stdout.write(
+                    f'{size:>7}  {topic_ms:>8.2f}  {topic_queries:>13}  {difficulty_ms:>13.2f}  {difficulty_queries:>18}'
+                )
+                transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS('✓ Benchmark completed - no data was kept'))
+
+    def create_records(self, size, topic_count):
+        """Create a user with size daily records spread over topics, question types and difficulties."""
+        suffix = time.time_ns()
+        user = User.objects.create_user(
+            username=f'benchmark_{suffix}',
+            email=f'benchmark_{suffix}@example.com',
+            password=None
+        )
+        topics = Topic.objects.bulk_create([
+            Topic(name=f'Benchmark topic {suffix} {i}', slug=f'benchmark-topic-{suffix}-{i}')
+            for i in range(topic_count)
+        ])
+        combinations = [
+            (topic, question_type, difficulty)
+            for topic in topics
+            for question_type in self.QUESTION_TYPES
+            for difficulty in self.DIFFICULTIES
+        ]
+        today = timezone.now().date()
+        UserPerformanceRecord.objects.bulk_create([
+            UserPerformanceRecord(
+                user=user,
+                topic=topic,
+                question_type=question_type,
+                difficulty=difficulty,
+                date_recorded=today - timedelta(days=i // len(combinations)),
+                questions_answered=5,
+                correct_answers=3,
+                partially_correct_answers=1,
+                total_points_earned=3.5,
+                total_points_possible=5,
+                total_time_spent_seconds=300
+            )
+            for i, (topic, question_type, difficulty) in enumerate(
+                combinations[i % len(combinations)] for i in range(size)
+            )
+        ], batch_size=1000)
+        return user
+
+    @staticmethod
+    def measure(compute, repeat):
+        """Get the median runtime in milliseconds and the query count of compute()."""
+        timings = []
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                compute()
+                timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        return timings[len(timings) // 2], len(queries)
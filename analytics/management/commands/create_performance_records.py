@@ -1,12 +1,69 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from django.core.management.base import BaseCommand
-from django.db import transaction
-from assessment.models import ExamSession
+from django.db import connections, transaction
+from django.db.models import Count
+from django.db.models.functions import Mod
+from assessment.models import ExamSession, UserAnswer
 from analytics.services import AnalyticsService
+import django
 import logging
+import multiprocessing
+import queue
+import time
 
 logger = logging.getLogger(__name__)
 
 
+def _init_backfill_worker():
+    """Set up Django in a worker process without reusing the parent's database connections."""
+    django.setup()
+    connections.close_all()
+
+
+def _queue_progress(progress_queue, partition, processed, records_written, errors):
+    """Progress callback of a worker process: hand the partition's running totals to the parent."""
+    progress_queue.put((partition, processed, records_written, errors))
+
+
+def backfill_partition(partition, partitions, chunk_size, user_id=None, progress=None):
+    """
+    Add the unrecorded completed sessions of the users in one partition (user_id % partitions)
+    to the performance records, committing one chunk of sessions per transaction.
+    Sessions are marked as recorded when they are added, so an interrupted run resumes with
+    the sessions that are still unrecorded.
+    progress, if given, is called with the running totals after each chunk.
+    Returns (sessions_processed, records_written, errors).
+    """
+    queryset = ExamSession.objects.filter(status='COMPLETED', analytics_recorded_at__isnull=True)
+    if user_id:
+        queryset = queryset.filter(user_id=user_id)
+    if partitions > 1:
+        queryset = queryset.annotate(partition=Mod('user_id', partitions)).filter(partition=partition)
+
+    processed = 0
+    records_written = 0
+    errors = 0
+    last_id = 0
+    while True:
+        # Read the next page of sessions by primary key, so memory stays bounded by chunk_size
+        sessions = list(queryset.filter(id__gt=last_id).order_by('id')[:chunk_size])
+        if not sessions:
+            break
+        last_id = sessions[-1].id
+        with transaction.atomic():
+            for session in sessions:
+                try:
+                    records_written += AnalyticsService.create_performance_records_from_session(session)
+                    processed += 1
+                except Exception as e:
+                    errors += 1
+                    logger.error(f'Error processing session {session.id}: {e}', exc_info=True)
+        if progress:
+            progress(processed, records_written, errors)
+    return processed, records_written, errors
+
+
 class Command(BaseCommand):
     help = 'Create UserPerformanceRecord entries from completed exam sessions'
 
@@ -32,6 +89,23 @@ class Command(BaseCommand):
             action='store_true',
             help='Show what would be done without making changes',
         )
+        parser.add_argument(
+            '--backfill',
+            action='store_true',
+            help='Process every completed session not yet recorded; resumes where an interrupted run stopped',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Backfill: number of processes, each handling a partition of the users (default: 1)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Backfill: number of sessions read and committed at a time (default: 500)',
+        )
 
     def handle(self, *args, **options):
         session_id = options['session_id']
@@ -42,6 +116,9 @@ class Command(BaseCommand):
         if dry_run:
             self.stdout.write(self.style.WARNING('DRY RUN MODE - No changes will be made'))
 
+        if options['backfill']:
+            return self.handle_backfill(user_id, options['workers'], options['chunk_size'], dry_run)
+
         # Build query for completed sessions
         queryset = ExamSession.objects.filter(status='COMPLETED')
         
@@ -53,8 +130,11 @@ class Command(BaseCommand):
             # For bulk operations, order by most recent first
             queryset = queryset.order_by('-actual_end_time')
         
+        if dry_run:
+            queryset = queryset.annotate(answer_count=Count('user_answers'))
+
         # Limit the number of sessions to process
-        sessions = queryset[:limit]
+        sessions = queryset.select_related('user')[:limit]
         
         total_sessions = sessions.count()
         self.stdout.write(f'Found {total_sessions} completed sessions to process')
@@ -79,9 +159,7 @@ class Command(BaseCommand):
                     )
                 else:
                     # In dry run, just show what would be processed
-                    from assessment.models import UserAnswer
-                    answer_count = UserAnswer.objects.filter(exam_session=session).count()
-                    self.stdout.write(f'  Would process {answer_count} answers')
+                    self.stdout.write(f'  Would process {session.answer_count} answers')
                 
                 processed += 1
                 
@@ -102,4 +180,63 @@ class Command(BaseCommand):
             self.stdout.write(f'  Total performance records created: {total_records_created}')
             self.stdout.write(self.style.SUCCESS('✓ Performance records creation completed'))
         else:
-            self.stdout.write(self.style.WARNING('✓ Dry run completed - no changes made')) 
\ No newline at end of file
+            self.stdout.write(self.style.WARNING('✓ Dry run completed - no changes made')) 
+
+    def handle_backfill(self, user_id, workers, chunk_size, dry_run):
+        pending = ExamSession.objects.filter(status='COMPLETED', analytics_recorded_at__isnull=True)
+        if user_id:
+            pending = pending.filter(user_id=user_id)
+
+        if dry_run:
+            session_count = pending.count()
+            answer_count = UserAnswer.objects.filter(exam_session__in=pending).count()
+            self.stdout.write(f'Would process {session_count} unrecorded sessions with {answer_count} answers')
+            self.stdout.write(self.style.WARNING('✓ Dry run completed - no changes made'))
+            return
+
+        workers = max(1, workers)
+        self.stdout.write(f'Backfilling unrecorded sessions with {workers} worker(s), {chunk_size} sessions per chunk')
+        start_time = time.monotonic()
+
+        def report(processed, records_written, errors):
+            elapsed = max(time.monotonic() - start_time, 0.001)
+            self.stdout.write(
+                f'  {processed} sessions, {records_written} records '
+                f'({processed / elapsed:.1f} sessions/s, {records_written / elapsed:.1f} rows/s), {errors} errors'
+            )
+
+        if workers == 1:
+            processed, records_written, errors = backfill_partition(0, 1, chunk_size, user_id, progress=report)
+        else:
+            # Child processes must open their own database connections
+            connections.close_all()
+            # Workers send their running totals after every chunk; report the sum over all partitions
+            partition_totals = {}
+            with multiprocessing.Manager() as manager:
+                progress_queue = manager.Queue()
+                with ProcessPoolExecutor(max_workers=workers, initializer=_init_backfill_worker) as executor:
+                    futures = [
+                        executor.submit(
+                            backfill_partition, partition, workers, chunk_size, user_id,
+                            partial(_queue_progress, progress_queue, partition)
+                        )
+                        for partition in range(workers)
+                    ]
+                    while not all(future.done() for future in futures) or not progress_queue.empty():
+                        try:
+                            partition, *totals = progress_queue.get(timeout=1)
+                        except queue.Empty:
+                            continue
+                        partition_totals[partition] = totals
+                        report(*(sum(column) for column in zip(*partition_totals.values())))
+                    results = [future.result() for future in futures]
+            processed, records_written, errors = (sum(column) for column in zip(*results))
+
+        elapsed = max(time.monotonic() - start_time, 0.001)
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write('SUMMARY:')
+        self.stdout.write(f'  Sessions processed: {processed}')
+        self.stdout.write(f'  Errors: {errors}')
+        self.stdout.write(f'  Performance records written: {records_written}')
+        self.stdout.write(f'  Elapsed: {elapsed:.1f}s ({records_written / elapsed:.1f} rows/s)')
+        self.stdout.write(self.style.SUCCESS('✓ Performance records backfill completed'))
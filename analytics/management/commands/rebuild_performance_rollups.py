@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand
+from analytics.models import UserPerformanceRecord
+from analytics.services import PerformanceRollupService
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the weekly and monthly performance rollups from the daily performance records'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user-id',
+            type=int,
+            help='Rebuild rollups only for a specific user ID',
+        )
+
+    def handle(self, *args, **options):
+        queryset = UserPerformanceRecord.objects.all()
+        if options['user_id']:
+            queryset = queryset.filter(user_id=options['user_id'])
+
+        # Stream the distinct record dates user by user
+        user_days = queryset.order_by('user_id', 'date_recorded').values_list(
+            'user_id', 'date_recorded'
+        ).distinct().iterator()
+
+        users_processed = 0
+        rows_written = 0
+        errors = 0
+        current_user_id = None
+        days = set()
+
+        def flush():
+            nonlocal users_processed, rows_written, errors
+            if current_user_id is None:
+                return
+            try:
+                rows_written += PerformanceRollupService.refresh(current_user_id, days)
+                users_processed += 1
+            except Exception as e:
+                errors += 1
+                self.stdout.write(self.style.ERROR(f'  ✗ Error rebuilding rollups for user {current_user_id}: {e}'))
+                logger.error(f'Error rebuilding rollups for user {current_user_id}: {e}', exc_info=True)
+
+        for user_id, day in user_days:
+            if user_id != current_user_id:
+                flush()
+                current_user_id = user_id
+                days = set()
+            days.add(day)
+        flush()
+
+        # Summary
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write('SUMMARY:')
+        self.stdout.write(f'  Users processed: {users_processed}')
+        self.stdout.write(f'  Errors: {errors}')
+        self.stdout.write(f'  Rollup rows written: {rows_written}')
+        self.stdout.write(self.style.SUCCESS('✓ Performance rollup rebuild completed'))
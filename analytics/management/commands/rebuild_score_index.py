@@ -0,0 +1,68 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast, Coalesce
+from assessment.models import ExamSession
+from analytics.score_index import get_score_index
+from analytics.services import ExamStandingService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the exam score distributions and leaderboards from completed exam sessions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--exam-id',
+            type=int,
+            help='Rebuild only a specific exam ID',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Number of sessions read from the database per batch (default: 2000)',
+        )
+
+    def handle(self, *args, **options):
+        queryset = ExamSession.objects.filter(
+            status='COMPLETED',
+            session_type__in=ExamStandingService.COUNTED_SESSION_TYPES,
+            exam__isnull=False,
+            total_score_achieved__isnull=False,
+            total_possible_score__gt=0
+        )
+        if options['exam_id']:
+            queryset = queryset.filter(exam_id=options['exam_id'])
+
+        # Stream the sessions exam by exam, each user's best score first
+        sessions = queryset.annotate(
+            score_percentage=Cast('total_score_achieved', FloatField()) * 100 / F('total_possible_score'),
+            achieved_at=Coalesce('actual_end_time', 'created_at')
+        ).order_by('exam_id', 'user_id', '-score_percentage', 'achieved_at').values_list(
+            'exam_id', 'user_id', 'score_percentage', 'id', 'achieved_at'
+        ).iterator(chunk_size=options['batch_size'])
+
+        index = get_score_index()
+        exams_rebuilt = 0
+        entries_written = 0
+        current_exam_id = None
+        best_scores = []
+        last_user_id = None
+
+        for exam_id, user_id, score_percentage, session_id, achieved_at in sessions:
+            if exam_id != current_exam_id:
+                if current_exam_id is not None:
+                    entries_written += index.rebuild(current_exam_id, best_scores)
+                    exams_rebuilt += 1
+                current_exam_id = exam_id
+                best_scores = []
+                last_user_id = None
+            if user_id != last_user_id:
+                best_scores.append((user_id, round(score_percentage, 2), session_id, achieved_at))
+                last_user_id = user_id
+        if current_exam_id is not None:
+            entries_written += index.rebuild(current_exam_id, best_scores)
+            exams_rebuilt += 1
+
+        self.stdout.write(f'  Exams rebuilt: {exams_rebuilt}')
+        self.stdout.write(f'  Leaderboard entries written: {entries_written}')
+        self.stdout.write(self.style.SUCCESS('✓ Score index rebuild completed'))
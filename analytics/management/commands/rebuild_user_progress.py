@@ -0,0 +1,87 @@
+from django.core.management.base import BaseCommand
+from assessment.models import UserAnswer
+from analytics.services import UserProgressService
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Rebuild UserProgress entries from all submitted answers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user-id',
+            type=int,
+            help='Rebuild progress only for a specific user ID',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Number of answers read from the database per batch (default: 2000)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show what would be done without making changes',
+        )
+
+    def handle(self, *args, **options):
+        user_id = options['user_id']
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING('DRY RUN MODE - No changes will be made'))
+
+        queryset = UserAnswer.objects.filter(question__topic__isnull=False)
+        if user_id:
+            queryset = queryset.filter(user_id=user_id)
+
+        # Stream the answers user by user so only one user's answers are held in memory
+        answers = queryset.order_by('user_id').values_list(
+            'user_id', 'question_id', 'question__topic_id', 'is_correct', 'submission_time'
+        ).iterator(chunk_size=batch_size)
+
+        users_processed = 0
+        rows_written = 0
+        errors = 0
+        current_user_id = None
+        user_answers = []
+
+        def flush():
+            nonlocal users_processed, rows_written, errors
+            if current_user_id is None:
+                return
+            try:
+                if dry_run:
+                    topics = len({answer[1] for answer in user_answers})
+                    self.stdout.write(f'  User {current_user_id}: would rebuild {topics} topics')
+                else:
+                    rows_written += UserProgressService.apply_answers(current_user_id, user_answers, rebuild=True)
+                users_processed += 1
+            except Exception as e:
+                errors += 1
+                self.stdout.write(self.style.ERROR(f'  ✗ Error rebuilding progress for user {current_user_id}: {e}'))
+                logger.error(f'Error rebuilding progress for user {current_user_id}: {e}', exc_info=True)
+
+        for answer_user_id, question_id, topic_id, is_correct, submission_time in answers:
+            if answer_user_id != current_user_id:
+                flush()
+                current_user_id = answer_user_id
+                user_answers = []
+            user_answers.append((question_id, topic_id, is_correct, submission_time))
+        flush()
+
+        # Summary
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write('SUMMARY:')
+        self.stdout.write(f'  Users processed: {users_processed}')
+        self.stdout.write(f'  Errors: {errors}')
+
+        if not dry_run:
+            self.stdout.write(f'  Progress records written: {rows_written}')
+            self.stdout.write(self.style.SUCCESS('✓ User progress rebuild completed'))
+        else:
+            self.stdout.write(self.style.WARNING('✓ Dry run completed - no changes made'))
@@ -1,5 +1,8 @@
 from django.core.management.base import BaseCommand
 from django.db import transaction
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import Abs, Cast, Floor
+from django.db.models.lookups import GreaterThan
 from analytics.services import AnalyticsService
 from analytics.models import UserPerformanceRecord
 from django.contrib.auth import get_user_model
@@ -12,6 +15,8 @@ User = get_user_model()
 class Command(BaseCommand):
     help = 'Validate and fix analytics data to ensure accurate calculations'
 
+    SAMPLE_SIZE = 20  # Records listed per kind of problem
+
     def add_arguments(self, parser):
         parser.add_argument(
             '--user-id',
@@ -59,58 +64,25 @@ class Command(BaseCommand):
         total_records = queryset.count()
         self.stdout.write(f"Found {total_records} analytics records to validate")
 
-        inconsistent_records = 0
-        dummy_records = 0
+        # Both checks are single SQL predicates, so the sweep never loads the records
+        inconsistent = AnalyticsService.get_inconsistent_records(queryset)
+        dummy = queryset.filter(self._dummy_data_predicate())
+        inconsistent_records = inconsistent.count()
+        dummy_records = dummy.count()
         fixed_records = 0
         deleted_records = 0
 
-        with transaction.atomic():
-            for record in queryset:
-                is_inconsistent = False
-                is_dummy = False
-
-                # Check for calculation inconsistencies
-                if record.questions_answered > 0:
-                    expected_accuracy = record.correct_answers / record.questions_answered
-                    accuracy_diff = abs(expected_accuracy - record.accuracy)
-                    
-                    if accuracy_diff > 0.0001:  # Allow small floating point differences
-                        is_inconsistent = True
-                        inconsistent_records += 1
-                        self.stdout.write(
-                            self.style.WARNING(
-                                f"Record ID {record.id}: Accuracy mismatch. "
-                                f"Expected: {expected_accuracy:.4f}, Got: {record.accuracy:.4f}"
-                            )
-                        )
-
-                # Check for dummy data indicators
-                if self._is_dummy_data(record):
-                    is_dummy = True
-                    dummy_records += 1
-                    self.stdout.write(
-                        self.style.WARNING(
-                            f"Record ID {record.id}: Appears to be dummy data"
-                        )
-                    )
-
-                # Fix inconsistencies if in fix mode
-                if fix_mode and is_inconsistent:
-                    if record.questions_answered > 0:
-                        # Recalculate accuracy
-                        record.accuracy = record.correct_answers / record.questions_answered
-                        # Recalculate average time
-                        record.average_time_per_question = (
-                            record.total_time_spent_seconds / record.questions_answered
-                            if record.questions_answered > 0 else 0
-                        )
-                        record.save()
-                        fixed_records += 1
-
-                # Delete dummy data if requested
-                if fix_mode and delete_dummy and is_dummy:
-                    record.delete()
-                    deleted_records += 1
+        for record_id in inconsistent.order_by('id').values_list('id', flat=True)[:self.SAMPLE_SIZE]:
+            self.stdout.write(self.style.WARNING(f"Record ID {record_id}: Accuracy or average time mismatch"))
+        for record_id in dummy.order_by('id').values_list('id', flat=True)[:self.SAMPLE_SIZE]:
+            self.stdout.write(self.style.WARNING(f"Record ID {record_id}: Appears to be dummy data"))
+
+        if fix_mode:
+            with transaction.atomic():
+                # Dummy data is detected by its mismatching accuracy, so delete it before fixing
+                if delete_dummy:
+                    deleted_records, _ = dummy.delete()
+                fixed_records = AnalyticsService.validate_and_fix_analytics_consistency(queryset)
 
         # Summary report
         self.stdout.write("\n" + "="*50)
@@ -129,46 +101,29 @@ class Command(BaseCommand):
                 self.style.WARNING("No changes made (dry-run mode). Use --fix to apply changes.")
             )
 
-        # Run the service validation method if fixing
-        if fix_mode:
-            self.stdout.write("\nRunning comprehensive validation...")
-            service_fixed = AnalyticsService.validate_and_fix_analytics_consistency()
-            self.stdout.write(f"Service validation fixed: {service_fixed} additional records")
-
         self.stdout.write(
             self.style.SUCCESS('\nAnalytics validation completed!')
         )
 
-    def _is_dummy_data(self, record):
+    @staticmethod
+    def _dummy_data_predicate():
         """
-        Detect if a record appears to be dummy/fake data.
+        Detect records that appear to be dummy/fake data.
         This checks for patterns typical of randomly generated data.
         """
-        # Check for unrealistic accuracy patterns
-        if record.accuracy and (
-            record.accuracy == 0.8 or  # Common dummy value
-            record.accuracy == 0.85 or  # Common dummy value
-            record.accuracy == 0.9 or  # Common dummy value
-            record.accuracy == 0.95  # Common dummy value
-        ):
-            # If accuracy is exactly these common dummy values AND
-            # the calculated accuracy doesn't match, it's likely dummy
-            if record.questions_answered > 0:
-                actual_accuracy = record.correct_answers / record.questions_answered
-                if abs(actual_accuracy - record.accuracy) > 0.01:
-                    return True
-
-        # Check for unrealistic time patterns
-        if record.average_time_per_question and (
-            60 <= record.average_time_per_question <= 120 and
-            record.average_time_per_question % 1 == 0  # Exact whole numbers are suspicious
-        ):
-            return True
-
-        # Check for unrealistic point patterns
-        if (record.total_points_possible == 50 and 
-            40 <= record.total_points_earned <= 50):
-            # This matches the dummy data generator pattern
-            return True
-
-        return False 
\ No newline at end of file
+        # Unrealistic accuracy patterns: a common dummy value that doesn't match the counters
+        dummy_accuracy = Q(accuracy__in=[0.8, 0.85, 0.9, 0.95], questions_answered__gt=0) & Q(GreaterThan(
+            Abs(Cast('correct_answers', FloatField()) / F('questions_answered') - F('accuracy')), 0.01
+        ))
+
+        # Unrealistic time patterns: exact whole numbers are suspicious
+        dummy_time = Q(
+            average_time_per_question__gte=60,
+            average_time_per_question__lte=120,
+            average_time_per_question=Floor('average_time_per_question')
+        )
+
+        # Unrealistic point patterns matching the dummy data generator
+        dummy_points = Q(total_points_possible=50, total_points_earned__gte=40, total_points_earned__lte=50)
+
+        return dummy_accuracy | dummy_time | dummy_points
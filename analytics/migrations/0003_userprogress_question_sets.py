@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprogress',
+            name='attempted_question_ids',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='userprogress',
+            name='mastered_question_ids',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
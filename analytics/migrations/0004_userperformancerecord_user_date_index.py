@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0003_userprogress_question_sets'),
+        ('questions', '0006_alter_mcqchoice_question'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userperformancerecord',
+            index=models.Index(fields=['user', 'date_recorded'], name='analytics_u_user_id_bed118_idx'),
+        ),
+    ]
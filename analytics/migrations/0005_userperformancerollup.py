@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0004_userperformancerecord_user_date_index'),
+        ('questions', '0006_alter_mcqchoice_question'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserPerformanceRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('WEEK', 'Week'), ('MONTH', 'Month')], max_length=10)),
+                ('period_start', models.DateField()),
+                ('questions_answered', models.IntegerField(default=0)),
+                ('correct_answers', models.IntegerField(default=0)),
+                ('partially_correct_answers', models.IntegerField(default=0)),
+                ('total_points_earned', models.FloatField(default=0)),
+                ('total_points_possible', models.FloatField(default=0)),
+                ('total_time_spent_seconds', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('topic', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='performance_rollups', to='questions.topic')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='performance_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'analytics_userperformancerollup',
+                'indexes': [models.Index(fields=['user', 'granularity', 'period_start'], name='analytics_u_user_id_eeddc7_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('topic__isnull', False)), fields=('user', 'topic', 'granularity', 'period_start'), name='unique_topic_performance_rollup'), models.UniqueConstraint(condition=models.Q(('topic__isnull', True)), fields=('user', 'granularity', 'period_start'), name='unique_total_performance_rollup')],
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0005_userperformancerollup'),
+        ('assessment', '0007_examsession_analytics_recorded_at'),
+        ('exams', '0002_examtranslation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExamLeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('best_score_percentage', models.FloatField()),
+                ('achieved_at', models.DateTimeField()),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='exams.exam')),
+                ('exam_session', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='assessment.examsession')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'analytics_examleaderboardentry',
+                'indexes': [models.Index(fields=['exam', '-best_score_percentage', 'achieved_at'], name='analytics_e_exam_id_a26f1f_idx')],
+                'unique_together': {('exam', 'user')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ExamScoreBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.PositiveSmallIntegerField()),
+                ('user_count', models.PositiveIntegerField(default=0)),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_buckets', to='exams.exam')),
+            ],
+            options={
+                'db_table': 'analytics_examscorebucket',
+                'unique_together': {('exam', 'bucket')},
+            },
+        ),
+    ]
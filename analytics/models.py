@@ -1,6 +1,7 @@
 from django.db import models
 from users.models import User
 from questions.models import Topic
+from exams.models import Exam
 
 class UserPerformanceRecord(models.Model):
     """Model for tracking user performance by topic and question type."""
@@ -21,11 +22,90 @@ class UserPerformanceRecord(models.Model):
     class Meta:
         db_table = 'analytics_userperformancerecord'
         unique_together = ('user', 'topic', 'question_type', 'difficulty', 'date_recorded')
+        indexes = [
+            models.Index(fields=['user', 'date_recorded']),
+        ]
 
     def __str__(self):
         topic_name = self.topic.name if self.topic else "All Topics"
         return f"{self.user.username} - {topic_name} - {self.date_recorded}"
 
+class UserPerformanceRollup(models.Model):
+    """Model for UserPerformanceRecord totals per week or month, per user and per (user, topic)."""
+    GRANULARITIES = (
+        ('WEEK', 'Week'),
+        ('MONTH', 'Month'),
+    )
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='performance_rollups')
+    # Null for the user's totals over all topics
+    topic = models.ForeignKey(Topic, null=True, blank=True, on_delete=models.CASCADE, related_name='performance_rollups')
+    granularity = models.CharField(max_length=10, choices=GRANULARITIES)
+    period_start = models.DateField()
+    questions_answered = models.IntegerField(default=0)
+    correct_answers = models.IntegerField(default=0)
+    partially_correct_answers = models.IntegerField(default=0)
+    total_points_earned = models.FloatField(default=0)
+    total_points_possible = models.FloatField(default=0)
+    total_time_spent_seconds = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'analytics_userperformancerollup'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'topic', 'granularity', 'period_start'],
+                condition=models.Q(topic__isnull=False),
+                name='unique_topic_performance_rollup'
+            ),
+            models.UniqueConstraint(
+                fields=['user', 'granularity', 'period_start'],
+                condition=models.Q(topic__isnull=True),
+                name='unique_total_performance_rollup'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'granularity', 'period_start']),
+        ]
+
+    def __str__(self):
+        topic_name = self.topic.name if self.topic else "All Topics"
+        return f"{self.user.username} - {topic_name} - {self.granularity} {self.period_start}"
+
+
+class ExamScoreBucket(models.Model):
+    """Model for one bucket of an exam's score distribution: the number of users whose best score falls in it."""
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE, related_name='score_buckets')
+    bucket = models.PositiveSmallIntegerField()
+    user_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'analytics_examscorebucket'
+        unique_together = ('exam', 'bucket')
+
+    def __str__(self):
+        return f"{self.exam.name} - bucket {self.bucket}: {self.user_count}"
+
+
+class ExamLeaderboardEntry(models.Model):
+    """Model for a user's best score percentage in an exam."""
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE, related_name='leaderboard_entries')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='leaderboard_entries')
+    best_score_percentage = models.FloatField()
+    exam_session = models.ForeignKey('assessment.ExamSession', null=True, blank=True, on_delete=models.SET_NULL)
+    achieved_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'analytics_examleaderboardentry'
+        unique_together = ('exam', 'user')
+        indexes = [
+            models.Index(fields=['exam', '-best_score_percentage', 'achieved_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.exam.name} - {self.best_score_percentage}%"
+
+
 class UserProgress(models.Model):
     """Model for tracking user progress by topic."""
     PROFICIENCY_LEVELS = (
@@ -42,6 +122,9 @@ class UserProgress(models.Model):
     questions_mastered = models.IntegerField(default=0)
     proficiency_level = models.CharField(max_length=20, choices=PROFICIENCY_LEVELS)
     last_activity_date = models.DateTimeField()
+    # Sorted question IDs behind the counters above, so re-processed answers are not counted twice
+    attempted_question_ids = models.JSONField(default=list, blank=True)
+    mastered_question_ids = models.JSONField(default=list, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -0,0 +1,154 @@
+import threading
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from .models import ExamLeaderboardEntry, ExamScoreBucket
+
+
+class ScoreIndex:
+    """
+    Interface of the per-exam score distribution index behind percentiles and leaderboards.
+    The index holds each user's best score percentage per exam and is updated as sessions
+    complete, so queries never scan the exam sessions. Select the implementation with the
+    EXAM_SCORE_INDEX_BACKEND setting.
+    """
+
+    def record_score(self, exam_id, user_id, score_percentage, exam_session_id=None, achieved_at=None):
+        """Record a score of the user; only improvements of the user's best score change the index."""
+        raise NotImplementedError
+
+    def get_percentile(self, exam_id, score_percentage):
+        """Get the percentage of the exam's users with a lower best score (ties count half)."""
+        raise NotImplementedError
+
+    def get_top(self, exam_id, limit):
+        """Get the best ExamLeaderboardEntry rows of the exam, highest score (then earliest) first."""
+        raise NotImplementedError
+
+    def get_participant_count(self, exam_id):
+        raise NotImplementedError
+
+    def rebuild(self, exam_id, best_scores):
+        """Replace the exam's index with (user_id, score_percentage, exam_session_id, achieved_at) tuples."""
+        raise NotImplementedError
+
+
+class HistogramScoreIndex(ScoreIndex):
+    """
+    Score index backed by a fixed histogram of 1% buckets per exam (ExamScoreBucket) and
+    one best-score row per user (ExamLeaderboardEntry).
+    Recording a score moves the user between two buckets with atomic increments; a percentile
+    sums at most 101 bucket rows and the top-N is read from the (exam, score) index.
+    """
+
+    BUCKETS = 101  # 0% to 100%
+
+    @classmethod
+    def get_bucket(cls, score_percentage):
+        return max(0, min(cls.BUCKETS - 1, int(score_percentage)))
+
+    @staticmethod
+    def _add_to_bucket(exam_id, bucket, delta):
+        updated = ExamScoreBucket.objects.filter(exam_id=exam_id, bucket=bucket).update(
+            user_count=F('user_count') + delta
+        )
+        if not updated:
+            ExamScoreBucket.objects.bulk_create(
+                [ExamScoreBucket(exam_id=exam_id, bucket=bucket)], ignore_conflicts=True
+            )
+            ExamScoreBucket.objects.filter(exam_id=exam_id, bucket=bucket).update(
+                user_count=F('user_count') + delta
+            )
+
+    def record_score(self, exam_id, user_id, score_percentage, exam_session_id=None, achieved_at=None):
+        achieved_at = achieved_at or timezone.now()
+        with transaction.atomic():
+            entry = ExamLeaderboardEntry.objects.select_for_update().filter(exam_id=exam_id, user_id=user_id).first()
+            if entry is None:
+                try:
+                    with transaction.atomic():
+                        ExamLeaderboardEntry.objects.create(
+                            exam_id=exam_id, user_id=user_id, best_score_percentage=score_percentage,
+                            exam_session_id=exam_session_id, achieved_at=achieved_at
+                        )
+                except IntegrityError:
+                    # Another worker recorded the user's first score at the same time
+                    return self.record_score(exam_id, user_id, score_percentage, exam_session_id, achieved_at)
+                self._add_to_bucket(exam_id, self.get_bucket(score_percentage), 1)
+                return True
+
+            if score_percentage <= entry.best_score_percentage:
+                return False
+
+            old_bucket = self.get_bucket(entry.best_score_percentage)
+            new_bucket = self.get_bucket(score_percentage)
+            entry.best_score_percentage = score_percentage
+            entry.exam_session_id = exam_session_id
+            entry.achieved_at = achieved_at
+            entry.save(update_fields=['best_score_percentage', 'exam_session', 'achieved_at'])
+            if old_bucket != new_bucket:
+                self._add_to_bucket(exam_id, old_bucket, -1)
+                self._add_to_bucket(exam_id, new_bucket, 1)
+            return True
+
+    def get_percentile(self, exam_id, score_percentage):
+        bucket = self.get_bucket(score_percentage)
+        counts = ExamScoreBucket.objects.filter(exam_id=exam_id).aggregate(
+            total=Sum('user_count'),
+            below=Sum('user_count', filter=Q(bucket__lt=bucket)),
+            at_bucket=Sum('user_count', filter=Q(bucket=bucket))
+        )
+        if not counts['total']:
+            return None
+        below = (counts['below'] or 0) + (counts['at_bucket'] or 0) / 2
+        return round(below / counts['total'] * 100, 1)
+
+    def get_top(self, exam_id, limit):
+        return list(
+            ExamLeaderboardEntry.objects.filter(exam_id=exam_id).select_related('user').order_by(
+                '-best_score_percentage', 'achieved_at'
+            )[:limit]
+        )
+
+    def get_participant_count(self, exam_id):
+        return ExamScoreBucket.objects.filter(exam_id=exam_id).aggregate(total=Sum('user_count'))['total'] or 0
+
+    @transaction.atomic
+    def rebuild(self, exam_id, best_scores):
+        ExamLeaderboardEntry.objects.filter(exam_id=exam_id).delete()
+        ExamScoreBucket.objects.filter(exam_id=exam_id).delete()
+
+        entries = [
+            ExamLeaderboardEntry(
+                exam_id=exam_id, user_id=user_id, best_score_percentage=score_percentage,
+                exam_session_id=exam_session_id, achieved_at=achieved_at
+            )
+            for user_id, score_percentage, exam_session_id, achieved_at in best_scores
+        ]
+        counts = {}
+        for entry in entries:
+            bucket = self.get_bucket(entry.best_score_percentage)
+            counts[bucket] = counts.get(bucket, 0) + 1
+
+        ExamLeaderboardEntry.objects.bulk_create(entries, batch_size=1000)
+        ExamScoreBucket.objects.bulk_create([
+            ExamScoreBucket(exam_id=exam_id, bucket=bucket, user_count=count)
+            for bucket, count in counts.items()
+        ])
+        return len(entries)
+
+
+_score_index = None
+_score_index_lock = threading.Lock()
+
+
+def get_score_index():
+    """Get the process-wide score index configured by EXAM_SCORE_INDEX_BACKEND."""
+    global _score_index
+    with _score_index_lock:
+        if _score_index is None:
+            backend = getattr(settings, 'EXAM_SCORE_INDEX_BACKEND', 'analytics.score_index.HistogramScoreIndex')
+            _score_index = import_string(backend)()
+        return _score_index
@@ -1,211 +1,540 @@
+from django.conf import settings
 from django.utils import timezone
 from django.db import transaction
 from collections import defaultdict
-from .models import UserPerformanceRecord
+from datetime import timedelta
+import threading
+from .models import UserPerformanceRecord, UserPerformanceRollup, UserProgress
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Abs, Cast, Coalesce, Greatest, Least, TruncMonth, TruncWeek
+from django.db.models.lookups import GreaterThan
 from assessment.models import UserAnswer
+from questions.models import Question
+from exam_prep_platform.cache import SharedCache
 import logging
-from decimal import Decimal, ROUND_HALF_UP
 
 logger = logging.getLogger(__name__)
 
+# Per-group sums of UserPerformanceRecord counters, for use with .values(...).annotate()
+PERFORMANCE_TOTALS = {
+    'questions_answered': Coalesce(Sum('questions_answered'), 0),
+    'correct_answers': Coalesce(Sum('correct_answers'), 0),
+    'partially_correct_answers': Coalesce(Sum('partially_correct_answers'), 0),
+    'total_points_earned': Coalesce(Sum('total_points_earned'), 0.0),
+    'total_points_possible': Coalesce(Sum('total_points_possible'), 0.0),
+    'total_time_spent_seconds': Coalesce(Sum('total_time_spent_seconds'), 0),
+}
+
+
+class AnalyticsCacheService:
+    """
+    Service for the cached analytics responses of a user.
+    Every cache key is built in the user's analytics namespace, whose version (the user's
+    analytics generation) is bumped whenever the user's performance or progress records are
+    written, so responses can be cached for hours and still reflect new results right after
+    an exam completes. With a process-local cache backend (locmem) the bump only reaches the
+    worker that wrote the records, so responses are then only kept for UNSHARED_TIMEOUT seconds.
+    """
+
+    UNSHARED_TIMEOUT = 60
+
+    @staticmethod
+    def _namespace(user_id):
+        return f"analytics_{user_id}"
+
+    @classmethod
+    def get_generation(cls, user_id):
+        """Get the current analytics generation for a user."""
+        return SharedCache.get_version(cls._namespace(user_id))
+
+    @classmethod
+    def bump_generation(cls, user_id):
+        """Make all cached analytics responses of the user unreachable."""
+        SharedCache.invalidate_namespace(cls._namespace(user_id))
+
+    @classmethod
+    def make_key(cls, name, user_id, *parts):
+        """Build a cache key for an analytics response of the user."""
+        return SharedCache.make_key(cls._namespace(user_id), name, *parts)
+
+    @classmethod
+    def get_timeout(cls):
+        if not SharedCache.is_shared():
+            return cls.UNSHARED_TIMEOUT
+        return getattr(settings, 'ANALYTICS_CACHE_TIMEOUT_SECONDS', 6 * 60 * 60)
+
+
+class PerformanceRollupService:
+    """
+    Service for the weekly and monthly performance rollups.
+    When performance records are written, the rollup rows of the weeks and months they fall
+    in are recomputed from the daily records of just those periods, so long trend ranges can
+    be read from a few dozen rollup rows instead of re-aggregating every daily record.
+    """
+
+    TRUNCATE = {'WEEK': TruncWeek, 'MONTH': TruncMonth}
+
+    _pending = threading.local()
+
+    @staticmethod
+    def period_start(day, granularity):
+        """Get the first day of the (ISO) week or month containing day."""
+        if granularity == 'WEEK':
+            return day - timedelta(days=day.weekday())
+        return day.replace(day=1)
+
+    @staticmethod
+    def next_period_start(period_start, granularity):
+        if granularity == 'WEEK':
+            return period_start + timedelta(days=7)
+        return (period_start.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+    @classmethod
+    def mark_dirty(cls, user_id, day):
+        """
+        Schedule a refresh of the periods containing day once the transaction commits.
+        Every record written in a transaction is refreshed by the first callback that runs.
+        """
+        pending = getattr(cls._pending, 'days', None)
+        if pending is None:
+            pending = cls._pending.days = defaultdict(set)
+        pending[user_id].add(day)
+        transaction.on_commit(cls.flush_pending)
+
+    @classmethod
+    def flush_pending(cls):
+        pending = getattr(cls._pending, 'days', None)
+        if not pending:
+            return
+        cls._pending.days = None
+        for user_id, days in pending.items():
+            try:
+                cls.refresh(user_id, days)
+            except Exception as e:
+                logger.error(f"Error refreshing performance rollups for user {user_id}: {e}")
+
+    @classmethod
+    @transaction.atomic
+    def refresh(cls, user_id, days):
+        """
+        Recompute the user's weekly and monthly rollups for the periods containing the given days.
+        Returns the number of rollup rows written.
+        """
+        written = 0
+        for granularity, truncate in cls.TRUNCATE.items():
+            periods = {cls.period_start(day, granularity) for day in days}
+            if not periods:
+                continue
+
+            in_periods = Q()
+            for period_start in periods:
+                in_periods |= Q(
+                    date_recorded__gte=period_start,
+                    date_recorded__lt=cls.next_period_start(period_start, granularity)
+                )
+            rows = UserPerformanceRecord.objects.filter(in_periods, user_id=user_id).annotate(
+                period=truncate('date_recorded')
+            ).values('period', 'topic_id').annotate(**PERFORMANCE_TOTALS).order_by()
+
+            rollups = {}
+            for row in rows:
+                period = row.pop('period')
+                topic_id = row.pop('topic_id')
+                total = rollups.setdefault((period, None), dict.fromkeys(PERFORMANCE_TOTALS, 0))
+                for field, value in row.items():
+                    total[field] += value
+                if topic_id is not None:
+                    rollups[(period, topic_id)] = row
+
+            UserPerformanceRollup.objects.filter(
+                user_id=user_id, granularity=granularity, period_start__in=periods
+            ).delete()
+            UserPerformanceRollup.objects.bulk_create([
+                UserPerformanceRollup(
+                    user_id=user_id, topic_id=topic_id, granularity=granularity, period_start=period, **totals
+                )
+                for (period, topic_id), totals in rollups.items()
+            ])
+            written += len(rollups)
+
+        transaction.on_commit(lambda: AnalyticsCacheService.bump_generation(user_id))
+        return written
+
+    @classmethod
+    def get_series(cls, user_id, granularity, start_date, end_date, topic_id=None):
+        """
+        Get the user's totals per week or month between start_date and end_date (inclusive),
+        ordered by period. Periods fully inside the range are read from the rollups; the
+        partial periods at either end are summed from the daily records of the range.
+        Returns (period_start, totals) tuples.
+        """
+        first_full = cls.period_start(start_date, granularity)
+        if first_full < start_date:
+            first_full = cls.next_period_start(first_full, granularity)
+        end_full = cls.period_start(end_date + timedelta(days=1), granularity)
+
+        series = {}
+
+        partial = Q(date_recorded__gte=start_date, date_recorded__lte=end_date)
+        if first_full < end_full:
+            partial &= ~Q(date_recorded__gte=first_full, date_recorded__lt=end_full)
+            rollups = UserPerformanceRollup.objects.filter(
+                user_id=user_id,
+                granularity=granularity,
+                period_start__gte=first_full,
+                period_start__lt=end_full
+            )
+            rollups = rollups.filter(topic_id=topic_id) if topic_id else rollups.filter(topic__isnull=True)
+            for rollup in rollups.values('period_start', *PERFORMANCE_TOTALS):
+                series[rollup.pop('period_start')] = rollup
+
+        records = UserPerformanceRecord.objects.filter(partial, user_id=user_id)
+        if topic_id:
+            records = records.filter(topic_id=topic_id)
+        rows = records.annotate(period=cls.TRUNCATE[granularity]('date_recorded')).values(
+            'period'
+        ).annotate(**PERFORMANCE_TOTALS).order_by()
+        for row in rows:
+            series[row.pop('period')] = row
+
+        return sorted(series.items())
+
 
 class AnalyticsService:
     """Service for managing analytics data creation and updates."""
     
+    @staticmethod
+    def get_derived_metrics(questions_answered, correct_answers, total_time_spent_seconds):
+        """Get the accuracy (0-1, 4 decimals) and average time per question (2 decimals) of a record."""
+        if questions_answered <= 0:
+            return 0.0, 0.0
+        accuracy = max(0.0, min(1.0, round(correct_answers / questions_answered, 4)))
+        return accuracy, round(total_time_spent_seconds / questions_answered, 2)
+
     @staticmethod
     @transaction.atomic
     def create_performance_records_from_session(exam_session):
         """
-        Create UserPerformanceRecord entries from a completed exam session.
+        Add the answers of a completed exam session to the user's UserPerformanceRecord entries.
         Groups performance data by topic, question type, and difficulty.
+        Runs a fixed number of queries and is safe to re-run: a session is only added once.
+        Returns the number of records created or updated.
         """
+        from assessment.models import ExamSession
+
         if exam_session.status != 'COMPLETED':
             logger.warning(f"Cannot create performance records for incomplete session {exam_session.id}")
             return 0
 
-        # Get all answers for this session
-        answers = UserAnswer.objects.filter(
+        # Claim the session so it is never added twice
+        recorded_at = timezone.now()
+        claimed = ExamSession.objects.filter(
+            pk=exam_session.pk, analytics_recorded_at__isnull=True
+        ).update(analytics_recorded_at=recorded_at)
+        if not claimed:
+            logger.info(f"Performance records for session {exam_session.id} were already created")
+            return 0
+        exam_session.analytics_recorded_at = recorded_at
+
+        # Sum the answers per (topic, question type, difficulty) in the database
+        groups = UserAnswer.objects.filter(
             exam_session=exam_session,
-            user=exam_session.user
-        ).select_related('question', 'question__topic')
+            user_id=exam_session.user_id
+        ).values(
+            'question__topic_id', 'question__question_type', 'question__difficulty'
+        ).annotate(
+            questions_answered=Count('id'),
+            correct_answers=Count('id', filter=Q(is_correct=True)),
+            partially_correct_answers=Count('id', filter=Q(is_correct__isnull=True)),
+            total_points_earned=Coalesce(Sum('raw_score'), 0.0),
+            total_points_possible=Coalesce(Sum('max_possible_score'), 0.0),
+            total_time_spent_seconds=Coalesce(Sum('time_spent_seconds'), 0)
+        ).order_by()
+        groups = {
+            (group.pop('question__topic_id'), group.pop('question__question_type'), group.pop('question__difficulty')): group
+            for group in groups
+        }
 
-        if not answers.exists():
+        if not groups:
             logger.warning(f"No answers found for session {exam_session.id}")
             return 0
 
-        # Group answers by (topic, question_type, difficulty)
-        performance_groups = defaultdict(list)
-
-        for answer in answers:
-            question = answer.question
-            topic = question.topic
-            question_type = question.question_type
-            difficulty = question.difficulty
-
-            # Create a unique key for grouping
-            key = (
-                topic.id if topic else None,
-                question_type,
-                difficulty
-            )
-            performance_groups[key].append(answer)
-
-        # Create or update performance records for each group
-        records_created = 0
+        user_id = exam_session.user_id
         date_recorded = exam_session.actual_end_time.date() if exam_session.actual_end_time else timezone.now().date()
+        existing = {
+            (record.topic_id, record.question_type, record.difficulty): record
+            for record in UserPerformanceRecord.objects.select_for_update().filter(
+                user_id=user_id, date_recorded=date_recorded
+            )
+        }
 
-        for (topic_id, question_type, difficulty), grouped_answers in performance_groups.items():
-            try:
-                # Calculate metrics for this group with proper validation
-                questions_answered = len(grouped_answers)
-                
-                # Ensure we have valid answers to process
-                if questions_answered == 0:
-                    continue
-                
-                # Count correct and partially correct answers
-                correct_answers = 0
-                partially_correct_answers = 0
-                
-                for answer in grouped_answers:
-                    if answer.is_correct is True:
-                        correct_answers += 1
-                    elif answer.is_correct is None:  # Partially correct
-                        partially_correct_answers += 1
-
-                # Calculate point totals with validation
-                total_points_earned = Decimal('0.0')
-                total_points_possible = Decimal('0.0')
-                total_time_spent = 0
-
-                for answer in grouped_answers:
-                    # Safely handle None values for scores and convert to Decimal
-                    raw_score = answer.raw_score if answer.raw_score is not None else 0
-                    max_score = answer.max_possible_score if answer.max_possible_score is not None else 0
-                    time_spent = answer.time_spent_seconds if answer.time_spent_seconds is not None else 0
-
-                    # Convert to Decimal to ensure consistent types
-                    total_points_earned += Decimal(str(raw_score))
-                    total_points_possible += Decimal(str(max_score))
-                    total_time_spent += time_spent
-
-                # Calculate derived metrics with proper validation
-                accuracy = (correct_answers / questions_answered) if questions_answered > 0 else 0.0
-                avg_time_per_question = (total_time_spent / questions_answered) if questions_answered > 0 else 0.0
-
-                # Round accuracy to 4 decimal places to avoid floating point issues
-                accuracy = float(Decimal(str(accuracy)).quantize(Decimal('0.0001'), rounding=ROUND_HALF_UP))
-                avg_time_per_question = float(Decimal(str(avg_time_per_question)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
-
-                # Validate that accuracy is between 0 and 1
-                accuracy = max(0.0, min(1.0, accuracy))
-
-                # Get or create the performance record for this date
-                topic_obj = None
-                if topic_id:
-                    from questions.models import Topic
-                    try:
-                        topic_obj = Topic.objects.get(id=topic_id)
-                    except Topic.DoesNotExist:
-                        logger.warning(f"Topic {topic_id} not found")
-
-                # Try to get existing record for this combination
-                performance_record, created = UserPerformanceRecord.objects.get_or_create(
-                    user=exam_session.user,
-                    topic=topic_obj,
+        to_create, to_update = [], []
+        for key, totals in groups.items():
+            record = existing.get(key)
+            if record is None:
+                topic_id, question_type, difficulty = key
+                record = UserPerformanceRecord(
+                    user_id=user_id,
+                    topic_id=topic_id,
                     question_type=question_type,
                     difficulty=difficulty,
                     date_recorded=date_recorded,
-                    defaults={
-                        'questions_answered': questions_answered,
-                        'correct_answers': correct_answers,
-                        'partially_correct_answers': partially_correct_answers,
-                        'total_points_earned': float(total_points_earned),
-                        'total_points_possible': float(total_points_possible),
-                        'total_time_spent_seconds': total_time_spent,
-                        'accuracy': accuracy,
-                        'average_time_per_question': avg_time_per_question,
-                    }
+                    **totals
                 )
+                to_create.append(record)
+            else:
+                # Add the session's data to the record of the day
+                for field, value in totals.items():
+                    setattr(record, field, getattr(record, field) + value)
+                to_update.append(record)
 
-                if not created:
-                    # Update existing record by adding the new data
-                    performance_record.questions_answered += questions_answered
-                    performance_record.correct_answers += correct_answers
-                    performance_record.partially_correct_answers += partially_correct_answers
-                    performance_record.total_points_earned += float(total_points_earned)
-                    performance_record.total_points_possible += float(total_points_possible)
-                    performance_record.total_time_spent_seconds += total_time_spent
-
-                    # Recalculate derived metrics with proper validation
-                    if performance_record.questions_answered > 0:
-                        new_accuracy = (performance_record.correct_answers / performance_record.questions_answered)
-                        new_avg_time = (performance_record.total_time_spent_seconds / performance_record.questions_answered)
-                        
-                        # Round and validate the new values
-                        performance_record.accuracy = float(Decimal(str(new_accuracy)).quantize(Decimal('0.0001'), rounding=ROUND_HALF_UP))
-                        performance_record.average_time_per_question = float(Decimal(str(new_avg_time)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
-                        
-                        # Ensure accuracy is between 0 and 1
-                        performance_record.accuracy = max(0.0, min(1.0, performance_record.accuracy))
-                    else:
-                        performance_record.accuracy = 0.0
-                        performance_record.average_time_per_question = 0.0
-
-                    performance_record.save()
-                    logger.info(f"Updated performance record for user {exam_session.user.id}, topic {topic_id}, type {question_type}, difficulty {difficulty}")
-                else:
-                    logger.info(f"Created performance record for user {exam_session.user.id}, topic {topic_id}, type {question_type}, difficulty {difficulty}")
-
-                records_created += 1
+            record.accuracy, record.average_time_per_question = AnalyticsService.get_derived_metrics(
+                record.questions_answered, record.correct_answers, record.total_time_spent_seconds
+            )
 
-            except Exception as e:
-                logger.error(f"Error creating performance record for group {(topic_id, question_type, difficulty)}: {e}")
-                continue
+        if to_create:
+            UserPerformanceRecord.objects.bulk_create(to_create)
+        if to_update:
+            UserPerformanceRecord.objects.bulk_update(to_update, [
+                'questions_answered', 'correct_answers', 'partially_correct_answers', 'total_points_earned',
+                'total_points_possible', 'total_time_spent_seconds', 'accuracy', 'average_time_per_question'
+            ])
 
-        logger.info(f"Created/updated {records_created} performance records for session {exam_session.id}")
-        return records_created
+        # Bulk writes skip the signals that maintain the rollups and the cached analytics
+        PerformanceRollupService.mark_dirty(user_id, date_recorded)
+        transaction.on_commit(lambda: AnalyticsCacheService.bump_generation(user_id))
+
+        records_written = len(to_create) + len(to_update)
+        logger.info(f"Created/updated {records_written} performance records for session {exam_session.id}")
+        return records_written
+
+    # Largest differences tolerated between the stored and the recomputed derived metrics
+    ACCURACY_TOLERANCE = 0.0001
+    AVERAGE_TIME_TOLERANCE = 0.01
 
     @staticmethod
-    def validate_and_fix_analytics_consistency():
+    def get_expected_metrics():
+        """SQL expressions for the accuracy (0-1) and average time per question a record should have."""
+        answered = F('questions_answered')
+        expected_accuracy = Case(
+            When(questions_answered__gt=0, then=Least(
+                Greatest(Cast('correct_answers', FloatField()) / answered, Value(0.0)), Value(1.0)
+            )),
+            default=Value(0.0),
+            output_field=FloatField()
+        )
+        expected_average_time = Case(
+            When(questions_answered__gt=0, then=Cast('total_time_spent_seconds', FloatField()) / answered),
+            default=Value(0.0),
+            output_field=FloatField()
+        )
+        return expected_accuracy, expected_average_time
+
+    @classmethod
+    def get_inconsistent_records(cls, queryset=None):
+        """Get the records whose accuracy or average time does not match their counters, as one SQL predicate."""
+        if queryset is None:
+            queryset = UserPerformanceRecord.objects.all()
+        expected_accuracy, expected_average_time = cls.get_expected_metrics()
+        return queryset.filter(
+            Q(accuracy__isnull=True) |
+            Q(average_time_per_question__isnull=True) |
+            Q(GreaterThan(Abs(F('accuracy') - expected_accuracy), cls.ACCURACY_TOLERANCE)) |
+            Q(GreaterThan(Abs(F('average_time_per_question') - expected_average_time), cls.AVERAGE_TIME_TOLERANCE))
+        )
+
+    @classmethod
+    def validate_and_fix_analytics_consistency(cls, queryset=None):
         """
         Validate and fix any inconsistencies in analytics data.
-        This method ensures that calculated fields match the raw data.
+        Recomputes the accuracy and average time of every inconsistent record in a single UPDATE.
+        Returns the number of records fixed.
         """
         logger.info("Starting analytics data validation and consistency check...")
-        
-        fixed_records = 0
-        total_records = UserPerformanceRecord.objects.count()
-        
-        for record in UserPerformanceRecord.objects.all():
-            try:
-                original_accuracy = record.accuracy
-                original_avg_time = record.average_time_per_question
-                
-                # Recalculate accuracy
-                if record.questions_answered > 0:
-                    calculated_accuracy = record.correct_answers / record.questions_answered
-                    calculated_avg_time = record.total_time_spent_seconds / record.questions_answered
-                    
-                    # Round and validate
-                    calculated_accuracy = float(Decimal(str(calculated_accuracy)).quantize(Decimal('0.0001'), rounding=ROUND_HALF_UP))
-                    calculated_avg_time = float(Decimal(str(calculated_avg_time)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
-                    
-                    # Ensure accuracy is between 0 and 1
-                    calculated_accuracy = max(0.0, min(1.0, calculated_accuracy))
-                    
-                    # Check if values need updating (with small tolerance for floating point differences)
-                    if abs(calculated_accuracy - original_accuracy) > 0.0001 or abs(calculated_avg_time - original_avg_time) > 0.01:
-                        record.accuracy = calculated_accuracy
-                        record.average_time_per_question = calculated_avg_time
-                        record.save()
-                        fixed_records += 1
-                        
-                        logger.info(f"Fixed record {record.id}: accuracy {original_accuracy} -> {calculated_accuracy}, avg_time {original_avg_time} -> {calculated_avg_time}")
-                
-            except Exception as e:
-                logger.error(f"Error validating record {record.id}: {e}")
-                continue
-        
-        logger.info(f"Analytics validation completed: {fixed_records}/{total_records} records fixed")
-        return fixed_records 
\ No newline at end of file
+
+        expected_accuracy, expected_average_time = cls.get_expected_metrics()
+        fixed_records = cls.get_inconsistent_records(queryset).update(
+            accuracy=expected_accuracy,
+            average_time_per_question=expected_average_time
+        )
+
+        logger.info(f"Analytics validation completed: {fixed_records} records fixed")
+        return fixed_records
+
+
+class UserProgressService:
+    """
+    Service for keeping UserProgress up to date incrementally.
+    Each (user, topic) row keeps the sets of attempted and mastered (answered correctly)
+    question IDs next to its counters, so applying an answer is a constant-time set lookup
+    and answers that are processed again are never counted twice.
+    """
+
+    # Share of the topic's questions mastered needed for each level, highest first
+    PROFICIENCY_THRESHOLDS = (
+        (0.8, 'EXPERT'),
+        (0.5, 'ADVANCED'),
+        (0.25, 'INTERMEDIATE'),
+    )
+
+    @classmethod
+    def get_proficiency_level(cls, questions_mastered, total_questions_in_topic):
+        if total_questions_in_topic > 0:
+            ratio = questions_mastered / total_questions_in_topic
+            for threshold, level in cls.PROFICIENCY_THRESHOLDS:
+                if ratio >= threshold:
+                    return level
+        return 'BEGINNER'
+
+    @classmethod
+    def record_session(cls, exam_session):
+        """
+        Apply the answers of a completed session to the user's topic progress.
+        Returns the number of progress rows created or updated.
+        """
+        answers = UserAnswer.objects.filter(
+            exam_session=exam_session,
+            user_id=exam_session.user_id,
+            question__topic__isnull=False
+        ).values_list('question_id', 'question__topic_id', 'is_correct', 'submission_time')
+        return cls.apply_answers(exam_session.user_id, answers)
+
+    @classmethod
+    @transaction.atomic
+    def apply_answers(cls, user_id, answers, rebuild=False):
+        """
+        Apply (question_id, topic_id, is_correct, submission_time) tuples to the user's
+        progress with one read and one bulk write. With rebuild=True the progress of the
+        given topics is recomputed from these answers alone.
+        Returns the number of progress rows created or updated.
+        """
+        answers_by_topic = defaultdict(list)
+        for answer in answers:
+            answers_by_topic[answer[1]].append(answer)
+        if not answers_by_topic:
+            return 0
+
+        existing = {
+            progress.topic_id: progress
+            for progress in UserProgress.objects.select_for_update().filter(
+                user_id=user_id, topic_id__in=answers_by_topic
+            )
+        }
+        question_counts = dict(
+            Question.objects.filter(topic_id__in=answers_by_topic, is_active=True).values(
+                'topic_id'
+            ).annotate(count=Count('id')).values_list('topic_id', 'count')
+        )
+
+        now = timezone.now()
+        to_create, to_update = [], []
+        for topic_id, topic_answers in answers_by_topic.items():
+            progress = existing.get(topic_id)
+            if progress is None:
+                progress = UserProgress(user_id=user_id, topic_id=topic_id, last_activity_date=topic_answers[0][3])
+                to_create.append(progress)
+            else:
+                to_update.append(progress)
+
+            attempted = set() if rebuild else set(progress.attempted_question_ids or [])
+            mastered = set() if rebuild else set(progress.mastered_question_ids or [])
+            last_activity = None if rebuild else progress.last_activity_date
+            for question_id, _, is_correct, submission_time in topic_answers:
+                attempted.add(question_id)
+                if is_correct:
+                    mastered.add(question_id)
+                if submission_time and (last_activity is None or submission_time > last_activity):
+                    last_activity = submission_time
+
+            progress.attempted_question_ids = sorted(attempted)
+            progress.mastered_question_ids = sorted(mastered)
+            progress.questions_attempted = len(attempted)
+            progress.questions_mastered = len(mastered)
+            progress.total_questions_in_topic = max(question_counts.get(topic_id, 0), len(attempted))
+            progress.proficiency_level = cls.get_proficiency_level(
+                progress.questions_mastered, progress.total_questions_in_topic
+            )
+            progress.last_activity_date = last_activity or now
+            progress.updated_at = now
+
+        if to_create:
+            UserProgress.objects.bulk_create(to_create)
+        if to_update:
+            UserProgress.objects.bulk_update(to_update, [
+                'attempted_question_ids', 'mastered_question_ids', 'questions_attempted',
+                'questions_mastered', 'total_questions_in_topic', 'proficiency_level',
+                'last_activity_date', 'updated_at'
+            ])
+
+        # Bulk writes skip the signals that invalidate the user's cached analytics
+        transaction.on_commit(lambda: AnalyticsCacheService.bump_generation(user_id))
+        return len(to_create) + len(to_update)
+
+
+class ExamStandingService:
+    """
+    Service for a user's standing among the users of an exam.
+    Completed exam-mode sessions are recorded in the score index (see analytics.score_index),
+    which answers percentile and leaderboard queries without reading the exam sessions.
+    """
+
+    # Practice sessions are not comparable between users
+    COUNTED_SESSION_TYPES = ('REAL_EXAM', 'TIMED_EXAM')
+    MAX_TOP = 100
+
+    @staticmethod
+    def get_score_percentage(exam_session):
+        if not exam_session.total_possible_score or exam_session.total_score_achieved is None:
+            return None
+        return round(exam_session.total_score_achieved / exam_session.total_possible_score * 100, 2)
+
+    @classmethod
+    def record_session(cls, exam_session):
+        """Record the score of a completed session. Returns True if the user's best score changed."""
+        from .score_index import get_score_index
+
+        if exam_session.status != 'COMPLETED' or exam_session.session_type not in cls.COUNTED_SESSION_TYPES:
+            return False
+        score_percentage = cls.get_score_percentage(exam_session)
+        if score_percentage is None or not exam_session.exam_id:
+            return False
+        return get_score_index().record_score(
+            exam_session.exam_id, exam_session.user_id, score_percentage,
+            exam_session_id=exam_session.id, achieved_at=exam_session.actual_end_time
+        )
+
+    @classmethod
+    def get_standing(cls, exam_id, user_id, top=10, score_percentage=None):
+        """
+        Get the number of participants, the user's best score and percentile, the percentile
+        of score_percentage if given, and the top users of the exam.
+        """
+        from .models import ExamLeaderboardEntry
+        from .score_index import get_score_index
+
+        index = get_score_index()
+        entry = ExamLeaderboardEntry.objects.filter(exam_id=exam_id, user_id=user_id).first()
+        standing = {
+            'exam_id': exam_id,
+            'participants': index.get_participant_count(exam_id),
+            'user': None,
+            'top': [
+                {
+                    'rank': rank,
+                    'username': top_entry.user.username,
+                    'best_score_percentage': top_entry.best_score_percentage,
+                    'achieved_at': top_entry.achieved_at,
+                    'is_current_user': top_entry.user_id == user_id,
+                }
+                for rank, top_entry in enumerate(index.get_top(exam_id, min(top, cls.MAX_TOP)), start=1)
+            ],
+        }
+        if entry:
+            standing['user'] = {
+                'best_score_percentage': entry.best_score_percentage,
+                'percentile': index.get_percentile(exam_id, entry.best_score_percentage),
+            }
+        if score_percentage is not None:
+            standing['score_percentage'] = score_percentage
+            standing['score_percentile'] = index.get_percentile(exam_id, score_percentage)
+        return standing
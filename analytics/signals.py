@@ -0,0 +1,22 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import UserPerformanceRecord, UserProgress
+from .services import AnalyticsCacheService, PerformanceRollupService
+
+
+@receiver(post_save, sender=UserPerformanceRecord)
+@receiver(post_delete, sender=UserPerformanceRecord)
+def refresh_performance_rollups(sender, instance, **kwargs):
+    """Recompute the rollups of the record's week and month once the transaction commits."""
+    PerformanceRollupService.mark_dirty(instance.user_id, instance.date_recorded)
+
+
+@receiver(post_save, sender=UserPerformanceRecord)
+@receiver(post_delete, sender=UserPerformanceRecord)
+@receiver(post_save, sender=UserProgress)
+@receiver(post_delete, sender=UserProgress)
+def bump_analytics_generation(sender, instance, **kwargs):
+    """Invalidate the user's cached analytics once the written records are visible."""
+    user_id = instance.user_id
+    transaction.on_commit(lambda: AnalyticsCacheService.bump_generation(user_id))
@@ -1,3 +1,4 @@
+from datetime import datetime
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from django.urls import reverse
@@ -74,4 +75,413 @@ class AnalyticsAPITestCase(APITestCase):
         """Test that analytics endpoints are accessible"""
         # This is a basic test to ensure endpoints exist
         # Add more specific tests as needed
-        pass 
\ No newline at end of file
+        pass
+
+    def test_cached_summary_reflects_new_records(self):
+        """Test that writing a performance record invalidates the cached summary"""
+        from django.utils import timezone
+
+        url = reverse('performance-summary')
+        self.assertEqual(self.client.get(url).data['total_questions'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            UserPerformanceRecord.objects.create(
+                user=self.user,
+                date_recorded=timezone.now().date(),
+                questions_answered=10,
+                correct_answers=8
+            )
+
+        self.assertEqual(self.client.get(url).data['total_questions'], 10)
+
+    def test_cache_timeout_is_short_without_a_shared_cache(self):
+        """Test that analytics are only kept briefly when invalidations cannot reach other workers"""
+        from django.test import override_settings
+        from analytics.services import AnalyticsCacheService
+
+        self.assertEqual(AnalyticsCacheService.get_timeout(), AnalyticsCacheService.UNSHARED_TIMEOUT)
+        caches = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://127.0.0.1:6379/1'}}
+        with override_settings(CACHES=caches, ANALYTICS_CACHE_TIMEOUT_SECONDS=3600):
+            self.assertEqual(AnalyticsCacheService.get_timeout(), 3600)
+
+
+class SharedCacheTestCase(TestCase):
+    """Tests for the stampede-protected shared cache helpers"""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def test_concurrent_misses_compute_once(self):
+        """Test that only one of several concurrent callers computes a missing key"""
+        import threading
+        import time
+        from exam_prep_platform.cache import SharedCache
+
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return {'value': 42}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(SharedCache.get_or_compute('hot_key', compute, 60)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'value': 42}] * 5)
+
+    def test_stale_value_is_served_while_refreshing(self):
+        """Test that an expired value is served to callers that do not hold the refresh lock"""
+        from django.core.cache import cache
+        from exam_prep_platform.cache import SharedCache
+
+        SharedCache.get_or_compute('stale_key', lambda: 'old', 0)
+        cache.add('stale_key_lock', True, 30)  # Another worker is refreshing
+
+        self.assertEqual(SharedCache.get_or_compute('stale_key', lambda: 'new', 60), 'old')
+
+    def test_file_backend_lock_is_exclusive(self):
+        """Test that the file backend uses an exclusively created lock file, taken over once it is stale"""
+        import os
+        import tempfile
+        from django.test import override_settings
+        from exam_prep_platform.cache import SharedCache
+
+        with tempfile.TemporaryDirectory() as location:
+            caches = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location}}
+            with override_settings(CACHES=caches):
+                self.assertTrue(SharedCache._acquire_lock('hot_key_lock'))
+                self.assertFalse(SharedCache._acquire_lock('hot_key_lock'))
+
+                lock_file = SharedCache._lock_file('hot_key_lock')
+                stale = os.path.getmtime(lock_file) - SharedCache.LOCK_TIMEOUT - 1
+                os.utime(lock_file, (stale, stale))
+                self.assertTrue(SharedCache._acquire_lock('hot_key_lock'))
+
+                SharedCache._release_lock('hot_key_lock')
+                self.assertFalse(os.path.exists(lock_file))
+
+
+class UserProgressServiceTestCase(TestCase):
+    """Tests for incremental topic progress"""
+
+    def setUp(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from questions.models import Question, Topic
+        from assessment.models import ExamSession, UserAnswer
+
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        exam = Exam.objects.create(name='Test Exam', slug='test-exam', is_active=True)
+        self.topic = Topic.objects.create(name='Progress Topic', slug='progress-topic')
+        questions = [
+            Question.objects.create(
+                exam=exam, topic=self.topic, text=f'Question {i}', question_type='OPEN_ENDED', difficulty='EASY'
+            )
+            for i in range(4)
+        ]
+        start_time = timezone.now()
+        self.session = ExamSession.objects.create(
+            user=self.user,
+            exam=exam,
+            session_type='PRACTICE',
+            start_time=start_time,
+            end_time_expected=start_time + timedelta(hours=1),
+            status='COMPLETED',
+            total_possible_score=4,
+            pass_threshold=0.7,
+            time_limit_seconds=3600
+        )
+        for i, question in enumerate(questions[:3]):
+            UserAnswer.objects.create(
+                user=self.user,
+                question=question,
+                exam_session=self.session,
+                submitted_answer_text='answer',
+                is_correct=i < 2,
+                max_possible_score=1,
+                evaluation_status='EVALUATED',
+                submission_time=start_time
+            )
+
+    def test_reprocessed_session_is_not_counted_twice(self):
+        """Test that applying the same session twice leaves the counters unchanged"""
+        from .services import UserProgressService
+
+        UserProgressService.record_session(self.session)
+        UserProgressService.record_session(self.session)
+
+        progress = UserProgress.objects.get(user=self.user, topic=self.topic)
+        self.assertEqual(progress.questions_attempted, 3)
+        self.assertEqual(progress.questions_mastered, 2)
+        self.assertEqual(progress.total_questions_in_topic, 4)
+        self.assertEqual(progress.proficiency_level, 'ADVANCED')
+
+
+class PerformanceBreakdownTestCase(TestCase):
+    """Tests for the topic and difficulty breakdowns"""
+
+    def setUp(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from questions.models import Topic
+
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        parent = Topic.objects.create(name='Parent Topic', slug='parent-topic')
+        self.topic = Topic.objects.create(name='Child Topic', slug='child-topic', parent_topic=parent)
+        inactive = Topic.objects.create(name='Inactive Topic', slug='inactive-topic', is_active=False)
+        self.today = timezone.now().date()
+        for day in range(30):
+            for topic, difficulty in ((self.topic, 'EASY'), (self.topic, 'HARD'), (inactive, 'EASY')):
+                UserPerformanceRecord.objects.create(
+                    user=self.user,
+                    topic=topic,
+                    difficulty=difficulty,
+                    date_recorded=self.today - timedelta(days=day),
+                    questions_answered=4,
+                    correct_answers=3,
+                    total_points_earned=3,
+                    total_points_possible=4,
+                    total_time_spent_seconds=120
+                )
+
+    def test_breakdowns_are_aggregated_in_one_query(self):
+        """Test that each breakdown sums all records in a single grouped query"""
+        from datetime import timedelta
+        from .views import PerformanceByTopicView, PerformanceByDifficultyView
+
+        start_date = self.today - timedelta(days=90)
+        with self.assertNumQueries(1):
+            topics = PerformanceByTopicView().get_topic_data(self.user, start_date, self.today)
+        with self.assertNumQueries(1):
+            difficulties = PerformanceByDifficultyView().get_difficulty_data(self.user, start_date, self.today)
+
+        self.assertEqual(len(topics), 1)
+        self.assertEqual(topics[0]['topic']['parent_topic_name'], 'Parent Topic')
+        self.assertEqual(topics[0]['questions_answered'], 240)
+        self.assertEqual(topics[0]['accuracy'], 75.0)
+        self.assertEqual(topics[0]['average_time_per_question'], 30.0)
+        self.assertEqual(
+            [(row['difficulty'], row['questions_answered']) for row in difficulties],
+            [('EASY', 240), ('MEDIUM', 0), ('HARD', 120)]
+        )
+
+
+class PerformanceRollupTestCase(TestCase):
+    """Tests for the weekly and monthly performance rollups"""
+
+    def setUp(self):
+        from datetime import date, timedelta
+        from questions.models import Topic
+
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        topic = Topic.objects.create(name='Rollup Topic', slug='rollup-topic')
+        # Wednesday 2026-01-07 to Friday 2026-03-20, one record per day
+        self.start_date = date(2026, 1, 7)
+        self.end_date = date(2026, 3, 20)
+        with self.captureOnCommitCallbacks(execute=True):
+            for day in range((self.end_date - self.start_date).days + 1):
+                UserPerformanceRecord.objects.create(
+                    user=self.user,
+                    topic=topic if day % 2 else None,
+                    date_recorded=self.start_date + timedelta(days=day),
+                    questions_answered=2,
+                    correct_answers=1,
+                    total_time_spent_seconds=60
+                )
+
+    def test_weekly_trends_match_daily_records(self):
+        """Test that weekly points built from rollups and partial weeks equal the daily totals"""
+        from datetime import date
+        from collections import Counter
+        from .models import UserPerformanceRollup
+        from .services import PerformanceRollupService
+        from .views import PerformanceTrendsView
+
+        self.assertEqual(
+            UserPerformanceRollup.objects.filter(user=self.user, topic__isnull=True, granularity='MONTH').count(), 3
+        )
+
+        view = PerformanceTrendsView()
+        daily = view.get_trends_data(self.user, self.start_date, self.end_date, 'day')['data_points']
+        weekly = view.get_trends_data(self.user, self.start_date, self.end_date, 'week')['data_points']
+
+        expected = Counter()
+        for point in daily:
+            day = datetime.strptime(point['date'], '%Y-%m-%d').date()
+            expected[PerformanceRollupService.period_start(day, 'WEEK').isoformat()] += point['questions_answered']
+        self.assertEqual({point['date']: point['questions_answered'] for point in weekly}, dict(expected))
+        self.assertEqual(len(weekly), 11)
+
+        # Updating a record refreshes the rollup of its week
+        record = UserPerformanceRecord.objects.get(user=self.user, date_recorded=date(2026, 1, 13))
+        record.questions_answered = 10
+        with self.captureOnCommitCallbacks(execute=True):
+            record.save()
+        weekly = view.get_trends_data(self.user, self.start_date, self.end_date, 'week')['data_points']
+        self.assertEqual(weekly[1]['questions_answered'], 22)
+
+
+class PerformanceRecordCreationTestCase(TestCase):
+    """Tests for adding completed sessions to the performance records"""
+
+    def setUp(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from questions.models import Question, Topic
+        from assessment.models import ExamSession, UserAnswer
+
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        exam = Exam.objects.create(name='Test Exam', slug='test-exam', is_active=True)
+        start_time = timezone.now()
+        self.sessions = []
+        for s in range(2):
+            session = ExamSession.objects.create(
+                user=self.user,
+                exam=exam,
+                session_type='PRACTICE',
+                start_time=start_time,
+                end_time_expected=start_time + timedelta(hours=1),
+                actual_end_time=start_time,
+                status='COMPLETED',
+                total_possible_score=6,
+                pass_threshold=0.7,
+                time_limit_seconds=3600
+            )
+            self.sessions.append(session)
+        for i in range(6):
+            topic = Topic.objects.create(name=f'Record Topic {i}', slug=f'record-topic-{i}')
+            question = Question.objects.create(
+                exam=exam, topic=topic, text=f'Question {i}', question_type='OPEN_ENDED',
+                difficulty=('EASY', 'HARD')[i % 2]
+            )
+            for session in self.sessions:
+                UserAnswer.objects.create(
+                    user=self.user,
+                    question=question,
+                    exam_session=session,
+                    submitted_answer_text='answer',
+                    is_correct=i % 3 == 0,
+                    raw_score=1 if i % 3 == 0 else 0,
+                    max_possible_score=1,
+                    time_spent_seconds=30,
+                    evaluation_status='EVALUATED',
+                    submission_time=start_time
+                )
+
+    def test_sessions_are_added_once_in_fixed_queries(self):
+        """Test that each session is added to the day's records once, with a fixed number of queries"""
+        from .services import AnalyticsService
+
+        # Savepoint, claim, aggregate, existing records, bulk write, release
+        with self.assertNumQueries(6):
+            self.assertEqual(AnalyticsService.create_performance_records_from_session(self.sessions[0]), 6)
+        with self.assertNumQueries(6):
+            self.assertEqual(AnalyticsService.create_performance_records_from_session(self.sessions[1]), 6)
+        self.assertEqual(AnalyticsService.create_performance_records_from_session(self.sessions[0]), 0)
+
+        records = UserPerformanceRecord.objects.filter(user=self.user)
+        self.assertEqual(records.count(), 6)
+        record = records.get(topic__slug='record-topic-0')
+        self.assertEqual((record.questions_answered, record.correct_answers, record.total_points_earned), (2, 2, 2.0))
+        self.assertEqual((record.accuracy, record.average_time_per_question), (1.0, 30.0))
+
+    def test_inconsistent_records_are_fixed_in_one_update(self):
+        """Test that the consistency sweep finds and fixes mismatching records with one statement"""
+        from .services import AnalyticsService
+
+        for session in self.sessions:
+            AnalyticsService.create_performance_records_from_session(session)
+        records = UserPerformanceRecord.objects.filter(user=self.user)
+        records.filter(topic__slug='record-topic-0').update(accuracy=0.5)
+        records.filter(topic__slug='record-topic-1').update(accuracy=None, average_time_per_question=12)
+
+        self.assertEqual(AnalyticsService.get_inconsistent_records().count(), 2)
+        with self.assertNumQueries(1):
+            self.assertEqual(AnalyticsService.validate_and_fix_analytics_consistency(), 2)
+        self.assertEqual(AnalyticsService.get_inconsistent_records().count(), 0)
+        self.assertEqual(
+            list(records.order_by('topic__slug').values_list('accuracy', 'average_time_per_question')[:2]),
+            [(1.0, 30.0), (0.0, 30.0)]
+        )
+
+
+class ExamStandingTestCase(APITestCase):
+    """Tests for exam percentiles and leaderboards"""
+
+    def setUp(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from assessment.models import ExamSession
+
+        self.exam = Exam.objects.create(name='Standing Exam', slug='standing-exam', is_active=True)
+        self.users = [
+            User.objects.create_user(username=f'user{i}', email=f'user{i}@example.com', password='testpass123')
+            for i in range(4)
+        ]
+        now = timezone.now()
+        self.sessions = {}
+        for user, score in zip(self.users, (40, 60, 80, 90)):
+            self.sessions[user.username] = ExamSession.objects.create(
+                user=user,
+                exam=self.exam,
+                session_type='REAL_EXAM',
+                start_time=now,
+                end_time_expected=now + timedelta(hours=1),
+                actual_end_time=now,
+                status='COMPLETED',
+                total_score_achieved=score,
+                total_possible_score=100,
+                pass_threshold=0.7,
+                time_limit_seconds=3600
+            )
+        self.client.force_authenticate(user=self.users[1])
+
+    def test_standing_is_served_from_the_score_index(self):
+        """Test that percentiles and the leaderboard follow recorded scores and improvements"""
+        from .services import ExamStandingService
+
+        for session in self.sessions.values():
+            ExamStandingService.record_session(session)
+        # A retake only counts when it improves the user's best score
+        retake = self.sessions['user1']
+        retake.pk = None
+        retake.total_score_achieved = 95
+        retake.save()
+        self.assertTrue(ExamStandingService.record_session(retake))
+        self.assertFalse(ExamStandingService.record_session(self.sessions['user1']))
+
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse('exam-standing', args=[self.exam.id]), {'top': 2, 'score': 70})
+
+        self.assertEqual(response.data['participants'], 4)
+        self.assertEqual(response.data['user'], {'best_score_percentage': 95.0, 'percentile': 87.5})
+        self.assertEqual(response.data['score_percentile'], 25.0)
+        self.assertEqual(
+            [(entry['username'], entry['is_current_user']) for entry in response.data['top']],
+            [('user1', True), ('user3', False)]
+        )
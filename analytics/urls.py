@@ -4,7 +4,8 @@ from .views import (
     PerformanceByTopicView,
     PerformanceByDifficultyView,
     PerformanceTrendsView,
-    ProgressByTopicView
+    ProgressByTopicView,
+    ExamStandingView
 )
 
 urlpatterns = [
@@ -16,4 +17,7 @@ urlpatterns = [
     
     # Progress endpoints
     path('users/me/progress/by-topic/', ProgressByTopicView.as_view(), name='progress-by-topic'),
+
+    # Exam standing endpoints
+    path('exams/<int:exam_id>/standing/', ExamStandingView.as_view(), name='exam-standing'),
 ] 
\ No newline at end of file
@@ -6,9 +6,10 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
-from django.core.cache import cache
 from django.conf import settings
 from .models import UserPerformanceRecord, UserProgress
+from .services import AnalyticsCacheService, ExamStandingService, PerformanceRollupService, PERFORMANCE_TOTALS
+from exam_prep_platform.cache import SharedCache
 from .serializers import (
     PerformanceSummarySerializer,
     PerformanceByTopicSerializer,
@@ -25,6 +26,22 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+def with_derived_metrics(totals):
+    """Get the summed counters of a group together with its accuracy and average time per question."""
+    questions = totals['questions_answered']
+    accuracy = (totals['correct_answers'] / questions * 100) if questions > 0 else 0
+    avg_time = (totals['total_time_spent_seconds'] / questions) if questions > 0 else 0
+    return {
+        'questions_answered': questions,
+        'correct_answers': totals['correct_answers'],
+        'partially_correct_answers': totals['partially_correct_answers'],
+        'total_points_earned': totals['total_points_earned'],
+        'total_points_possible': totals['total_points_possible'],
+        'total_time_spent_seconds': totals['total_time_spent_seconds'],
+        'accuracy': round(accuracy, 2),
+        'average_time_per_question': round(avg_time, 2)
+    }
+
 
 class PerformanceSummaryView(APIView):
     """
@@ -71,11 +88,18 @@ class PerformanceSummaryView(APIView):
             )
         
         # Create cache key
-        cache_key = f"performance_summary_{user.id}_{start_date}_{end_date}_{exam_id or 'all'}"
-        cached_data = cache.get(cache_key)
-        if cached_data:
-            return Response(cached_data)
-        
+        cache_key = AnalyticsCacheService.make_key(
+            'performance_summary', user.id, start_date, end_date, exam_id or 'all'
+        )
+        data = SharedCache.get_or_compute(
+            cache_key,
+            lambda: self.get_summary_data(user, start_date, end_date, exam_id),
+            AnalyticsCacheService.get_timeout()
+        )
+        return Response(data)
+    
+    def get_summary_data(self, user, start_date, end_date, exam_id):
+        """Compute the serialized summary for the date range."""
         # Base queryset
         queryset = UserPerformanceRecord.objects.filter(
             user=user,
@@ -160,11 +184,7 @@ class PerformanceSummaryView(APIView):
             }
         
         serializer = PerformanceSummarySerializer(data)
-        
-        # Cache the result for 1 hour (3600 seconds)
-        cache.set(cache_key, serializer.data, 3600)
-        
-        return Response(serializer.data)
+        return serializer.data
 
 
 class PerformanceByTopicView(APIView):
@@ -205,86 +225,14 @@ class PerformanceByTopicView(APIView):
             end_date = timezone.now().date()
         
         # Generate cache key
-        cache_key = f'performance_by_topic_{user.id}_{start_date}_{end_date}'
-        cached_data = cache.get(cache_key)
-        
-        if cached_data:
-            return Response(cached_data)
-        
+        cache_key = AnalyticsCacheService.make_key('performance_by_topic', user.id, start_date, end_date)
         try:
-            # Get all topics with their parent topics for hierarchical information
-            topics = Topic.objects.select_related('parent_topic').filter(is_active=True)
-            
-            # Get raw records and then aggregate in Python (to avoid Django ORM limitations)
-            records = UserPerformanceRecord.objects.filter(
-                user=user,
-                date_recorded__gte=start_date,
-                date_recorded__lte=end_date,
-                topic__isnull=False  # Exclude records with no topic
-            ).select_related('topic').values(
-                'topic', 'questions_answered', 'correct_answers', 'partially_correct_answers',
-                'total_points_earned', 'total_points_possible', 'total_time_spent_seconds'
+            data = SharedCache.get_or_compute(
+                cache_key,
+                lambda: self.get_topic_data(user, start_date, end_date),
+                AnalyticsCacheService.get_timeout()
             )
-            
-            # Aggregate by topic in Python
-            topic_aggregates = {}
-            for record in records:
-                topic_id = record['topic']
-                if topic_id not in topic_aggregates:
-                    topic_aggregates[topic_id] = {
-                        'topic': topic_id,
-                        'questions_answered': 0,
-                        'correct_answers': 0,
-                        'partially_correct_answers': 0,
-                        'total_points_earned': 0,
-                        'total_points_possible': 0,
-                        'total_time_spent_seconds': 0
-                    }
-                
-                topic_data = topic_aggregates[topic_id]
-                topic_data['questions_answered'] += record['questions_answered'] or 0
-                topic_data['correct_answers'] += record['correct_answers'] or 0
-                topic_data['partially_correct_answers'] += record['partially_correct_answers'] or 0
-                topic_data['total_points_earned'] += record['total_points_earned'] or 0
-                topic_data['total_points_possible'] += record['total_points_possible'] or 0
-                topic_data['total_time_spent_seconds'] += record['total_time_spent_seconds'] or 0
-            
-            # Build the response data with calculated metrics
-            result = []
-            for topic_id, data in topic_aggregates.items():
-                try:
-                    topic = next(t for t in topics if t.id == topic_id)
-                    
-                    # Calculate derived metrics
-                    questions = data['questions_answered']
-                    accuracy = (data['correct_answers'] / questions * 100) if questions > 0 else 0
-                    avg_time = (data['total_time_spent_seconds'] / questions) if questions > 0 else 0
-                    
-                    result.append({
-                        'topic': topic,
-                        'topic_name': topic.name,
-                        'questions_answered': data['questions_answered'],
-                        'correct_answers': data['correct_answers'],
-                        'partially_correct_answers': data['partially_correct_answers'],
-                        'total_points_earned': data['total_points_earned'],
-                        'total_points_possible': data['total_points_possible'],
-                        'total_time_spent_seconds': data['total_time_spent_seconds'],
-                        'accuracy': round(accuracy, 2),
-                        'average_time_per_question': round(avg_time, 2)
-                    })
-                except StopIteration:
-                    # Topic not found or inactive
-                    pass
-            
-            # Sort by questions answered
-            result.sort(key=lambda x: x['questions_answered'], reverse=True)
-            
-            serializer = PerformanceByTopicSerializer(result, many=True)
-            
-            # Cache the result for 1 hour
-            cache.set(cache_key, serializer.data, 3600)
-            
-            return Response(serializer.data)
+            return Response(data)
         
         except Exception as e:
             # Log the error
@@ -292,6 +240,34 @@ class PerformanceByTopicView(APIView):
             
             # Return empty result to prevent UI errors
             return Response([])
+    
+    def get_topic_data(self, user, start_date, end_date):
+        """Compute the serialized per-topic performance for the date range."""
+        # Sum the records per active topic in the database, joining only the topics that have records
+        rows = UserPerformanceRecord.objects.filter(
+            user=user,
+            date_recorded__gte=start_date,
+            date_recorded__lte=end_date,
+            topic__is_active=True
+        ).values(
+            'topic_id', 'topic__name', 'topic__slug', 'topic__parent_topic_id', 'topic__parent_topic__name'
+        ).annotate(**PERFORMANCE_TOTALS).order_by('-questions_answered', 'topic_id')
+
+        result = []
+        for row in rows:
+            parent_topic = None
+            if row['topic__parent_topic_id'] is not None:
+                parent_topic = {'id': row['topic__parent_topic_id'], 'name': row['topic__parent_topic__name']}
+            topic = {
+                'id': row['topic_id'],
+                'name': row['topic__name'],
+                'slug': row['topic__slug'],
+                'parent_topic': parent_topic,
+            }
+            result.append({'topic': topic, **with_derived_metrics(row)})
+
+        serializer = PerformanceByTopicSerializer(result, many=True)
+        return serializer.data
 
 
 class PerformanceByDifficultyView(APIView):
@@ -332,66 +308,29 @@ class PerformanceByDifficultyView(APIView):
             end_date = timezone.now().date()
         
         # Generate cache key
-        cache_key = f'performance_by_difficulty_{user.id}_{start_date}_{end_date}'
-        cached_data = cache.get(cache_key)
-        
-        if cached_data:
-            return Response(cached_data)
-        
+        cache_key = AnalyticsCacheService.make_key('performance_by_difficulty', user.id, start_date, end_date)
+        data = SharedCache.get_or_compute(
+            cache_key,
+            lambda: self.get_difficulty_data(user, start_date, end_date),
+            AnalyticsCacheService.get_timeout()
+        )
+        return Response(data)
+    
+    def get_difficulty_data(self, user, start_date, end_date):
+        """Compute the serialized per-difficulty performance for the date range."""
         try:
-            # Get raw records and then aggregate in Python (to avoid Django ORM limitations)
-            records = UserPerformanceRecord.objects.filter(
+            # Sum the records per difficulty in the database
+            rows = UserPerformanceRecord.objects.filter(
                 user=user,
                 date_recorded__gte=start_date,
                 date_recorded__lte=end_date,
                 difficulty__isnull=False  # Exclude records with no difficulty
-            ).values(
-                'difficulty', 'questions_answered', 'correct_answers', 'partially_correct_answers',
-                'total_points_earned', 'total_points_possible', 'total_time_spent_seconds'
-            )
-            
-            # Aggregate by difficulty in Python
-            difficulty_aggregates = {}
-            for record in records:
-                difficulty = record['difficulty']
-                if difficulty not in difficulty_aggregates:
-                    difficulty_aggregates[difficulty] = {
-                        'difficulty': difficulty,
-                        'questions_answered': 0,
-                        'correct_answers': 0,
-                        'partially_correct_answers': 0,
-                        'total_points_earned': 0,
-                        'total_points_possible': 0,
-                        'total_time_spent_seconds': 0
-                    }
-                
-                difficulty_data = difficulty_aggregates[difficulty]
-                difficulty_data['questions_answered'] += record['questions_answered'] or 0
-                difficulty_data['correct_answers'] += record['correct_answers'] or 0
-                difficulty_data['partially_correct_answers'] += record['partially_correct_answers'] or 0
-                difficulty_data['total_points_earned'] += record['total_points_earned'] or 0
-                difficulty_data['total_points_possible'] += record['total_points_possible'] or 0
-                difficulty_data['total_time_spent_seconds'] += record['total_time_spent_seconds'] or 0
-            
-            # Convert to list and calculate derived metrics
-            difficulty_records = []
-            for difficulty, data in difficulty_aggregates.items():
-                questions = data['questions_answered']
-                accuracy = (data['correct_answers'] / questions * 100) if questions > 0 else 0
-                avg_time = (data['total_time_spent_seconds'] / questions) if questions > 0 else 0
-                
-                difficulty_records.append({
-                    'difficulty': difficulty,
-                    'questions_answered': data['questions_answered'],
-                    'correct_answers': data['correct_answers'],
-                    'partially_correct_answers': data['partially_correct_answers'],
-                    'total_points_earned': data['total_points_earned'],
-                    'total_points_possible': data['total_points_possible'],
-                    'total_time_spent_seconds': data['total_time_spent_seconds'],
-                    'accuracy': round(accuracy, 2),
-                    'average_time_per_question': round(avg_time, 2)
-                })
-                
+            ).values('difficulty').annotate(**PERFORMANCE_TOTALS).order_by('difficulty')
+
+            difficulty_records = [
+                {'difficulty': row['difficulty'], **with_derived_metrics(row)}
+                for row in rows
+            ]
         except Exception as e:
             # If there's a database error, return empty data
             logger.error(f"Error querying difficulty performance: {str(e)}")
@@ -422,18 +361,16 @@ class PerformanceByDifficultyView(APIView):
         )
         
         serializer = PerformanceByDifficultySerializer(result, many=True)
-        
-        # Cache the result for 1 hour
-        cache.set(cache_key, serializer.data, 3600)
-        
-        return Response(serializer.data)
+        return serializer.data
 
 
 class PerformanceTrendsView(APIView):
     """
-    API view to get user's performance trends over time with accurate calculations
+    API view to get user's performance trends over time with accurate calculations.
+    The granularity parameter selects daily, weekly or monthly points ('auto' picks one from the range).
     """
     permission_classes = [IsAuthenticated]
+    GRANULARITIES = ('day', 'week', 'month', 'auto')
     
     def get(self, request):
         user = request.user
@@ -466,13 +403,46 @@ class PerformanceTrendsView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
         
+        granularity = request.GET.get('granularity', 'day').lower()
+        if granularity not in self.GRANULARITIES:
+            return Response(
+                {'error': f"Invalid granularity. Use one of: {', '.join(self.GRANULARITIES)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if granularity == 'auto':
+            granularity = self.get_auto_granularity(start_date, end_date)
+
         # Create cache key
-        cache_key = f"performance_trends_{user.id}_{start_date}_{end_date}_{exam_id or 'all'}"
-        cached_data = cache.get(cache_key)
-        if cached_data:
-            return Response(cached_data)
-        
+        cache_key = AnalyticsCacheService.make_key(
+            'performance_trends', user.id, start_date, end_date, exam_id or 'all', granularity
+        )
         try:
+            data = SharedCache.get_or_compute(
+                cache_key,
+                lambda: self.get_trends_data(user, start_date, end_date, granularity),
+                AnalyticsCacheService.get_timeout()
+            )
+            return Response(data)
+            
+        except Exception as e:
+            logger.error(f"Error in PerformanceTrendsView: {e}")
+            return Response(
+                {'error': 'Failed to fetch performance trends data'}, 
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+    
+    def get_auto_granularity(self, start_date, end_date):
+        """Get the coarsest granularity that still gives a useful number of points for the range."""
+        days = (end_date - start_date).days + 1
+        if days <= 62:
+            return 'day'
+        if days <= 366:
+            return 'week'
+        return 'month'
+
+    def get_trends_data(self, user, start_date, end_date, granularity='day'):
+        """Compute the serialized data points per day, week or month for the date range."""
+        if granularity == 'day':
             # Get records grouped by date
             records = UserPerformanceRecord.objects.filter(
                 user=user,
@@ -483,47 +453,47 @@ class PerformanceTrendsView(APIView):
                 total_correct=Sum('correct_answers'),
                 total_time=Sum('total_time_spent_seconds')
             ).order_by('date_recorded')
+            points = [
+                (record['date_recorded'], record['total_questions'], record['total_correct'], record['total_time'])
+                for record in records
+            ]
+        else:
+            # Weeks and months are read from the rollups
+            series = PerformanceRollupService.get_series(user.id, granularity.upper(), start_date, end_date)
+            points = [
+                (period, totals['questions_answered'], totals['correct_answers'], totals['total_time_spent_seconds'])
+                for period, totals in series
+            ]
+        
+        # Calculate trends with proper validation
+        result = []
+        for date_recorded, total_questions, total_correct, total_time in points:
+            total_questions = total_questions or 0
+            total_correct = total_correct or 0
+            total_time = total_time or 0
             
-            # Calculate trends with proper validation
-            result = []
-            for record in records:
-                date_recorded = record['date_recorded']
-                total_questions = record['total_questions'] or 0
-                total_correct = record['total_correct'] or 0
-                total_time = record['total_time'] or 0
-                
-                if total_questions > 0:
-                    # Calculate accuracy as percentage
-                    accuracy_decimal = Decimal(total_correct) / Decimal(total_questions) * 100
-                    accuracy = float(accuracy_decimal.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
-                    
-                    # Calculate average time
-                    avg_time_decimal = Decimal(total_time) / Decimal(total_questions)
-                    avg_time = float(avg_time_decimal.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
-                else:
-                    accuracy = 0.0
-                    avg_time = 0.0
+            if total_questions > 0:
+                # Calculate accuracy as percentage
+                accuracy_decimal = Decimal(total_correct) / Decimal(total_questions) * 100
+                accuracy = float(accuracy_decimal.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
                 
-                result.append({
-                    'date': date_recorded.isoformat(),
-                    'questions_answered': total_questions,
-                    'correct_answers': total_correct,
-                    'accuracy': round(accuracy, 2),
-                    'average_time_per_question': round(avg_time, 2),
-                    'total_time_spent_seconds': total_time
-                })
-            
-            # Cache the result for 1 hour
-            cache.set(cache_key, result, 3600)
-            
-            return Response({'data_points': result})
+                # Calculate average time
+                avg_time_decimal = Decimal(total_time) / Decimal(total_questions)
+                avg_time = float(avg_time_decimal.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
+            else:
+                accuracy = 0.0
+                avg_time = 0.0
             
-        except Exception as e:
-            logger.error(f"Error in PerformanceTrendsView: {e}")
-            return Response(
-                {'error': 'Failed to fetch performance trends data'}, 
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+            result.append({
+                'date': date_recorded.isoformat(),
+                'questions_answered': total_questions,
+                'correct_answers': total_correct,
+                'accuracy': round(accuracy, 2),
+                'average_time_per_question': round(avg_time, 2),
+                'total_time_spent_seconds': total_time
+            })
+        
+        return {'time_unit': granularity, 'data_points': result}
 
 
 class ProgressByTopicView(APIView):
@@ -544,12 +514,16 @@ class ProgressByTopicView(APIView):
         only_with_progress = request.query_params.get('only_with_progress', 'true').lower() == 'true'
         
         # Generate cache key
-        cache_key = f'progress_by_topic_{user.id}_{limit}_{offset}_{only_with_progress}'
-        cached_data = cache.get(cache_key)
-        
-        if cached_data:
-            return Response(cached_data)
-        
+        cache_key = AnalyticsCacheService.make_key('progress_by_topic', user.id, limit, offset, only_with_progress)
+        data = SharedCache.get_or_compute(
+            cache_key,
+            lambda: self.get_progress_data(user, limit, offset, only_with_progress),
+            AnalyticsCacheService.get_timeout()
+        )
+        return Response(data)
+    
+    def get_progress_data(self, user, limit, offset, only_with_progress):
+        """Compute the serialized topic progress."""
         # Get user progress records first to limit scope
         progress_records = UserProgress.objects.filter(
             user=user
@@ -652,8 +626,30 @@ class ProgressByTopicView(APIView):
         }
         
         serializer = TopicProgressSerializer(result, many=True)
-        
-        # Cache the result for 30 minutes (shorter cache for progress data)
-        cache.set(cache_key, serializer.data, 1800)
-        
-        return Response(serializer.data) 
\ No newline at end of file
+        return serializer.data 
+
+
+class ExamStandingView(APIView):
+    """
+    View for a user's standing in an exam: their percentile among all users who took it
+    and the exam's leaderboard. Served from the precomputed score index.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, exam_id):
+        try:
+            top = int(request.query_params.get('top', 10))
+            score = request.query_params.get('score')
+            score = float(score) if score is not None else None
+        except ValueError:
+            return Response(
+                {'error': 'top must be an integer and score a number.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if top < 0 or (score is not None and not 0 <= score <= 100):
+            return Response(
+                {'error': 'top must not be negative and score must be between 0 and 100.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(ExamStandingService.get_standing(exam_id, request.user.id, top=top, score_percentage=score))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessment', '0005_useranswer_metadata_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='examsession',
+            name='status',
+            field=models.CharField(choices=[('IN_PROGRESS', 'In Progress'), ('GRADING', 'Grading'), ('COMPLETED', 'Completed'), ('ABANDONED', 'Abandoned')], db_index=True, max_length=20),
+        ),
+    ]
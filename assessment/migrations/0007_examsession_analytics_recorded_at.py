@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:42
+
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.functions import Coalesce
+
+
+def mark_completed_sessions_recorded(apps, schema_editor):
+    # Completed sessions were added to the performance records when they completed
+    ExamSession = apps.get_model('assessment', 'ExamSession')
+    ExamSession.objects.filter(status='COMPLETED').update(
+        analytics_recorded_at=Coalesce(F('actual_end_time'), F('created_at'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessment', '0006_examsession_grading_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='examsession',
+            name='analytics_recorded_at',
+            field=models.DateTimeField(blank=True, help_text="When the session's answers were added to the performance records", null=True),
+        ),
+        migrations.RunPython(mark_completed_sessions_recorded, migrations.RunPython.noop),
+    ]
@@ -20,6 +20,7 @@ class ExamSession(models.Model):
     
     STATUS_CHOICES = (
         ('IN_PROGRESS', 'In Progress'),
+        ('GRADING', 'Grading'),
         ('COMPLETED', 'Completed'),
         ('ABANDONED', 'Abandoned'),
     )
@@ -72,6 +73,8 @@ class ExamSession(models.Model):
     learning_material_viewed = models.BooleanField(default=False,
                                                  help_text="Whether user has viewed learning material before starting")
     metadata = models.JSONField(null=True, blank=True)
+    analytics_recorded_at = models.DateTimeField(null=True, blank=True,
+                                                 help_text="When the session's answers were added to the performance records")
     created_at = models.DateTimeField(auto_now_add=True)
     questions = models.ManyToManyField(Question, through='ExamSessionQuestion')
 
@@ -107,6 +110,10 @@ class ExamSession(models.Model):
         else:
             return self.evaluation_mode
 
+    def is_graded_at_completion(self):
+        """Check if AI-evaluated answers are graded when the session is completed."""
+        return self.get_evaluation_mode() == 'END_OF_EXAM'
+
 
 class LearningMaterial(models.Model):
     """Model for storing learning materials for exams and topics."""
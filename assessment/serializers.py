@@ -1,10 +1,11 @@
 from rest_framework import serializers
 from questions.serializers import QuestionSerializer, MCQChoiceSerializer
-from questions.models import MCQChoice, Topic
+from questions.services import QuestionSnapshotService
+from questions.models import Topic
 from exams.models import Exam
 from .models import ExamSession, ExamSessionQuestion, UserAnswer, UserAnswerMCQChoice, LearningMaterial
 from django.db import models
-import logging
+from collections import defaultdict
 
 class LearningMaterialSerializer(serializers.ModelSerializer):
     """Serializer for learning materials."""
@@ -139,71 +140,73 @@ class ExamSessionDetailSerializer(serializers.ModelSerializer):
                           'total_possible_score', 'passed', 'created_at']
 
     def get_questions(self, obj):
-        """Get questions with their answers for this session."""
-        session_questions = obj.examsessionquestion_set.all().order_by('display_order')
-        questions_data = []
-        
-        for session_question in session_questions:
-            question_data = QuestionSerializer(session_question.question).data
+        """
+        Get questions with their answers for this session.
+        Everything is loaded up front in a fixed number of queries (session questions, latest
+        answers, selected choices) and joined in memory with the cached question snapshots.
+        """
+        session_questions = list(obj.examsessionquestion_set.order_by('display_order'))
+        if not session_questions:
+            return []
+
+        question_ids = [session_question.question_id for session_question in session_questions]
+        snapshots = QuestionSnapshotService.get_many(question_ids)
+        session_questions = [
+            session_question for session_question in session_questions if session_question.question_id in snapshots
+        ]
+
+        # Latest answer per question; rows are ordered so the first one seen wins
+        latest_answers = {}
+        answers = UserAnswer.objects.filter(
+            user_id=obj.user_id,
+            exam_session=obj,
+            question_id__in=question_ids
+        ).order_by('question_id', '-submission_time')
+        for answer in answers:
+            latest_answers.setdefault(answer.question_id, answer)
+
+        # Selected choices of the latest answers
+        selected_choices = defaultdict(list)
+        if latest_answers:
+            choice_links = UserAnswerMCQChoice.objects.filter(
+                user_answer_id__in=[answer.id for answer in latest_answers.values()]
+            ).values_list('user_answer_id', 'mcq_choice_id')
+            for user_answer_id, mcq_choice_id in choice_links:
+                selected_choices[user_answer_id].append(mcq_choice_id)
+
+        questions_data = QuestionSerializer(
+            [snapshots[session_question.question_id] for session_question in session_questions], many=True
+        ).data
+
+        for session_question, question_data in zip(session_questions, questions_data):
+            question = snapshots[session_question.question_id]
             question_data['session_question_id'] = session_question.id
             question_data['display_order'] = session_question.display_order
             question_data['question_weight'] = session_question.question_weight
-            
+
             # For MCQ questions, add the correct answer information
-            if session_question.question.question_type == 'MCQ':
-                try:
-                    correct_choice = MCQChoice.objects.filter(
-                        question=session_question.question,
-                        is_correct=True
-                    ).first()
-                    if correct_choice:
-                        question_data['correct_answer'] = str(correct_choice.id)
-                    else:
-                        question_data['correct_answer'] = None
-                except Exception:
-                    question_data['correct_answer'] = None
-            else:
-                question_data['correct_answer'] = None
-            
+            question_data['correct_answer'] = None
+            if question.question_type == 'MCQ' and question.correct_choice_ids:
+                question_data['correct_answer'] = str(min(question.correct_choice_ids))
+
             # Add user's answer if available
-            try:
-                user_answer = UserAnswer.objects.filter(
-                    user=obj.user,
-                    question=session_question.question,
-                    exam_session=obj
-                ).order_by('-submission_time').first()
-                
-                if user_answer:
-                    # Get MCQ choices for this answer
-                    mcq_choice_ids = []
-                    if session_question.question.question_type == 'MCQ':
-                        mcq_choice_ids = list(
-                            UserAnswerMCQChoice.objects.filter(
-                                user_answer=user_answer
-                            ).values_list('mcq_choice_id', flat=True)
-                        )
-                    
-                    question_data['user_answer'] = {
-                        'id': user_answer.id,
-                        'answer_text': user_answer.submitted_answer_text,
-                        'calculation_input': user_answer.submitted_calculation_input,
-                        'mcq_choices': mcq_choice_ids,
-                        'is_correct': user_answer.is_correct,
-                        'raw_score': user_answer.raw_score,
-                        'weighted_score': user_answer.weighted_score,
-                        'ai_feedback': user_answer.ai_feedback,
-                        'evaluation_status': user_answer.evaluation_status,
-                        'submitted_at': user_answer.submission_time,
-                    }
-                else:
-                    question_data['user_answer'] = None
-            except Exception as e:
-                # Log the error but don't fail the serialization
-                logging.error(f"Error getting user answer for question {session_question.question.id}: {e}")
+            user_answer = latest_answers.get(question.id)
+            if user_answer:
+                question_data['user_answer'] = {
+                    'id': user_answer.id,
+                    'answer_text': user_answer.submitted_answer_text,
+                    'calculation_input': user_answer.submitted_calculation_input,
+                    'mcq_choices': selected_choices.get(user_answer.id, []) if question.question_type == 'MCQ' else [],
+                    'is_correct': user_answer.is_correct,
+                    'raw_score': user_answer.raw_score,
+                    'weighted_score': user_answer.weighted_score,
+                    'ai_feedback': user_answer.ai_feedback,
+                    'evaluation_status': user_answer.evaluation_status,
+                    'submitted_at': user_answer.submission_time,
+                }
+            else:
                 question_data['user_answer'] = None
-                
-            questions_data.append(question_data)
-        
+
         return questions_data
 
     def get_learning_materials(self, obj):
@@ -0,0 +1,432 @@
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q, Sum, F, Window
+from django.utils import timezone
+from django.db.models.functions import RowNumber
+from questions.models import Question, MCQChoice
+from questions.services import QuestionPoolService
+from .models import ExamSession, ExamSessionQuestion, UserAnswer, UserAnswerMCQChoice
+
+logger = logging.getLogger(__name__)
+
+
+class ExamSessionAssemblyService:
+    """
+    Service for selecting and attaching questions to a new exam session.
+    Question IDs are drawn from the per-exam pools of QuestionPoolService instead of
+    ORDER BY RANDOM(), and the session questions are written with a single bulk insert.
+    """
+
+    @classmethod
+    def sample_question_ids(cls, exam_id, num_questions=None, topic_ids=None):
+        """
+        Pick up to num_questions random question IDs from the exam's cached pool.
+        Returns all candidate IDs in random order when num_questions is not given.
+        """
+        return QuestionPoolService.sample(exam_id, num_questions, topic_ids=topic_ids)
+
+    @classmethod
+    def resolve_question_ids(cls, exam_id, question_ids):
+        """
+        Keep only the requested IDs that are active questions of the exam.
+        """
+        return list(
+            Question.objects.filter(
+                id__in=question_ids, exam_id=exam_id, is_active=True
+            ).values_list('id', flat=True)
+        )
+
+    @classmethod
+    def attach_questions(cls, exam_session, question_ids, question_weight=1.0):
+        """
+        Attach the given questions to the session in display order and update
+        total_possible_score with the sum of their points.
+        Returns the number of questions attached.
+        """
+        if not question_ids:
+            exam_session.total_possible_score = 0
+            exam_session.save(update_fields=['total_possible_score'])
+            return 0
+
+        ExamSessionQuestion.objects.bulk_create([
+            ExamSessionQuestion(
+                exam_session=exam_session,
+                question_id=question_id,
+                display_order=i,
+                question_weight=question_weight
+            )
+            for i, question_id in enumerate(question_ids)
+        ])
+
+        total_points = Question.objects.filter(id__in=question_ids).aggregate(
+            total=Sum('points')
+        )['total'] or 0
+
+        exam_session.total_possible_score = total_points
+        exam_session.save(update_fields=['total_possible_score'])
+
+        logger.info(f"Attached {len(question_ids)} questions to exam session {exam_session.id}")
+        return len(question_ids)
+
+
+class MCQAnswerService:
+    """
+    Service for the MCQ answer fast path.
+    Answers are scored against the question's cached snapshot before they are written,
+    so a submission is one INSERT for the scored answer and one bulk INSERT for its choices.
+    """
+
+    @staticmethod
+    def score(question, choice_ids, question_weight=1):
+        """
+        Score submitted choice IDs against a QuestionSnapshot: an answer is correct only if it
+        selects exactly the correct choices. Returns (is_correct, raw_score, weighted_score).
+        """
+        is_correct = bool(choice_ids) and set(choice_ids) == question.correct_choice_ids
+        raw_score = question.points if is_correct else 0
+        return is_correct, raw_score, raw_score * question_weight
+
+    @classmethod
+    @transaction.atomic
+    def submit(cls, user, exam_session, question, choice_ids, time_spent_seconds=None,
+               question_weight=1, max_possible_score=None):
+        """
+        Create a scored MCQ answer to a QuestionSnapshot with its choices.
+        Choice IDs that do not belong to the question are not linked (but still make the answer incorrect).
+        The returned answer serializes its choices without further queries.
+        """
+        is_correct, raw_score, weighted_score = cls.score(question, choice_ids, question_weight)
+        user_answer = UserAnswer.objects.create(
+            user=user,
+            exam_session=exam_session,
+            question_id=question.id,
+            time_spent_seconds=time_spent_seconds,
+            max_possible_score=question.points if max_possible_score is None else max_possible_score,
+            evaluation_status='MCQ_SCORED',
+            is_correct=is_correct,
+            raw_score=raw_score,
+            weighted_score=weighted_score,
+            submission_time=timezone.now()
+        )
+
+        submitted = set(choice_ids)
+        choices = [
+            MCQChoice(
+                id=choice.id, question_id=question.id, choice_text=choice.choice_text,
+                display_order=choice.display_order, is_correct=choice.is_correct
+            )
+            for choice in question.choices if choice.id in submitted
+        ]
+        if choices:
+            UserAnswerMCQChoice.objects.bulk_create([
+                UserAnswerMCQChoice(user_answer=user_answer, mcq_choice_id=choice.id) for choice in choices
+            ])
+        # Serve answer.mcq_choices.all() from the snapshot
+        user_answer._prefetched_objects_cache = {'mcq_choices': choices}
+        return user_answer
+
+
+class ExamSessionScoringService:
+    """
+    Service for scoring a session at completion time.
+    All steps run in a constant number of queries regardless of the session size.
+    """
+
+    # Fields written when finalizing answer scores
+    SCORE_FIELDS = ['raw_score', 'is_correct', 'weighted_score']
+
+    @classmethod
+    def remove_duplicate_answers(cls, exam_session):
+        """
+        Keep only the latest answer for each question of the session.
+        Returns the number of answers removed.
+        """
+        duplicate_ids = list(
+            UserAnswer.objects.filter(
+                user_id=exam_session.user_id,
+                exam_session=exam_session
+            ).annotate(
+                answer_rank=Window(
+                    expression=RowNumber(),
+                    partition_by=[F('question_id')],
+                    order_by=[F('submission_time').desc(), F('id').desc()]
+                )
+            ).filter(answer_rank__gt=1).values_list('id', flat=True)
+        )
+
+        if duplicate_ids:
+            UserAnswer.objects.filter(id__in=duplicate_ids).delete()
+            logger.info(f"Removed {len(duplicate_ids)} duplicate answers for exam session {exam_session.id}")
+
+        return len(duplicate_ids)
+
+    @classmethod
+    def finalize_answer_scores(cls, exam_session):
+        """
+        Ensure all answers have proper scores and correctness status, write the
+        changed rows with one bulk update and return the session's total raw score.
+        """
+        answers = list(
+            UserAnswer.objects.filter(
+                user_id=exam_session.user_id,
+                exam_session=exam_session
+            ).select_related('question').only(
+                'id', 'raw_score', 'weighted_score', 'is_correct', 'max_possible_score',
+                'evaluation_status', 'submitted_answer_text', 'submitted_calculation_input',
+                'question__question_type'
+            )
+        )
+        question_weights = dict(
+            ExamSessionQuestion.objects.filter(exam_session=exam_session).values_list(
+                'question_id', 'question_weight'
+            )
+        )
+
+        total_score = 0
+        answers_to_update = []
+        for answer in answers:
+            if cls._finalize_answer(answer, question_weights.get(answer.question_id)):
+                answers_to_update.append(answer)
+            total_score += answer.raw_score or 0
+
+        if answers_to_update:
+            UserAnswer.objects.bulk_update(answers_to_update, cls.SCORE_FIELDS)
+            logger.info(f"Finalized scores for {len(answers_to_update)} answers in exam session {exam_session.id}")
+
+        return total_score
+
+    @staticmethod
+    def _finalize_answer(answer, question_weight):
+        """Fill in missing score fields of an answer in place. Returns True if anything changed."""
+        needs_update = False
+        is_mcq = answer.question.question_type == 'MCQ'
+
+        # If the answer has no raw_score, assign a default based on question type and evaluation status
+        if answer.raw_score is None:
+            if not is_mcq and answer.evaluation_status in ['PENDING', 'ERROR'] and (
+                answer.submitted_answer_text or answer.submitted_calculation_input
+            ):
+                # Give some credit for attempting the question
+                answer.raw_score = answer.max_possible_score * 0.1  # 10% for effort
+            else:
+                # MCQ should already be scored, unanswered or other cases get zero
+                answer.raw_score = 0
+            answer.is_correct = False
+            needs_update = True
+
+        # If is_correct is None, determine it based on score
+        if answer.is_correct is None:
+            if is_mcq:
+                answer.is_correct = answer.raw_score > 0
+            else:
+                # For open-ended and calculation questions, consider >70% as correct
+                answer.is_correct = answer.raw_score >= answer.max_possible_score * 0.7
+            needs_update = True
+
+        # Ensure weighted_score is set
+        if answer.weighted_score is None:
+            answer.weighted_score = answer.raw_score * (question_weight if question_weight is not None else 1)
+            needs_update = True
+
+        return needs_update
+
+
+class ExamSessionGradingService:
+    """
+    Service for finishing exam sessions.
+    Sessions graded at the end of the exam are moved to GRADING and their open-ended
+    answers are evaluated concurrently in the background; once the last evaluation lands
+    the session is scored, analytics are recorded and the user is notified.
+    """
+
+    AI_EVALUATED_TYPES = ['OPEN_ENDED', 'CALCULATION']
+
+    @classmethod
+    def get_pending_answers(cls, exam_session):
+        """Get the answers of a session that still wait for AI evaluation."""
+        return UserAnswer.objects.filter(
+            user_id=exam_session.user_id,
+            exam_session=exam_session,
+            question__question_type__in=cls.AI_EVALUATED_TYPES,
+            evaluation_status='PENDING'
+        )
+
+    @classmethod
+    def complete_session(cls, exam_session):
+        """
+        Complete a session that is in progress.
+        Returns the session, which is either COMPLETED or GRADING.
+        """
+        with transaction.atomic():
+            # Clean up duplicate answers first - keep only the latest answer for each question
+            ExamSessionScoringService.remove_duplicate_answers(exam_session)
+
+            exam_session.actual_end_time = timezone.now()
+
+            pending_ids = []
+            if exam_session.is_graded_at_completion():
+                pending_ids = list(cls.get_pending_answers(exam_session).values_list('id', flat=True))
+
+            if not pending_ids:
+                exam_session.status = 'COMPLETED'
+                cls._score_session(exam_session)
+                return exam_session
+
+            exam_session.status = 'GRADING'
+            metadata = exam_session.metadata or {}
+            metadata['grading'] = {
+                'answers_to_grade': len(pending_ids),
+                'started_at': exam_session.actual_end_time.isoformat(),
+            }
+            exam_session.metadata = metadata
+            exam_session.save(update_fields=['actual_end_time', 'status', 'metadata'])
+
+            # Hand the answers to the workers only once the GRADING state is visible to them
+            transaction.on_commit(lambda: cls._dispatch_grading(exam_session.id, pending_ids))
+
+        logger.info(f"Queued {len(pending_ids)} answers for grading in exam session {exam_session.id}")
+        return exam_session
+
+    @staticmethod
+    def _dispatch_grading(exam_session_id, user_answer_ids):
+        # Import here to avoid circular import
+        from ai_integration.tasks import dispatch_exam_session_grading
+        dispatch_exam_session_grading(exam_session_id, user_answer_ids)
+
+    @classmethod
+    def record_answer_graded(cls, exam_session_id):
+        """
+        Called by a worker after answers of the session were evaluated.
+        Finalizes the session when no answers are left to grade.
+        Returns True if this call finalized the session.
+        """
+        try:
+            exam_session = ExamSession.objects.get(pk=exam_session_id)
+        except ExamSession.DoesNotExist:
+            return False
+
+        if exam_session.status != 'GRADING' or cls.get_pending_answers(exam_session).exists():
+            return False
+
+        return cls.finalize_grading(exam_session)
+
+    @classmethod
+    def finalize_grading(cls, exam_session):
+        """
+        Score a GRADING session and mark it COMPLETED.
+        Safe to call from several workers at once: only the first one claims the session.
+        """
+        with transaction.atomic():
+            claimed = ExamSession.objects.filter(pk=exam_session.pk, status='GRADING').update(status='COMPLETED')
+            if not claimed:
+                return False
+
+            exam_session.status = 'COMPLETED'
+            cls._score_session(exam_session)
+
+        cls._notify_results_ready(exam_session)
+        logger.info(f"Finished grading exam session {exam_session.id}")
+        return True
+
+    @classmethod
+    def finalize_stalled_sessions(cls):
+        """
+        Finalize GRADING sessions whose answers are all graded, or whose grading took longer
+        than EXAM_GRADING_TIMEOUT_SECONDS, so a lost worker cannot leave them in GRADING.
+        Run periodically (see PERIODIC_TASKS). Returns the number of sessions finalized.
+        """
+        timeout = timedelta(seconds=getattr(settings, 'EXAM_GRADING_TIMEOUT_SECONDS', 900))
+        pending_answers = UserAnswer.objects.filter(
+            user_id=OuterRef('user_id'),
+            exam_session=OuterRef('pk'),
+            question__question_type__in=cls.AI_EVALUATED_TYPES,
+            evaluation_status='PENDING'
+        )
+        stalled = ExamSession.objects.filter(status='GRADING').filter(
+            Q(actual_end_time__lt=timezone.now() - timeout) | ~Exists(pending_answers)
+        )
+
+        finalized = 0
+        for exam_session in stalled.iterator():
+            try:
+                finalized += cls.finalize_grading(exam_session)
+            except Exception as e:
+                logger.error(f"Error finalizing stalled grading of exam session {exam_session.id}: {e}")
+        return finalized
+
+    @classmethod
+    def get_grading_progress(cls, exam_session):
+        """Get the grading progress of a session."""
+        pending = 0
+        if exam_session.status == 'GRADING':
+            pending = cls.get_pending_answers(exam_session).count()
+
+        grading = (exam_session.metadata or {}).get('grading', {})
+        answers_to_grade = grading.get('answers_to_grade', 0)
+        return {
+            'id': exam_session.id,
+            'status': exam_session.status,
+            'answers_to_grade': answers_to_grade,
+            'answers_graded': max(answers_to_grade - pending, 0),
+            'answers_pending': pending,
+            'total_score_achieved': exam_session.total_score_achieved,
+            'total_possible_score': exam_session.total_possible_score,
+            'passed': exam_session.passed,
+        }
+
+    @staticmethod
+    def _score_session(exam_session):
+        """Finalize answer scores, save the session result and record analytics."""
+        total_score = ExamSessionScoringService.finalize_answer_scores(exam_session)
+
+        exam_session.total_score_achieved = total_score
+        exam_session.passed = total_score >= (exam_session.total_possible_score * exam_session.pass_threshold)
+        exam_session.save()
+
+        # The steps below are best-effort: each runs in its own savepoint, so a database
+        # error rolls back only that step and leaves the caller's transaction usable
+
+        # Create analytics performance records from this session
+        try:
+            from analytics.services import AnalyticsService
+            with transaction.atomic():
+                records_created = AnalyticsService.create_performance_records_from_session(exam_session)
+            logger.info(f"Created {records_created} analytics records for session {exam_session.id}")
+        except Exception as e:
+            # Don't fail the exam completion if analytics creation fails
+            logger.error(f"Error creating analytics records for session {exam_session.id}: {e}")
+
+        # Update the user's topic progress from this session
+        try:
+            from analytics.services import UserProgressService
+            with transaction.atomic():
+                UserProgressService.record_session(exam_session)
+        except Exception as e:
+            logger.error(f"Error updating topic progress for session {exam_session.id}: {e}")
+
+        # Update the exam's score distribution and leaderboard
+        try:
+            from analytics.services import ExamStandingService
+            with transaction.atomic():
+                ExamStandingService.record_session(exam_session)
+        except Exception as e:
+            logger.error(f"Error recording the score of session {exam_session.id}: {e}")
+
+    @staticmethod
+    def _notify_results_ready(exam_session):
+        """Let the user know that the graded results are available."""
+        try:
+            from notifications.models import Notification
+            Notification.objects.create(
+                user_id=exam_session.user_id,
+                title='Exam results available',
+                message=f"Your results for \"{exam_session.title or exam_session.exam.name}\" are ready.",
+                notification_type='LEARNING',
+                related_object_type='exam_session',
+                related_object_id=exam_session.id,
+                metadata={'passed': exam_session.passed, 'total_score_achieved': exam_session.total_score_achieved}
+            )
+        except Exception as e:
+            logger.error(f"Error creating results notification for session {exam_session.id}: {e}")
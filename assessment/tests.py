@@ -1,4 +1,4 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from .models import ExamSession
 from exams.models import Exam
@@ -41,4 +41,441 @@ class AssessmentTestCase(TestCase):
         )
         self.assertEqual(session.user, self.user)
         self.assertEqual(session.exam, self.exam)
-        self.assertEqual(session.title, 'Test Session') 
\ No newline at end of file
+        self.assertEqual(session.title, 'Test Session') 
+
+class ExamSessionAssemblyServiceTestCase(TestCase):
+    def setUp(self):
+        from django.utils import timezone
+        from datetime import timedelta
+        from questions.models import Question
+
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.exam = Exam.objects.create(
+            name='Test Exam',
+            slug='test-exam',
+            is_active=True
+        )
+        self.questions = [
+            Question.objects.create(
+                exam=self.exam,
+                text=f'Question {i}',
+                question_type='OPEN_ENDED',
+                difficulty='EASY',
+                points=i + 1
+            )
+            for i in range(10)
+        ]
+        start_time = timezone.now()
+        self.session = ExamSession.objects.create(
+            user=self.user,
+            exam=self.exam,
+            session_type='REAL_EXAM',
+            start_time=start_time,
+            end_time_expected=start_time + timedelta(hours=1),
+            status='IN_PROGRESS',
+            total_possible_score=0,
+            pass_threshold=0.7,
+            time_limit_seconds=3600
+        )
+
+    def test_attach_sampled_questions(self):
+        """Test sampling and bulk attaching questions to a session"""
+        from .services import ExamSessionAssemblyService
+
+        question_ids = ExamSessionAssemblyService.sample_question_ids(self.exam.id, 4)
+        self.assertEqual(len(set(question_ids)), 4)
+
+        with self.assertNumQueries(3):
+            attached = ExamSessionAssemblyService.attach_questions(self.session, question_ids)
+
+        self.assertEqual(attached, 4)
+        points = {q.id: q.points for q in self.questions}
+        self.assertEqual(self.session.total_possible_score, sum(points[qid] for qid in question_ids))
+        self.assertEqual(
+            list(self.session.examsessionquestion_set.order_by('display_order').values_list('question_id', flat=True)),
+            question_ids
+        )
+
+
+class ExamSessionDetailSerializerTestCase(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from django.utils import timezone
+        from datetime import timedelta
+
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.exam = Exam.objects.create(
+            name='Test Exam',
+            slug='test-exam',
+            is_active=True
+        )
+        start_time = timezone.now()
+        self.session = ExamSession.objects.create(
+            user=self.user,
+            exam=self.exam,
+            session_type='PRACTICE',
+            start_time=start_time,
+            end_time_expected=start_time + timedelta(hours=1),
+            status='IN_PROGRESS',
+            total_possible_score=0,
+            pass_threshold=0.7,
+            time_limit_seconds=3600,
+            learning_material_viewed=True
+        )
+
+    def _add_questions(self, count):
+        from django.utils import timezone
+        from questions.models import Question, MCQChoice, Topic
+        from .models import ExamSessionQuestion, UserAnswer, UserAnswerMCQChoice
+
+        offset = self.session.examsessionquestion_set.count()
+        for i in range(offset, offset + count):
+            topic = Topic.objects.create(name=f'Topic {i}', slug=f'topic-{i}')
+            question_type = 'MCQ' if i % 2 else 'OPEN_ENDED'
+            question = Question.objects.create(
+                exam=self.exam,
+                topic=topic,
+                text=f'Question {i}',
+                question_type=question_type,
+                difficulty='EASY'
+            )
+            ExamSessionQuestion.objects.create(exam_session=self.session, question=question, display_order=i)
+            answer = UserAnswer.objects.create(
+                user=self.user,
+                question=question,
+                exam_session=self.session,
+                submitted_answer_text='answer' if question_type != 'MCQ' else None,
+                max_possible_score=1,
+                evaluation_status='MCQ_SCORED' if question_type == 'MCQ' else 'EVALUATED',
+                submission_time=timezone.now()
+            )
+            if question_type == 'MCQ':
+                correct = MCQChoice.objects.create(question=question, choice_text='Right', is_correct=True)
+                MCQChoice.objects.create(question=question, choice_text='Wrong', is_correct=False)
+                UserAnswerMCQChoice.objects.create(user_answer=answer, mcq_choice=correct)
+
+    def test_question_serialization_uses_fixed_query_count(self):
+        """Test that session detail queries do not grow with the number of questions"""
+        from .serializers import ExamSessionDetailSerializer
+
+        self._add_questions(4)
+        session = ExamSession.objects.select_related('exam').get(pk=self.session.pk)
+        # session questions, snapshot choices and questions, latest answers, selected choices
+        with self.assertNumQueries(5):
+            data = ExamSessionDetailSerializer(session).data
+        self.assertEqual(len(data['questions']), 4)
+
+        self._add_questions(16)
+        session = ExamSession.objects.select_related('exam').get(pk=self.session.pk)
+        with self.assertNumQueries(5):
+            data = ExamSessionDetailSerializer(session).data
+        self.assertEqual(len(data['questions']), 20)
+
+        # Cached snapshots leave only the session's own rows
+        with self.assertNumQueries(3):
+            self.assertEqual(ExamSessionDetailSerializer(session).data, data)
+
+        mcq_data = data['questions'][1]
+        self.assertEqual(mcq_data['question_type'], 'MCQ')
+        self.assertEqual(mcq_data['user_answer']['mcq_choices'], [int(mcq_data['correct_answer'])])
+        self.assertEqual(len(mcq_data['choices']), 2)
+        self.assertEqual(mcq_data['topic_name'], 'Topic 1')
+
+
+class ExamSessionScoringServiceTestCase(TestCase):
+    def setUp(self):
+        from django.utils import timezone
+        from datetime import timedelta
+        from questions.models import Question
+        from .models import ExamSessionQuestion
+
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.exam = Exam.objects.create(
+            name='Test Exam',
+            slug='test-exam',
+            is_active=True
+        )
+        start_time = timezone.now()
+        self.session = ExamSession.objects.create(
+            user=self.user,
+            exam=self.exam,
+            session_type='PRACTICE',
+            start_time=start_time,
+            end_time_expected=start_time + timedelta(hours=1),
+            status='IN_PROGRESS',
+            total_possible_score=0,
+            pass_threshold=0.7,
+            time_limit_seconds=3600
+        )
+        self.mcq = Question.objects.create(
+            exam=self.exam, text='MCQ', question_type='MCQ', difficulty='EASY', points=2
+        )
+        self.open_ended = Question.objects.create(
+            exam=self.exam, text='Open', question_type='OPEN_ENDED', difficulty='EASY', points=10
+        )
+        ExamSessionQuestion.objects.create(exam_session=self.session, question=self.mcq, question_weight=2.0)
+        ExamSessionQuestion.objects.create(exam_session=self.session, question=self.open_ended)
+
+    def _answer(self, question, **kwargs):
+        from django.utils import timezone
+        from .models import UserAnswer
+
+        defaults = {
+            'user': self.user,
+            'question': question,
+            'exam_session': self.session,
+            'max_possible_score': question.points,
+            'evaluation_status': 'MCQ_SCORED',
+            'submission_time': timezone.now(),
+        }
+        defaults.update(kwargs)
+        return UserAnswer.objects.create(**defaults)
+
+    def test_duplicates_removed_and_scores_finalized(self):
+        """Test set-based de-duplication and score finalization"""
+        from datetime import timedelta
+        from .models import UserAnswer
+        from .services import ExamSessionScoringService
+
+        old = self._answer(self.mcq, raw_score=0, is_correct=False)
+        latest = self._answer(self.mcq, raw_score=2, is_correct=True,
+                              submission_time=old.submission_time + timedelta(seconds=5))
+        attempted = self._answer(self.open_ended, evaluation_status='ERROR', submitted_answer_text='Some attempt')
+
+        self.assertEqual(ExamSessionScoringService.remove_duplicate_answers(self.session), 1)
+        self.assertFalse(UserAnswer.objects.filter(id=old.id).exists())
+
+        with self.assertNumQueries(3):
+            total_score = ExamSessionScoringService.finalize_answer_scores(self.session)
+
+        latest.refresh_from_db()
+        attempted.refresh_from_db()
+        self.assertEqual(latest.weighted_score, 4.0)
+        self.assertEqual(attempted.raw_score, 1.0)
+        self.assertFalse(attempted.is_correct)
+        self.assertEqual(total_score, 3.0)
+
+
+class ExamSessionGradingServiceTestCase(TestCase):
+    def setUp(self):
+        from django.utils import timezone
+        from datetime import timedelta
+        from questions.models import Question
+        from .models import ExamSessionQuestion, UserAnswer
+
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.exam = Exam.objects.create(
+            name='Test Exam',
+            slug='test-exam',
+            is_active=True
+        )
+        start_time = timezone.now()
+        self.session = ExamSession.objects.create(
+            user=self.user,
+            exam=self.exam,
+            session_type='REAL_EXAM',
+            evaluation_mode='END_OF_EXAM',
+            start_time=start_time,
+            end_time_expected=start_time + timedelta(hours=1),
+            status='IN_PROGRESS',
+            total_possible_score=10,
+            pass_threshold=0.7,
+            time_limit_seconds=3600
+        )
+        question = Question.objects.create(
+            exam=self.exam, text='Open', question_type='OPEN_ENDED', difficulty='EASY', points=10
+        )
+        ExamSessionQuestion.objects.create(exam_session=self.session, question=question)
+        self.answer = UserAnswer.objects.create(
+            user=self.user,
+            question=question,
+            exam_session=self.session,
+            submitted_answer_text='My answer',
+            max_possible_score=10,
+            evaluation_status='EVALUATED',
+            submission_time=timezone.now()
+        )
+        # Set PENDING without triggering the evaluation signal
+        UserAnswer.objects.filter(id=self.answer.id).update(evaluation_status='PENDING')
+
+    def test_completion_defers_ai_grading(self):
+        """Test that completing a real exam returns GRADING and the last graded answer finalizes it"""
+        from unittest.mock import patch
+        from notifications.models import Notification
+        from .models import UserAnswer
+        from .services import ExamSessionGradingService
+
+        with patch('ai_integration.tasks.dispatch_exam_session_grading') as dispatch:
+            with self.captureOnCommitCallbacks(execute=True):
+                ExamSessionGradingService.complete_session(self.session)
+        dispatch.assert_called_once_with(self.session.id, [self.answer.id])
+
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.status, 'GRADING')
+        self.assertEqual(ExamSessionGradingService.get_grading_progress(self.session)['answers_pending'], 1)
+
+        UserAnswer.objects.filter(id=self.answer.id).update(
+            evaluation_status='EVALUATED', raw_score=8, is_correct=True
+        )
+        self.assertTrue(ExamSessionGradingService.record_answer_graded(self.session.id))
+        self.assertFalse(ExamSessionGradingService.record_answer_graded(self.session.id))
+
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.status, 'COMPLETED')
+        self.assertEqual(self.session.total_score_achieved, 8)
+        self.assertTrue(self.session.passed)
+        self.assertTrue(Notification.objects.filter(user=self.user, related_object_id=self.session.id).exists())
+
+    def test_failing_analytics_step_does_not_break_completion(self):
+        """Test that a database error in a best-effort step only rolls back that step"""
+        from unittest.mock import patch
+        from django.db import DatabaseError, transaction
+        from .services import ExamSessionGradingService
+
+        def failing_step(exam_session):
+            # Like a failed query on PostgreSQL, which aborts the transaction it ran in
+            transaction.set_rollback(True)
+            raise DatabaseError('relation does not exist')
+
+        self.answer.delete()
+        with patch('analytics.services.AnalyticsService.create_performance_records_from_session',
+                   side_effect=failing_step):
+            with self.captureOnCommitCallbacks(execute=True):
+                ExamSessionGradingService.complete_session(self.session)
+
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.status, 'COMPLETED')
+        self.assertIsNotNone(self.session.total_score_achieved)
+
+    @override_settings(EXAM_GRADING_TIMEOUT_SECONDS=900)
+    def test_periodic_sweep_finalizes_stalled_grading(self):
+        """Test that sessions left in GRADING are finalized by the sweep, not by reading their progress"""
+        from datetime import timedelta
+        from django.utils import timezone
+        from .services import ExamSessionGradingService
+
+        ExamSession.objects.filter(pk=self.session.pk).update(
+            status='GRADING', actual_end_time=timezone.now() - timedelta(seconds=600)
+        )
+        self.session.refresh_from_db()
+        self.assertEqual(ExamSessionGradingService.get_grading_progress(self.session)['status'], 'GRADING')
+        self.assertEqual(ExamSessionGradingService.finalize_stalled_sessions(), 0)
+
+        ExamSession.objects.filter(pk=self.session.pk).update(actual_end_time=timezone.now() - timedelta(seconds=1000))
+        self.assertEqual(ExamSessionGradingService.get_grading_progress(self.session)['status'], 'GRADING')
+        self.assertEqual(ExamSessionGradingService.finalize_stalled_sessions(), 1)
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.status, 'COMPLETED')
+
+
+class MCQAnswerSubmissionTestCase(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from django.utils import timezone
+        from datetime import timedelta
+        from rest_framework.test import APIClient
+        from questions.models import Question, MCQChoice
+        from .models import ExamSessionQuestion
+
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.exam = Exam.objects.create(
+            name='Test Exam',
+            slug='test-exam',
+            is_active=True
+        )
+        start_time = timezone.now()
+        self.session = ExamSession.objects.create(
+            user=self.user,
+            exam=self.exam,
+            session_type='PRACTICE',
+            start_time=start_time,
+            end_time_expected=start_time + timedelta(hours=1),
+            status='IN_PROGRESS',
+            total_possible_score=4,
+            pass_threshold=0.7,
+            time_limit_seconds=3600
+        )
+        self.question = Question.objects.create(
+            exam=self.exam, text='Pick two', question_type='MCQ', difficulty='EASY', points=2
+        )
+        self.choices = [
+            MCQChoice.objects.create(question=self.question, choice_text=f'Choice {i}', is_correct=i < 2, display_order=i)
+            for i in range(3)
+        ]
+        ExamSessionQuestion.objects.create(exam_session=self.session, question=self.question, question_weight=2)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def submit(self, choice_ids):
+        from django.urls import reverse
+        url = reverse('user-answer-submit-answer', kwargs={
+            'session_id': self.session.id, 'question_id': self.question.id
+        })
+        return self.client.post(url, {'submitted_mcq_choice_ids': choice_ids}, format='json')
+
+    def test_mcq_answer_is_scored_and_written_in_one_pass(self):
+        """Test that MCQ answers are scored from the cached question snapshot and written with bulk inserts"""
+        from questions.services import QuestionSnapshotService
+        from .models import UserAnswer
+
+        QuestionSnapshotService.get(self.question.id)  # Warm the question snapshot
+        with self.assertNumQueries(9):
+            response = self.submit([self.choices[0].id, self.choices[1].id])
+
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(response.data['is_correct'])
+        self.assertEqual((response.data['raw_score'], response.data['weighted_score']), (2, 4))
+        self.assertEqual([choice['id'] for choice in response.data['mcq_choices']], [c.id for c in self.choices[:2]])
+        answer = UserAnswer.objects.get(exam_session=self.session)
+        self.assertEqual(answer.max_possible_score, 4)
+        self.assertEqual(answer.mcq_choices.count(), 2)
+
+        # Changing the correct choices invalidates the cached snapshot
+        with self.captureOnCommitCallbacks(execute=True):
+            self.choices[2].is_correct = True
+            self.choices[2].save()
+        self.assertFalse(self.submit([self.choices[0].id, self.choices[1].id]).data['is_correct'])
+
+    def test_open_ended_answers_skip_the_outbox_when_graded_at_completion(self):
+        """Test that only answers of sessions not graded at completion are queued for evaluation"""
+        from django.urls import reverse
+        from unittest.mock import patch
+        from questions.models import Question
+        from .models import ExamSessionQuestion
+
+        question = Question.objects.create(
+            exam=self.exam, text='Explain', question_type='OPEN_ENDED', difficulty='EASY', points=2
+        )
+        ExamSessionQuestion.objects.create(exam_session=self.session, question=question)
+        url = reverse('user-answer-submit-answer', kwargs={'session_id': self.session.id, 'question_id': question.id})
+
+        with patch('assessment.views.EvaluationOutboxService.enqueue') as enqueue:
+            self.assertEqual(self.client.post(url, {'submitted_answer_text': 'First'}, format='json').status_code, 201)
+            enqueue.assert_called_once()
+
+            ExamSession.objects.filter(pk=self.session.pk).update(session_type='REAL_EXAM')
+            enqueue.reset_mock()
+            self.assertEqual(self.client.post(url, {'submitted_answer_text': 'Second'}, format='json').status_code, 201)
+            enqueue.assert_not_called()
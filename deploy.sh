@@ -67,6 +67,10 @@ mkdir -p /var/log/django
 mkdir -p /var/log/supervisor
 chown -R "$USER:$GROUP" /var/log/django
 
+# Create the cache directory shared by the workers
+mkdir -p "$PROJECT_DIR/cache"
+chown "$USER:$GROUP" "$PROJECT_DIR/cache"
+
 # Create gunicorn configuration
 echo "Creating gunicorn configuration..."
 cat > "$PROJECT_DIR/gunicorn.conf.py" << EOF
@@ -86,6 +90,8 @@ EOF
 chown "$USER:$GROUP" "$PROJECT_DIR/gunicorn.conf.py"
 
 # Create supervisor configuration
+# OPENAI_SCHEDULER_PROCESSES: the 3 gunicorn and 2 uvicorn workers split the OpenAI rate limits
+# CACHE_BACKEND: the workers share one file cache, so cache invalidations reach all of them
 echo "Creating supervisor configuration..."
 cat > /etc/supervisor/conf.d/testimus.conf << EOF
 [program:testimus]
@@ -96,7 +102,19 @@ autostart=true
 autorestart=true
 redirect_stderr=true
 stdout_logfile=/var/log/supervisor/testimus.log
-environment=DJANGO_SETTINGS_MODULE="exam_prep_platform.production_settings"
+environment=DJANGO_SETTINGS_MODULE="exam_prep_platform.production_settings",OPENAI_SCHEDULER_PROCESSES="5",CACHE_BACKEND="file",CACHE_LOCATION="$PROJECT_DIR/cache"
+
+# ASGI server for the streamed chatbot replies only (nginx routes just that path here);
+# everything else stays on the gunicorn WSGI workers
+[program:testimus-stream]
+command=$VENV_DIR/bin/uvicorn exam_prep_platform.asgi:application --host 127.0.0.1 --port 8001 --workers 2
+directory=$PROJECT_DIR
+user=$USER
+autostart=true
+autorestart=true
+redirect_stderr=true
+stdout_logfile=/var/log/supervisor/testimus-stream.log
+environment=DJANGO_SETTINGS_MODULE="exam_prep_platform.production_settings",OPENAI_SCHEDULER_PROCESSES="5",CACHE_BACKEND="file",CACHE_LOCATION="$PROJECT_DIR/cache"
 EOF
 
 # Create nginx configuration
@@ -119,6 +137,20 @@ server {
         add_header Cache-Control "public";
     }
     
+    # Server-Sent Events: served by the ASGI process, passed through unbuffered
+    location = /api/v1/ai/chatbot/messages/stream/ {
+        proxy_pass http://127.0.0.1:8001;
+        proxy_http_version 1.1;
+        proxy_set_header Connection "";
+        proxy_set_header Host \$host;
+        proxy_set_header X-Real-IP \$remote_addr;
+        proxy_set_header X-Forwarded-For \$proxy_add_x_forwarded_for;
+        proxy_set_header X-Forwarded-Proto \$scheme;
+        proxy_buffering off;
+        proxy_cache off;
+        proxy_read_timeout 300s;
+    }
+    
     location / {
         proxy_pass http://127.0.0.1:8000;
         proxy_set_header Host \$host;
@@ -153,6 +185,7 @@ echo "Reloading services..."
 supervisorctl reread
 supervisorctl update
 supervisorctl restart testimus 2>/dev/null || supervisorctl start testimus
+supervisorctl restart testimus-stream 2>/dev/null || supervisorctl start testimus-stream
 
 systemctl restart nginx
 
@@ -162,7 +195,7 @@ sleep 5
 # Check service status
 echo "Checking service status..."
 echo "Supervisor status:"
-supervisorctl status testimus
+supervisorctl status testimus testimus-stream
 
 echo "Nginx status:"
 systemctl is-active nginx
@@ -179,7 +212,8 @@ if curl -s -o /dev/null -w "%{http_code}" http://localhost | grep -q "200\|302\|
     echo ""
     echo "Useful commands:"
     echo "  - View logs: tail -f /var/log/supervisor/testimus.log"
-    echo "  - Restart app: supervisorctl restart testimus"
+    echo "  - View chatbot stream logs: tail -f /var/log/supervisor/testimus-stream.log"
+    echo "  - Restart app: supervisorctl restart testimus testimus-stream"
     echo "  - Check status: supervisorctl status testimus"
 else
     echo "❌ Application is not responding. Check the logs:"
@@ -2,6 +2,10 @@
 ASGI config for exam_prep_platform project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+In production it only serves the streamed chatbot replies (Server-Sent Events): deploy.sh
+runs it under uvicorn next to the gunicorn WSGI workers and nginx routes just the stream
+path to it. Under WSGI the stream would be collected in full before anything is sent, and
+the synchronous DRF views would run one at a time per worker under ASGI.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -0,0 +1,202 @@
+import os
+import time
+import hashlib
+import logging
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+
+class SharedCache:
+    """
+    Caching helpers on top of the configured cache backend (see CACHE_BACKEND in settings).
+
+    get_or_compute() protects hot keys against stampedes: values are stored with a soft
+    expiry and kept for a grace period after it. When a value goes stale, the first worker
+    to take the key's lock recomputes it while every other worker keeps serving the stale
+    value. On a cold miss the other workers wait briefly for the lock holder's result
+    instead of all running the same query. The lock is cache.add(), which is atomic on the
+    locmem and redis backends; FileBasedCache.add() is check-then-write, so on the file
+    backend the lock is an exclusively created file next to the cache files instead.
+
+    Namespaces are versioned: bumping a namespace makes every key built from it unreachable.
+    """
+
+    LOCK_TIMEOUT = 30  # Seconds before a crashed lock holder's lock expires
+    WAIT_INTERVAL = 0.05
+    PROCESS_LOCAL_BACKENDS = (
+        'django.core.cache.backends.locmem.LocMemCache',
+        'django.core.cache.backends.dummy.DummyCache',
+    )
+
+    @classmethod
+    def is_shared(cls):
+        """Check whether the cache backend is shared between processes, so invalidations reach every worker."""
+        return settings.CACHES['default']['BACKEND'] not in cls.PROCESS_LOCAL_BACKENDS
+
+    @staticmethod
+    def _version_key(namespace):
+        return f"cache_namespace_version_{namespace}"
+
+    @classmethod
+    def get_version(cls, namespace):
+        """Get the current version of a namespace, initializing it if needed."""
+        key = cls._version_key(namespace)
+        version = cache.get(key)
+        if version is None:
+            # Seed with a timestamp so a lost counter never resurrects older values
+            cache.add(key, time.time_ns(), None)
+            version = cache.get(key, time.time_ns())
+        return version
+
+    @classmethod
+    def invalidate_namespace(cls, namespace):
+        """Bump the version of a namespace."""
+        key = cls._version_key(namespace)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+    @classmethod
+    def make_key(cls, namespace, *parts):
+        """Build a key in the current version of a namespace."""
+        suffix = '_'.join(str(part) for part in parts)
+        return f"{namespace}_v{cls.get_version(namespace)}_{suffix}"
+
+    @classmethod
+    def make_keys(cls, namespaces, *parts):
+        """
+        Build a key in the current version of each namespace with one cache read for all versions.
+        Returns a dict of namespace -> key.
+        """
+        namespaces = list(namespaces)
+        version_keys = {namespace: cls._version_key(namespace) for namespace in namespaces}
+        versions = cache.get_many(list(version_keys.values()))
+        suffix = '_'.join(str(part) for part in parts)
+        keys = {}
+        for namespace, version_key in version_keys.items():
+            version = versions.get(version_key)
+            if version is None:
+                version = cls.get_version(namespace)
+            keys[namespace] = f"{namespace}_v{version}_{suffix}"
+        return keys
+
+    @classmethod
+    def get_or_compute(cls, key, compute, timeout, stale_seconds=None, wait_seconds=None):
+        """
+        Get the value of key, computing and storing it with compute() when needed.
+        Only one worker computes a given key at a time.
+        """
+        if stale_seconds is None:
+            stale_seconds = getattr(settings, 'CACHE_STALE_SECONDS', 300)
+        if wait_seconds is None:
+            wait_seconds = getattr(settings, 'CACHE_LOCK_WAIT_SECONDS', 5)
+
+        entry = cache.get(key)
+        if entry is not None and time.time() < entry['refresh_at']:
+            return entry['value']
+
+        lock_key = f"{key}_lock"
+        if cls._acquire_lock(lock_key):
+            try:
+                return cls._compute_and_store(key, compute, timeout, stale_seconds)
+            finally:
+                cls._release_lock(lock_key)
+
+        if entry is not None:
+            # Someone else is refreshing the value - serve the stale one meanwhile
+            return entry['value']
+
+        deadline = time.monotonic() + wait_seconds
+        while time.monotonic() < deadline:
+            time.sleep(cls.WAIT_INTERVAL)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry['value']
+            if cls._acquire_lock(lock_key):
+                try:
+                    return cls._compute_and_store(key, compute, timeout, stale_seconds)
+                finally:
+                    cls._release_lock(lock_key)
+
+        logger.warning(f"Timed out waiting for cache key {key} - computing it without the lock")
+        return cls._compute_and_store(key, compute, timeout, stale_seconds)
+
+    @staticmethod
+    def _lock_file(lock_key):
+        """Path of the lock file of a key when the file backend is used, otherwise None."""
+        config = settings.CACHES['default']
+        if config['BACKEND'] != 'django.core.cache.backends.filebased.FileBasedCache':
+            return None
+        return os.path.join(config['LOCATION'], f"{hashlib.sha1(lock_key.encode('utf-8')).hexdigest()}.lock")
+
+    @classmethod
+    def _acquire_lock(cls, lock_key):
+        """Take the lock of a key without waiting. Returns True if this worker holds it now."""
+        path = cls._lock_file(lock_key)
+        if path is None:
+            return cache.add(lock_key, True, cls.LOCK_TIMEOUT)
+
+        for _ in range(2):
+            try:
+                os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return True
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(path) < cls.LOCK_TIMEOUT:
+                        return False
+                    # The lock holder crashed - remove its lock and try once more
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            except FileNotFoundError:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+        return False
+
+    @classmethod
+    def _release_lock(cls, lock_key):
+        path = cls._lock_file(lock_key)
+        if path is None:
+            cache.delete(lock_key)
+            return
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _compute_and_store(key, compute, timeout, stale_seconds):
+        value = compute()
+        cache.set(key, {'value': value, 'refresh_at': time.time() + timeout}, timeout + stale_seconds)
+        return value
+
+    @staticmethod
+    def request_key(request):
+        """Key part identifying a request's host, path and query parameters in a stable order."""
+        query = '&'.join(f"{name}={value}" for name, value in sorted(request.query_params.items()))
+        return hashlib.sha1(f"{request.get_host()}{request.path}?{query}".encode('utf-8')).hexdigest()
+
+
+class CachedListMixin:
+    """
+    List view mixin that serves responses through SharedCache.
+    Responses are cached per request URL in the view's cache_namespace, which the
+    app's signals invalidate when the listed models change.
+    """
+
+    cache_namespace = None
+
+    def get_list_cache_key(self, request):
+        return SharedCache.make_key(self.cache_namespace, 'list', SharedCache.request_key(request))
+
+    def list(self, request, *args, **kwargs):
+        build_response = super().list
+        data = SharedCache.get_or_compute(
+            self.get_list_cache_key(request),
+            lambda: build_response(request, *args, **kwargs).data,
+            getattr(settings, 'CATALOG_CACHE_TIMEOUT_SECONDS', 3600)
+        )
+        return Response(data)
@@ -39,6 +39,27 @@ DATABASES = {
     }
 }
 
+# Cache shared by all workers of the host. The cached lists, question snapshots, analytics
+# and entitlements are invalidated across processes through it, which a per-process locmem
+# cache cannot do (see CACHE_BACKEND in settings.py); set CACHE_BACKEND=redis to use Redis
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'file').lower()
+if CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('CACHE_LOCATION', 'redis://127.0.0.1:6379/1'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_LOCATION', str(BASE_DIR / 'cache')),
+            'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', '10000'))},
+        }
+    }
+CACHES['default']['KEY_PREFIX'] = os.environ.get('CACHE_KEY_PREFIX', 'testsimu')
+
 # Static files configuration for production
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
@@ -219,6 +219,47 @@ SUMUP_TESTING_MODE = os.environ.get('SUMUP_TESTING_MODE', 'false').lower() == 't
 SUMUP_COUNTRY_CODE = 'DE'  # Germany
 SUMUP_CURRENCY = 'EUR'  # Euro for Germany
 
+# Cache backend - 'locmem' (per process), 'file' (shared by the workers of one host) or 'redis'
+# (any Redis-compatible server; CACHE_LOCATION may be a local socket such as unix:///run/redis/redis.sock)
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem').lower()
+if CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('CACHE_LOCATION', 'redis://127.0.0.1:6379/1'),
+        }
+    }
+elif CACHE_BACKEND == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_LOCATION', str(BASE_DIR / 'cache')),
+            'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', '10000'))},
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+CACHES['default']['KEY_PREFIX'] = os.environ.get('CACHE_KEY_PREFIX', 'testsimu')
+# Stampede protection - stale values are served this long past expiry while one worker recomputes them,
+# and workers wait up to CACHE_LOCK_WAIT_SECONDS for another worker's result on a cold miss
+CACHE_STALE_SECONDS = int(os.environ.get('CACHE_STALE_SECONDS', '300'))
+CACHE_LOCK_WAIT_SECONDS = float(os.environ.get('CACHE_LOCK_WAIT_SECONDS', '5'))
+# Public catalog lists (exams, pricing plans, FAQ) are invalidated on change, so they can be kept long
+CATALOG_CACHE_TIMEOUT_SECONDS = int(os.environ.get('CATALOG_CACHE_TIMEOUT_SECONDS', '3600'))
+
+# Cached analytics responses are invalidated by record writes, so they can be kept for hours
+ANALYTICS_CACHE_TIMEOUT_SECONDS = int(os.environ.get('ANALYTICS_CACHE_TIMEOUT_SECONDS', str(6 * 60 * 60)))
+
+# Implementation of the per-exam score distribution behind percentiles and leaderboards
+EXAM_SCORE_INDEX_BACKEND = os.environ.get('EXAM_SCORE_INDEX_BACKEND', 'analytics.score_index.HistogramScoreIndex')
+
+# Longest time a user's cached subscription entitlements are kept (they also expire at the earliest end_date)
+ENTITLEMENT_CACHE_TIMEOUT_SECONDS = int(os.environ.get('ENTITLEMENT_CACHE_TIMEOUT_SECONDS', '300'))
+
 # Dynamic URLs based on current host (for webhooks and redirects)
 ALLOWED_HOSTS = ['localhost', '127.0.0.1', '0.0.0.0', '*']  # Update with your production domain
 
@@ -244,6 +285,51 @@ DEFAULT_FROM_EMAIL = 'admin@testimus.com'
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY', '')
 OPENAI_MODEL = os.environ.get('OPENAI_MODEL', 'gpt-4o-mini')
 
+# Shared OpenAI HTTP client - connection pool size, timeouts and retry backoff for 429/5xx responses
+OPENAI_HTTP_POOL_SIZE = int(os.environ.get('OPENAI_HTTP_POOL_SIZE', '20'))
+OPENAI_TIMEOUT_SECONDS = int(os.environ.get('OPENAI_TIMEOUT_SECONDS', '30'))
+OPENAI_CONNECT_TIMEOUT_SECONDS = int(os.environ.get('OPENAI_CONNECT_TIMEOUT_SECONDS', '5'))
+OPENAI_MAX_RETRIES = int(os.environ.get('OPENAI_MAX_RETRIES', '2'))
+OPENAI_RETRY_BACKOFF_SECONDS = float(os.environ.get('OPENAI_RETRY_BACKOFF_SECONDS', '0.5'))
+OPENAI_RETRY_BACKOFF_MAX_SECONDS = float(os.environ.get('OPENAI_RETRY_BACKOFF_MAX_SECONDS', '8'))
+# OpenAI request scheduler - account rate limits, concurrent requests and how long callers wait for a result.
+# Each process schedules on its own, so the account limits are split evenly between the
+# OPENAI_SCHEDULER_PROCESSES processes that call OpenAI (web workers, stream workers, Celery workers)
+OPENAI_REQUESTS_PER_MINUTE = int(os.environ.get('OPENAI_REQUESTS_PER_MINUTE', '500'))
+OPENAI_TOKENS_PER_MINUTE = int(os.environ.get('OPENAI_TOKENS_PER_MINUTE', '200000'))
+OPENAI_SCHEDULER_PROCESSES = int(os.environ.get('OPENAI_SCHEDULER_PROCESSES', '1'))
+OPENAI_SCHEDULER_WORKERS = int(os.environ.get('OPENAI_SCHEDULER_WORKERS', str(OPENAI_HTTP_POOL_SIZE)))
+OPENAI_SCHEDULER_QUEUE_TIMEOUT_SECONDS = int(os.environ.get('OPENAI_SCHEDULER_QUEUE_TIMEOUT_SECONDS', '300'))
+
+# Number of OpenAI requests sent concurrently when evaluating a batch of answers
+AI_EVALUATION_CONCURRENCY = int(os.environ.get('AI_EVALUATION_CONCURRENCY', '8'))
+# Drainers of the AI evaluation outbox on the in-process task executor (see TASK_EXECUTOR_*)
+AI_EVALUATION_OUTBOX_WORKERS = int(os.environ.get('AI_EVALUATION_OUTBOX_WORKERS', '2'))
+# Cache of AI evaluations keyed by question, template version, normalized answer and language
+AI_EVALUATION_CACHE_ENABLED = os.environ.get('AI_EVALUATION_CACHE_ENABLED', 'true').lower() == 'true'
+AI_EVALUATION_CACHE_TTL_SECONDS = int(os.environ.get('AI_EVALUATION_CACHE_TTL_SECONDS', '86400'))
+AI_EVALUATION_CACHE_MAX_ENTRIES = int(os.environ.get('AI_EVALUATION_CACHE_MAX_ENTRIES', '10000'))
+# Background exam translations - how long a queued (or failed) translation is not queued again
+EXAM_TRANSLATION_RETRY_SECONDS = int(os.environ.get('EXAM_TRANSLATION_RETRY_SECONDS', '600'))
+# In-process task executor used instead of Celery when no broker is configured - worker threads,
+# queued tasks held in memory, how long submitters wait for a free slot, attempts per stored task,
+# after how long a running task is considered lost and how long shutdown waits for queued tasks
+TASK_EXECUTOR_WORKERS = int(os.environ.get('TASK_EXECUTOR_WORKERS', '4'))
+TASK_EXECUTOR_QUEUE_SIZE = int(os.environ.get('TASK_EXECUTOR_QUEUE_SIZE', '100'))
+TASK_EXECUTOR_SUBMIT_TIMEOUT_SECONDS = float(os.environ.get('TASK_EXECUTOR_SUBMIT_TIMEOUT_SECONDS', '5'))
+TASK_EXECUTOR_MAX_ATTEMPTS = int(os.environ.get('TASK_EXECUTOR_MAX_ATTEMPTS', '3'))
+TASK_EXECUTOR_STALE_SECONDS = int(os.environ.get('TASK_EXECUTOR_STALE_SECONDS', '3600'))
+TASK_EXECUTOR_SHUTDOWN_TIMEOUT_SECONDS = int(os.environ.get('TASK_EXECUTOR_SHUTDOWN_TIMEOUT_SECONDS', '30'))
+# Maintenance tasks run about once a minute - by the in-process task executor on its recovery
+# pass, or by Celery beat when a broker is configured
+PERIODIC_TASKS = [
+    'ai_integration.tasks.drain_evaluation_outbox',  # Evaluation jobs whose retry backoff has passed
+    'ai_integration.tasks.finalize_stalled_grading_sessions',  # See EXAM_GRADING_TIMEOUT_SECONDS
+]
+CELERY_BEAT_SCHEDULE = {task: {'task': task, 'schedule': 60.0} for task in PERIODIC_TASKS}
+# Sessions still in GRADING after this many seconds are finalized with the scores available by the periodic sweep
+EXAM_GRADING_TIMEOUT_SECONDS = int(os.environ.get('EXAM_GRADING_TIMEOUT_SECONDS', '900'))
+
 
 
 # Note: For local testing, set environment variables for real API keys if needed:
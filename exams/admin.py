@@ -1,4 +1,6 @@
 from django.contrib import admin
+from django.db import transaction
+from exam_prep_platform.cache import SharedCache
 from .models import Exam, ExamTranslation
 
 @admin.register(Exam)
@@ -56,5 +58,7 @@ class ExamTranslationAdmin(admin.ModelAdmin):
     def mark_as_completed(self, request, queryset):
         """Action to mark selected translations as completed."""
         count = queryset.update(translation_status='COMPLETED')
+        # update() sends no post_save, so invalidate the cached exam lists here
+        transaction.on_commit(lambda: SharedCache.invalidate_namespace('exams'))
         self.message_user(request, f"Marked {count} translations as completed.")
     mark_as_completed.short_description = "Mark selected translations as completed"
@@ -2,12 +2,30 @@ from rest_framework import serializers
 from .models import Exam, ExamTranslation
 from .services import ExamTranslationService
 
-class ExamSerializer(serializers.ModelSerializer):
-    translated_description = serializers.SerializerMethodField()
+def get_request_language(request):
+    """
+    Get the language code requested by the client: the lang query parameter,
+    then the Accept-Language header, defaulting to 'en'.
+    """
+    # Get language from request headers, query params, or default to 'en'
+    language_code = request.META.get('HTTP_ACCEPT_LANGUAGE', 'en')
+    if language_code and '-' in language_code:
+        language_code = language_code.split('-')[0].lower()
     
-    class Meta:
-        model = Exam
-        fields = ['id', 'name', 'slug', 'description', 'translated_description', 'parent_exam_id', 'display_order']
+    # Check for explicit language parameter
+    lang_param = request.query_params.get('lang')
+    if lang_param:
+        language_code = lang_param.lower()
+    
+    return language_code
+
+
+class TranslatedDescriptionMixin:
+    """
+    Serves translated_description from the exam's (prefetched) translations.
+    Missing translations are queued for background translation and the original
+    description is returned meanwhile, so serializing never waits on the AI service.
+    """
     
     def get_translated_description(self, obj):
         """
@@ -17,34 +35,37 @@ class ExamSerializer(serializers.ModelSerializer):
         if not request:
             return obj.description
         
-        # Get language from request headers, query params, or default to 'en'
-        language_code = request.META.get('HTTP_ACCEPT_LANGUAGE', 'en')
-        if language_code and '-' in language_code:
-            language_code = language_code.split('-')[0].lower()
-        
-        # Check for explicit language parameter
-        lang_param = request.query_params.get('lang')
-        if lang_param:
-            language_code = lang_param.lower()
+        language_code = get_request_language(request)
         
         # If it's English or no description, return original
         if language_code == 'en' or not obj.description:
             return obj.description
         
-        # Get translated description
-        translated_desc = obj.get_translated_description(language_code)
+        # Uses the prefetch cache when the view prefetched 'translations'
+        for translation in obj.translations.all():
+            if (translation.language_code == language_code and
+                    translation.translation_status == 'COMPLETED' and translation.translated_description):
+                return translation.translated_description
         
-        # If translation doesn't exist and we have AI service, trigger translation
-        if translated_desc == obj.description and language_code in ExamTranslationService.LANGUAGE_NAMES:
+        # If translation doesn't exist and we have AI service, queue it in the background
+        if language_code in ExamTranslationService.LANGUAGE_NAMES:
             try:
-                # Trigger async translation (non-blocking)
-                ExamTranslationService.translate_exam_description(obj, language_code)
+                ExamTranslationService.queue_translation(obj.id, language_code)
             except Exception:
                 pass  # Fail silently, return original description
         
-        return translated_desc
+        return obj.description
+
 
-class ExamDetailSerializer(serializers.ModelSerializer):
+class ExamSerializer(TranslatedDescriptionMixin, serializers.ModelSerializer):
+    translated_description = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Exam
+        fields = ['id', 'name', 'slug', 'description', 'translated_description', 'parent_exam_id', 'display_order']
+
+
+class ExamDetailSerializer(TranslatedDescriptionMixin, serializers.ModelSerializer):
     parent_exam = serializers.SerializerMethodField()
     sub_exams = ExamSerializer(many=True, read_only=True)
     translated_description = serializers.SerializerMethodField()
@@ -60,52 +81,17 @@ class ExamDetailSerializer(serializers.ModelSerializer):
             return ExamSerializer(obj.parent_exam, context=self.context).data
         return None
     
-    def get_translated_description(self, obj):
-        """
-        Get translated description based on request language preference.
-        """
-        request = self.context.get('request')
-        if not request:
-            return obj.description
-        
-        # Get language from request headers, query params, or default to 'en'
-        language_code = request.META.get('HTTP_ACCEPT_LANGUAGE', 'en')
-        if language_code and '-' in language_code:
-            language_code = language_code.split('-')[0].lower()
-        
-        # Check for explicit language parameter
-        lang_param = request.query_params.get('lang')
-        if lang_param:
-            language_code = lang_param.lower()
-        
-        # If it's English or no description, return original
-        if language_code == 'en' or not obj.description:
-            return obj.description
-        
-        # Get translated description
-        translated_desc = obj.get_translated_description(language_code)
-        
-        # If translation doesn't exist and we have AI service, trigger translation
-        if translated_desc == obj.description and language_code in ExamTranslationService.LANGUAGE_NAMES:
-            try:
-                # Trigger async translation (non-blocking)
-                ExamTranslationService.translate_exam_description(obj, language_code)
-            except Exception:
-                pass  # Fail silently, return original description
-        
-        return translated_desc
-    
     def get_available_translations(self, obj):
         """
         Get list of available translations for this exam.
         """
-        translations = ExamTranslation.objects.filter(
-            exam=obj, 
-            translation_status='COMPLETED'
-        ).values_list('language_code', flat=True)
+        translations = [
+            translation.language_code for translation in obj.translations.all()
+            if translation.translation_status == 'COMPLETED'
+        ]
         
         # Always include English as available
-        available = ['en'] + list(translations)
+        available = ['en'] + translations
         return list(set(available))  # Remove duplicates
 
 
@@ -1,9 +1,10 @@
 import time
 import json
 import logging
-import requests
 from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
+from ai_integration.request_scheduler import get_request_scheduler
 from .models import Exam, ExamTranslation
 
 logger = logging.getLogger(__name__)
@@ -57,6 +58,25 @@ class ExamTranslationService:
             logger.error(f"Error creating translation for exam {exam.id}: {str(e)}")
             return None
     
+    @classmethod
+    def queue_translation(cls, exam_id, language_code):
+        """
+        Queue a missing translation for background processing.
+        The same exam and language are queued at most once per EXAM_TRANSLATION_RETRY_SECONDS,
+        so concurrent catalog requests do not start duplicate translations and failed
+        translations are not retried on every request.
+        Returns True if the translation was queued.
+        """
+        queued_key = f"exam_translation_queued_{exam_id}_{language_code}"
+        if not cache.add(queued_key, True, getattr(settings, 'EXAM_TRANSLATION_RETRY_SECONDS', 600)):
+            return False
+        
+        # Import here to avoid circular import
+        from .tasks import dispatch_exam_translation
+        dispatch_exam_translation(exam_id, language_code)
+        logger.info(f"Queued translation of exam {exam_id} to {language_code}")
+        return True
+    
     @classmethod
     def translate_exam_description(cls, exam, language_code):
         """
@@ -150,61 +170,22 @@ Please provide ONLY the translated description in {target_language}, without any
         """
         Call OpenAI API for translation.
         """
-        start_time = time.time()
-        
-        try:
-            # Check if OpenAI is configured
-            if not hasattr(settings, 'OPENAI_API_KEY') or not settings.OPENAI_API_KEY:
-                return None, 0, "OpenAI API not configured"
-            
-            headers = {
-                'Authorization': f"Bearer {settings.OPENAI_API_KEY}",
-                'Content-Type': 'application/json'
-            }
-            
-            # Prepare the request
-            data = {
-                'model': getattr(settings, 'OPENAI_MODEL', 'gpt-3.5-turbo'),
-                'messages': [
-                    {
-                        'role': 'system',
-                        'content': 'You are a professional translator. Provide only the translation without any additional text, explanations, or formatting.'
-                    },
-                    {
-                        'role': 'user',
-                        'content': prompt
-                    }
-                ],
-                'temperature': 0.3,  # Lower temperature for more consistent translations
-                'max_tokens': 1000
-            }
-            
-            response = requests.post(
-                'https://api.openai.com/v1/chat/completions',
-                headers=headers,
-                json=data,
-                timeout=30
-            )
-            
-            processing_time = int((time.time() - start_time) * 1000)
-            
-            if response.status_code != 200:
-                error_msg = f"OpenAI API error: {response.status_code} - {response.text}"
-                return None, processing_time, error_msg
-            
-            result = response.json()
-            ai_response = result['choices'][0]['message']['content'].strip()
-            
-            return ai_response, processing_time, None
-            
-        except requests.exceptions.Timeout:
-            error_msg = "OpenAI API request timed out"
-            processing_time = int((time.time() - start_time) * 1000)
-            return None, processing_time, error_msg
-        except Exception as e:
-            error_msg = f"Error calling OpenAI API: {str(e)}"
-            processing_time = int((time.time() - start_time) * 1000)
-            return None, processing_time, error_msg
+        return get_request_scheduler().chat_completion(
+            [
+                {
+                    'role': 'system',
+                    'content': 'You are a professional translator. Provide only the translation without any additional text, explanations, or formatting.'
+                },
+                {
+                    'role': 'user',
+                    'content': prompt
+                }
+            ],
+            model=getattr(settings, 'OPENAI_MODEL', 'gpt-3.5-turbo'),
+            purpose='translation',
+            temperature=0.3,  # Lower temperature for more consistent translations
+            max_tokens=1000
+        )
     
     @classmethod
     def _parse_translation_response(cls, ai_response):
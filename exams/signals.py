@@ -0,0 +1,19 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from exam_prep_platform.cache import SharedCache
+from .models import Exam, ExamTranslation
+
+
+@receiver(post_save, sender=Exam)
+@receiver(post_delete, sender=Exam)
+def invalidate_exam_caches(sender, instance, **kwargs):
+    """Invalidate cached exam lists, and pricing plans that show the exam's name and slug."""
+    SharedCache.invalidate_namespace('exams')
+    SharedCache.invalidate_namespace('pricing_plans')
+
+
+@receiver(post_save, sender=ExamTranslation)
+@receiver(post_delete, sender=ExamTranslation)
+def invalidate_exam_caches_on_translation(sender, instance, **kwargs):
+    """A finished translation changes the translated descriptions in exam lists."""
+    SharedCache.invalidate_namespace('exams')
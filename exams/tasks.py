@@ -0,0 +1,24 @@
+import logging
+from celery import shared_task
+from ai_integration.task_executor import FallbackTask
+from .models import Exam
+from .services import ExamTranslationService
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(base=FallbackTask)
+def translate_exam_description(exam_id, language_code):
+    """
+    Celery task to translate an exam description in the background.
+    """
+    exam = Exam.objects.filter(pk=exam_id).first()
+    if exam:
+        ExamTranslationService.translate_exam_description(exam, language_code)
+
+
+def dispatch_exam_translation(exam_id, language_code):
+    """
+    Translate an exam description in the background, on Celery or the in-process task executor.
+    """
+    translate_exam_description.delay(exam_id, language_code)
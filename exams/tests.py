@@ -1,3 +1,37 @@
-from django.test import TestCase
+from unittest.mock import patch
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from .models import Exam, ExamTranslation
 
-# Create your tests here.
+
+class ExamListTranslationTestCase(APITestCase):
+    """Tests for translated descriptions in the public exam catalog"""
+
+    def setUp(self):
+        cache.clear()
+        # Hide the exams created by data migrations
+        Exam.objects.update(is_active=False)
+        self.exams = [
+            Exam.objects.create(name=f'Exam {i}', slug=f'exam-{i}', description=f'Description {i}', display_order=i)
+            for i in range(3)
+        ]
+        ExamTranslation.objects.create(
+            exam=self.exams[0], language_code='de', translated_description='Beschreibung 0',
+            translation_status='COMPLETED'
+        )
+
+    def test_missing_translations_are_queued_without_blocking(self):
+        """Test that the list loads translations in one query and queues each missing one once"""
+        with patch('exams.tasks.dispatch_exam_translation') as dispatch:
+            # Count, exams and prefetched translations
+            with self.assertNumQueries(3):
+                response = self.client.get(reverse('exam-list'), {'lang': 'de'})
+            self.client.get(reverse('exam-list'), {'lang': 'de'})
+
+        descriptions = [exam['translated_description'] for exam in response.data['results']]
+        self.assertEqual(descriptions, ['Beschreibung 0', 'Description 1', 'Description 2'])
+        self.assertEqual(
+            sorted(call.args for call in dispatch.call_args_list),
+            [(self.exams[1].id, 'de'), (self.exams[2].id, 'de')]
+        )
@@ -5,8 +5,10 @@ from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
+from django.conf import settings
+from exam_prep_platform.cache import SharedCache
 from .models import Exam, ExamTranslation
-from .serializers import ExamSerializer, ExamDetailSerializer, ExamTranslationSerializer
+from .serializers import ExamSerializer, ExamDetailSerializer, ExamTranslationSerializer, get_request_language
 from .services import ExamTranslationService
 
 # Create your views here.
@@ -18,28 +20,42 @@ class ExamListView(generics.ListAPIView):
     filterset_fields = ['parent_exam_id']
     
     def get_queryset(self):
-        return Exam.objects.filter(is_active=True).order_by('display_order')
+        return Exam.objects.filter(is_active=True).prefetch_related('translations').order_by('display_order')
     
     def list(self, request, *args, **kwargs):
         """Override list method to ensure proper response format"""
+        # Translated descriptions depend on the Accept-Language header as well as the URL
+        cache_key = SharedCache.make_key(
+            'exams', 'list', get_request_language(request), SharedCache.request_key(request)
+        )
+        data = SharedCache.get_or_compute(
+            cache_key,
+            self.get_list_data,
+            getattr(settings, 'CATALOG_CACHE_TIMEOUT_SECONDS', 3600)
+        )
+        return Response(data)
+    
+    def get_list_data(self):
         queryset = self.filter_queryset(self.get_queryset())
         
         page = self.paginate_queryset(queryset)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+            return self.get_paginated_response(serializer.data).data
 
         serializer = self.get_serializer(queryset, many=True)
-        return Response({
+        return {
             'count': len(serializer.data),
             'next': None,
             'previous': None,
             'results': serializer.data
-        })
+        }
 
 
 class ExamDetailView(generics.RetrieveAPIView):
-    queryset = Exam.objects.filter(is_active=True)
+    queryset = Exam.objects.filter(is_active=True).select_related('parent_exam').prefetch_related(
+        'translations', 'parent_exam__translations', 'sub_exams__translations'
+    )
     serializer_class = ExamDetailSerializer
     permission_classes = [AllowAny]
     lookup_field = 'slug'
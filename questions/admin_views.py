@@ -12,6 +12,7 @@ from .admin_serializers import (
     AdminTagSerializer, QuestionTagAdminSerializer
 )
 from .serializers import QuestionSerializer, TopicSerializer
+from .services import QuestionSnapshotService
 
 class IsAdminUser(permissions.BasePermission):
     """
@@ -107,7 +108,14 @@ class AdminQuestionViewSet(viewsets.ModelViewSet):
 
     def perform_update(self, serializer):
         # Set last_updated_by to current user on update
-        serializer.save(last_updated_by=self.request.user)
+        question = serializer.save(last_updated_by=self.request.user)
+        # The nested choices and tags are replaced as a whole; drop the cached snapshot once committed
+        QuestionSnapshotService.invalidate(question.pk)
+
+    def perform_destroy(self, instance):
+        question_id = instance.pk
+        instance.delete()
+        QuestionSnapshotService.invalidate(question_id)
 
     def destroy(self, request, *args, **kwargs):
         """Override destroy to handle relationships properly."""
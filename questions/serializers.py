@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Topic, Question, MCQChoice, Tag
+from .services import QuestionSnapshot, QuestionSnapshotService
 from exams.models import Exam
 
 class MCQChoiceSerializer(serializers.ModelSerializer):
@@ -26,7 +27,25 @@ class ExamSerializer(serializers.ModelSerializer):
         model = Exam
         fields = ['id', 'name', 'slug', 'description', 'parent_exam_id', 'display_order']
 
+class QuestionSnapshotListSerializer(serializers.ListSerializer):
+    """Fetches the snapshots of all listed questions at once for QuestionSerializer."""
+
+    def to_representation(self, data):
+        items = list(data.all() if hasattr(data, 'all') else data)
+        self.child.snapshots = QuestionSnapshotService.get_many(
+            item.pk for item in items if not isinstance(item, QuestionSnapshot)
+        )
+        try:
+            return super().to_representation(items)
+        finally:
+            self.child.snapshots = None
+
 class QuestionSerializer(serializers.ModelSerializer):
+    """
+    Questions are represented from their cached QuestionSnapshot, so the serializer reads
+    no question, choice, topic or exam rows; QuestionSnapshot instances can be passed directly.
+    """
+
     topic_name = serializers.StringRelatedField(source='topic.name', read_only=True)
     topic_slug = serializers.SlugRelatedField(source='topic', slug_field='slug', read_only=True)
     exam_name = serializers.StringRelatedField(source='exam.name', read_only=True)
@@ -39,6 +58,39 @@ class QuestionSerializer(serializers.ModelSerializer):
         fields = ['id', 'text', 'question_type', 'difficulty', 'estimated_time_seconds', 
                  'points', 'exam_id', 'exam_name', 'exam_slug', 'topic_id', 'topic_name', 
                  'topic_slug', 'mcq_choices', 'choices']
+        list_serializer_class = QuestionSnapshotListSerializer
+
+    def to_representation(self, instance):
+        if isinstance(instance, QuestionSnapshot):
+            return self.snapshot_representation(instance)
+        snapshots = getattr(self, 'snapshots', None)
+        snapshot = snapshots.get(instance.pk) if snapshots is not None else QuestionSnapshotService.get(instance.pk)
+        if snapshot is None:
+            return super().to_representation(instance)
+        return self.snapshot_representation(snapshot)
+
+    @staticmethod
+    def snapshot_representation(snapshot):
+        choices = [
+            {'id': choice.id, 'choice_text': choice.choice_text, 'display_order': choice.display_order}
+            for choice in snapshot.choices
+        ]
+        return {
+            'id': snapshot.id,
+            'text': snapshot.text,
+            'question_type': snapshot.question_type,
+            'difficulty': snapshot.difficulty,
+            'estimated_time_seconds': snapshot.estimated_time_seconds,
+            'points': snapshot.points,
+            'exam_id': snapshot.exam_id,
+            'exam_name': snapshot.exam_name,
+            'exam_slug': snapshot.exam_slug,
+            'topic_id': snapshot.topic_id,
+            'topic_name': snapshot.topic_name,
+            'topic_slug': snapshot.topic_slug,
+            'mcq_choices': choices,
+            'choices': [dict(choice) for choice in choices] if snapshot.question_type == 'MCQ' else [],
+        }
 
     def get_choices(self, obj):
         """Return choices with the same data as mcq_choices for compatibility"""
@@ -48,8 +100,8 @@ class QuestionSerializer(serializers.ModelSerializer):
         # First try the related name
         choices = list(obj.mcqchoice_set.all())
         
-        # If that fails, try direct query
-        if not choices:
+        # If that fails, try direct query (prefetched results are authoritative)
+        if not choices and 'mcqchoice_set' not in getattr(obj, '_prefetched_objects_cache', {}):
             choices = list(MCQChoice.objects.filter(question=obj))
             
         # Return serialized data
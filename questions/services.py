@@ -0,0 +1,285 @@
+import time
+import random
+import logging
+import threading
+from collections import OrderedDict, defaultdict
+from django.core.cache import cache
+from django.db import transaction
+from exam_prep_platform.cache import SharedCache
+from .models import Question, MCQChoice
+
+logger = logging.getLogger(__name__)
+
+
+class QuestionPoolService:
+    """
+    Service for cached pools of active question IDs per exam.
+    Each exam's pool is bucketed by (topic_id, difficulty, question_type) and stored
+    under a versioned cache key, so random selection can draw IDs from memory
+    instead of sorting the question table. Saving or deleting a question bumps
+    the exam's pool version, which makes the old pool unreachable. With a process-local
+    cache backend (locmem) that bump only reaches the saving process, so pools are then
+    only kept for UNSHARED_TIMEOUT seconds.
+    """
+
+    POOL_TIMEOUT = 6 * 60 * 60  # Stale versions simply expire
+    UNSHARED_TIMEOUT = 60
+
+    @classmethod
+    def get_timeout(cls):
+        """Seconds a pool is kept in the cache."""
+        return cls.POOL_TIMEOUT if SharedCache.is_shared() else cls.UNSHARED_TIMEOUT
+
+    @staticmethod
+    def _version_key(exam_id):
+        return f"question_pool_version_{exam_id}"
+
+    @classmethod
+    def get_version(cls, exam_id):
+        """Get the current pool version for an exam, initializing it if needed."""
+        key = cls._version_key(exam_id)
+        version = cache.get(key)
+        if version is None:
+            # Seed with a timestamp so a lost counter never resurrects an older pool
+            cache.add(key, time.time_ns(), None)
+            version = cache.get(key, time.time_ns())
+        return version
+
+    @classmethod
+    def invalidate(cls, exam_id):
+        """Bump the pool version for an exam."""
+        if exam_id is None:
+            return
+        key = cls._version_key(exam_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+        logger.debug(f"Invalidated question pool for exam {exam_id}")
+
+    @classmethod
+    def get_pool(cls, exam_id):
+        """
+        Get the bucketed pool for an exam as a dict of
+        (topic_id, difficulty, question_type) -> tuple of question IDs.
+        """
+        pool_key = f"question_pool_{exam_id}_v{cls.get_version(exam_id)}"
+        pool = cache.get(pool_key)
+        if pool is not None:
+            return pool
+
+        buckets = defaultdict(list)
+        rows = Question.objects.filter(exam_id=exam_id, is_active=True).order_by('id').values_list(
+            'id', 'topic_id', 'difficulty', 'question_type'
+        )
+        for question_id, topic_id, difficulty, question_type in rows:
+            buckets[(topic_id, difficulty, question_type)].append(question_id)
+
+        pool = {bucket: tuple(ids) for bucket, ids in buckets.items()}
+        cache.set(pool_key, pool, cls.get_timeout())
+        return pool
+
+    @classmethod
+    def get_question_ids(cls, exam_id, topic_ids=None, difficulties=None, question_types=None):
+        """
+        Get the active question IDs of an exam matching the given filters.
+        Each filter is an optional collection; None means no restriction.
+        """
+        topic_ids = set(topic_ids) if topic_ids else None
+        difficulties = set(difficulties) if difficulties else None
+        question_types = set(question_types) if question_types else None
+
+        question_ids = []
+        for (topic_id, difficulty, question_type), ids in cls.get_pool(exam_id).items():
+            if topic_ids is not None and topic_id not in topic_ids:
+                continue
+            if difficulties is not None and difficulty not in difficulties:
+                continue
+            if question_types is not None and question_type not in question_types:
+                continue
+            question_ids.extend(ids)
+        return question_ids
+
+    @classmethod
+    def sample(cls, exam_id, k=None, topic_ids=None, difficulties=None, question_types=None):
+        """
+        Draw up to k random question IDs from the exam's pool.
+        Returns all matching IDs in random order when k is not given.
+        """
+        question_ids = cls.get_question_ids(
+            exam_id, topic_ids=topic_ids, difficulties=difficulties, question_types=question_types
+        )
+        if k is None or k >= len(question_ids):
+            random.shuffle(question_ids)
+            return question_ids
+        return random.sample(question_ids, k)
+
+
+class ChoiceSnapshot:
+    """Immutable cached MCQ choice of a QuestionSnapshot."""
+
+    __slots__ = ('id', 'choice_text', 'display_order', 'is_correct')
+
+    def __init__(self, id, choice_text, display_order, is_correct):
+        for name, value in zip(self.__slots__, (id, choice_text, display_order, is_correct)):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __reduce__(self):
+        return (type(self), tuple(getattr(self, name) for name in self.__slots__))
+
+
+class QuestionSnapshot:
+    """
+    Immutable cached copy of a question with its exam and topic names and its MCQ choices
+    (in display order). model_calculation_logic is shared between readers and must not be modified.
+    """
+
+    __slots__ = (
+        'id', 'exam_id', 'exam_name', 'exam_slug', 'topic_id', 'topic_name', 'topic_slug',
+        'text', 'question_type', 'difficulty', 'estimated_time_seconds', 'points', 'is_active',
+        'model_answer_text', 'model_calculation_logic', 'choices', 'correct_choice_ids'
+    )
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __reduce__(self):
+        return (type(self), tuple(getattr(self, name) for name in self.__slots__))
+
+
+class QuestionSnapshotService:
+    """
+    Service for cached question snapshots, read by question lists, session details, MCQ
+    scoring and AI prompt building instead of the question, choice, topic and exam tables.
+    Snapshots live in the shared cache under a versioned namespace per question and in a
+    small process-local LRU keyed by the same versioned keys, so a hit costs one cache read
+    for the versions of all requested questions. Editing a question, its choices or the
+    names of its topic or exam bumps the question's namespace once the change is committed.
+    With a process-local cache backend (locmem) that bump only reaches the committing process,
+    so snapshots - including the answer key MCQ scoring uses - are then only kept for
+    UNSHARED_TIMEOUT seconds.
+    """
+
+    TIMEOUT = 6 * 60 * 60
+    UNSHARED_TIMEOUT = 60
+    LOCAL_MAX_SIZE = 5000
+
+    _local = OrderedDict()
+    _local_lock = threading.Lock()
+
+    @staticmethod
+    def _namespace(question_id):
+        return f"question_snapshot_{question_id}"
+
+    @classmethod
+    def get_timeout(cls):
+        """Seconds a snapshot is kept, in the cache and in the process-local LRU."""
+        return cls.TIMEOUT if SharedCache.is_shared() else cls.UNSHARED_TIMEOUT
+
+    @classmethod
+    def _get_local(cls, key):
+        with cls._local_lock:
+            entry = cls._local.get(key)
+            if entry is None:
+                return None
+            snapshot, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del cls._local[key]
+                return None
+            cls._local.move_to_end(key)
+            return snapshot
+
+    @classmethod
+    def _set_local(cls, key, snapshot):
+        expires_at = time.monotonic() + cls.get_timeout()
+        with cls._local_lock:
+            cls._local[key] = (snapshot, expires_at)
+            cls._local.move_to_end(key)
+            while len(cls._local) > cls.LOCAL_MAX_SIZE:
+                cls._local.popitem(last=False)
+
+    @classmethod
+    def get(cls, question_id):
+        """Get the snapshot of a question, or None if it does not exist."""
+        return cls.get_many([question_id]).get(int(question_id))
+
+    @classmethod
+    def get_many(cls, question_ids):
+        """
+        Get the snapshots of several questions as a dict of question ID -> QuestionSnapshot.
+        Questions that do not exist are left out.
+        """
+        question_ids = {int(question_id) for question_id in question_ids}
+        if not question_ids:
+            return {}
+        namespaces = {question_id: cls._namespace(question_id) for question_id in question_ids}
+        namespace_keys = SharedCache.make_keys(namespaces.values(), 'snapshot')
+        keys = {question_id: namespace_keys[namespace] for question_id, namespace in namespaces.items()}
+
+        snapshots = {}
+        for question_id, key in keys.items():
+            snapshot = cls._get_local(key)
+            if snapshot is not None:
+                snapshots[question_id] = snapshot
+
+        missing = {keys[question_id]: question_id for question_id in question_ids - snapshots.keys()}
+        if missing:
+            for key, snapshot in cache.get_many(list(missing)).items():
+                snapshots[missing.pop(key)] = snapshot
+                cls._set_local(key, snapshot)
+
+        if missing:
+            loaded = cls._load(missing.values())
+            cache.set_many({keys[question_id]: snapshot for question_id, snapshot in loaded.items()}, cls.get_timeout())
+            for question_id, snapshot in loaded.items():
+                cls._set_local(keys[question_id], snapshot)
+            snapshots.update(loaded)
+        return snapshots
+
+    @staticmethod
+    def _load(question_ids):
+        """Build the snapshots of questions from the database in two queries."""
+        choices = defaultdict(list)
+        rows = MCQChoice.objects.filter(question_id__in=question_ids).order_by(
+            'question_id', 'display_order', 'id'
+        ).values_list('question_id', 'id', 'choice_text', 'display_order', 'is_correct')
+        for question_id, *choice in rows:
+            choices[question_id].append(ChoiceSnapshot(*choice))
+
+        snapshots = {}
+        questions = Question.objects.filter(pk__in=question_ids).order_by().values_list(
+            'id', 'exam_id', 'exam__name', 'exam__slug', 'topic_id', 'topic__name', 'topic__slug',
+            'text', 'question_type', 'difficulty', 'estimated_time_seconds', 'points', 'is_active',
+            'model_answer_text', 'model_calculation_logic'
+        )
+        for question in questions:
+            question_choices = tuple(choices.get(question[0], ()))
+            correct_choice_ids = frozenset(choice.id for choice in question_choices if choice.is_correct)
+            snapshots[question[0]] = QuestionSnapshot(*question, question_choices, correct_choice_ids)
+        return snapshots
+
+    @classmethod
+    def invalidate(cls, question_id):
+        """Make the snapshot of a question unreachable once the current transaction commits."""
+        if question_id is None:
+            return
+        cls.invalidate_many([question_id])
+
+    @classmethod
+    def invalidate_many(cls, question_ids):
+        """Make the snapshots of several questions unreachable once the current transaction commits."""
+        namespaces = [cls._namespace(question_id) for question_id in question_ids]
+        if not namespaces:
+            return
+
+        def bump():
+            for namespace in namespaces:
+                SharedCache.invalidate_namespace(namespace)
+        transaction.on_commit(bump)
@@ -0,0 +1,66 @@
+from django.db.models.signals import pre_save, post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from .models import Question, Topic, MCQChoice
+from exams.models import Exam
+from .services import QuestionPoolService, QuestionSnapshotService
+
+
+@receiver(pre_save, sender=Question)
+def remember_previous_exam(sender, instance, **kwargs):
+    """Remember the stored exam of an existing question so a move invalidates both pools."""
+    if instance.pk:
+        instance._previous_exam_id = Question.objects.filter(pk=instance.pk).values_list(
+            'exam_id', flat=True
+        ).first()
+
+
+@receiver(post_save, sender=Question)
+def invalidate_question_pool_on_save(sender, instance, **kwargs):
+    """Invalidate the cached question pool of the question's exam."""
+    QuestionPoolService.invalidate(instance.exam_id)
+    previous_exam_id = getattr(instance, '_previous_exam_id', None)
+    if previous_exam_id and previous_exam_id != instance.exam_id:
+        QuestionPoolService.invalidate(previous_exam_id)
+
+
+@receiver(post_delete, sender=Question)
+def invalidate_question_pool_on_delete(sender, instance, **kwargs):
+    """Invalidate the cached question pool when a question is removed."""
+    QuestionPoolService.invalidate(instance.exam_id)
+
+
+@receiver(pre_delete, sender=Topic)
+def invalidate_question_pools_on_topic_delete(sender, instance, **kwargs):
+    """Deleting a topic nulls its questions' topic without Question signals."""
+    exam_ids = instance.questions.order_by().values_list('exam_id', flat=True).distinct()
+    for exam_id in exam_ids:
+        QuestionPoolService.invalidate(exam_id)
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def invalidate_snapshot_of_question(sender, instance, **kwargs):
+    """Invalidate the cached snapshot of a saved or deleted question."""
+    QuestionSnapshotService.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=MCQChoice)
+@receiver(post_delete, sender=MCQChoice)
+def invalidate_snapshot_of_choice(sender, instance, **kwargs):
+    """Invalidate the cached snapshot of the choice's question."""
+    QuestionSnapshotService.invalidate(instance.question_id)
+
+
+@receiver(post_save, sender=Topic)
+@receiver(pre_delete, sender=Topic)
+def invalidate_snapshots_of_topic(sender, instance, **kwargs):
+    """Snapshots hold the topic's name and slug; deleting the topic nulls it without Question signals."""
+    if not kwargs.get('created'):
+        QuestionSnapshotService.invalidate_many(instance.questions.values_list('id', flat=True))
+
+
+@receiver(post_save, sender=Exam)
+def invalidate_snapshots_of_exam(sender, instance, created, **kwargs):
+    """Snapshots hold the exam's name and slug."""
+    if not created:
+        QuestionSnapshotService.invalidate_many(instance.questions.values_list('id', flat=True))
@@ -1,3 +1,4 @@
+import time
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from .models import Question
@@ -32,4 +33,107 @@ class QuestionTestCase(TestCase):
         self.assertEqual(question.text, 'What is 2+2?')
         self.assertEqual(question.question_type, 'OPEN_ENDED')
         self.assertEqual(question.created_by, self.user)
-        self.assertEqual(question.exam, self.exam) 
\ No newline at end of file
+        self.assertEqual(question.exam, self.exam)
+
+    def test_question_pool_sampling_and_invalidation(self):
+        """Test that the cached question pool serves samples and follows question changes"""
+        from .services import QuestionPoolService
+
+        questions = [
+            Question.objects.create(
+                exam=self.exam,
+                text=f'Question {i}',
+                question_type='MCQ' if i % 2 else 'OPEN_ENDED',
+                difficulty='EASY'
+            )
+            for i in range(6)
+        ]
+
+        self.assertEqual(
+            sorted(QuestionPoolService.get_question_ids(self.exam.id)),
+            sorted(q.id for q in questions)
+        )
+        with self.assertNumQueries(0):
+            sample = QuestionPoolService.sample(self.exam.id, 2, question_types=['MCQ'])
+        self.assertEqual(len(sample), 2)
+        self.assertTrue(set(sample) <= {q.id for q in questions if q.question_type == 'MCQ'})
+
+        questions[0].is_active = False
+        questions[0].save()
+        questions[1].delete()
+        self.assertEqual(
+            sorted(QuestionPoolService.get_question_ids(self.exam.id)),
+            sorted(q.id for q in questions[2:])
+        )
+
+    def test_question_pool_timeout_is_short_without_a_shared_cache(self):
+        """Test that pools are only kept briefly when the cache is process-local"""
+        from django.test import override_settings
+        from .services import QuestionPoolService
+
+        self.assertEqual(QuestionPoolService.get_timeout(), QuestionPoolService.UNSHARED_TIMEOUT)
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': 'redis://127.0.0.1:6379/1',
+        }}):
+            self.assertEqual(QuestionPoolService.get_timeout(), QuestionPoolService.POOL_TIMEOUT)
+
+    def test_question_snapshots_are_cached_and_invalidated(self):
+        """Test that question snapshots are served from the cache and follow question, choice and topic edits"""
+        import pickle
+        from django.core.cache import cache
+        from .models import MCQChoice, Topic
+        from .serializers import QuestionSerializer
+        from .services import QuestionSnapshotService
+
+        cache.clear()
+        topic = Topic.objects.create(name='Algebra', slug='algebra')
+        question = Question.objects.create(
+            exam=self.exam, topic=topic, text='Pick one', question_type='MCQ', difficulty='EASY', points=3
+        )
+        wrong = MCQChoice.objects.create(question=question, choice_text='Wrong', display_order=2)
+        right = MCQChoice.objects.create(question=question, choice_text='Right', display_order=1, is_correct=True)
+
+        snapshot = QuestionSnapshotService.get(question.id)
+        self.assertEqual([choice.id for choice in snapshot.choices], [right.id, wrong.id])
+        self.assertEqual(snapshot.correct_choice_ids, frozenset([right.id]))
+        self.assertEqual((snapshot.exam_name, snapshot.topic_name), ('Test Exam', 'Algebra'))
+        with self.assertRaises(AttributeError):
+            snapshot.points = 5
+        self.assertEqual(pickle.loads(pickle.dumps(snapshot)).correct_choice_ids, snapshot.correct_choice_ids)
+
+        with self.assertNumQueries(0):
+            data = QuestionSerializer([question], many=True).data
+        self.assertEqual(data[0]['topic_name'], 'Algebra')
+        self.assertEqual([choice['id'] for choice in data[0]['choices']], [right.id, wrong.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            wrong.is_correct = True
+            wrong.save()
+        self.assertEqual(QuestionSnapshotService.get(question.id).correct_choice_ids, frozenset([right.id, wrong.id]))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            topic.name = 'Linear algebra'
+            topic.save()
+        self.assertEqual(QuestionSnapshotService.get(question.id).topic_name, 'Linear algebra')
+
+    def test_question_snapshots_expire_quickly_without_a_shared_cache(self):
+        """Test that edits reach other processes within the short timeout when the cache is process-local"""
+        from unittest.mock import patch
+        from django.core.cache import cache
+        from .services import QuestionSnapshotService
+
+        cache.clear()
+        question = Question.objects.create(
+            exam=self.exam, text='Pick one', question_type='MCQ', difficulty='EASY', points=3
+        )
+        self.assertEqual(QuestionSnapshotService.get_timeout(), QuestionSnapshotService.UNSHARED_TIMEOUT)
+        QuestionSnapshotService.get(question.id)
+
+        # An edit committed by another process: no invalidation reaches this one
+        Question.objects.filter(pk=question.id).update(points=5)
+        self.assertEqual(QuestionSnapshotService.get(question.id).points, 3)
+
+        cache.clear()  # The cache entry expires after the same timeout
+        with patch('questions.services.time.monotonic', return_value=time.monotonic() + 61):
+            self.assertEqual(QuestionSnapshotService.get(question.id).points, 5)
@@ -66,7 +66,8 @@ class QuestionListView(generics.ListAPIView):
         if exam_slug:
             queryset = queryset.filter(exam__slug=exam_slug)
             
-        return queryset
+        # Questions are serialized from their cached snapshots
+        return queryset.only('id')
 
 class QuestionDetailView(generics.RetrieveAPIView):
     serializer_class = QuestionDetailSerializer
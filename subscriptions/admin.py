@@ -1,6 +1,9 @@
 from django.contrib import admin
+from django.db import transaction
 from django.utils.html import format_html
+from exam_prep_platform.cache import SharedCache
 from .models import PricingPlan, UserSubscription, Payment, ReferralProgram, UserReferral
+from .services import EntitlementService
 import json
 
 @admin.register(PricingPlan)
@@ -34,10 +37,13 @@ class PricingPlanAdmin(admin.ModelAdmin):
     
     def activate_plans(self, request, queryset):
         queryset.update(is_active=True)
+        # update() sends no post_save, so invalidate the cached plan lists here
+        transaction.on_commit(lambda: SharedCache.invalidate_namespace('pricing_plans'))
     activate_plans.short_description = "Activate selected plans"
     
     def deactivate_plans(self, request, queryset):
         queryset.update(is_active=False)
+        transaction.on_commit(lambda: SharedCache.invalidate_namespace('pricing_plans'))
     deactivate_plans.short_description = "Deactivate selected plans"
 
 
@@ -66,11 +72,14 @@ class UserSubscriptionAdmin(admin.ModelAdmin):
     
     def activate_subscriptions(self, request, queryset):
         queryset.update(status='ACTIVE')
+        # Bulk updates skip the signals that invalidate cached entitlements
+        EntitlementService.invalidate_many(queryset.values_list('user_id', flat=True))
     activate_subscriptions.short_description = "Activate selected subscriptions"
     
     def cancel_subscriptions(self, request, queryset):
         from django.utils import timezone
         queryset.update(status='CANCELED', auto_renew=False, cancelled_at=timezone.now())
+        EntitlementService.invalidate_many(queryset.values_list('user_id', flat=True))
     cancel_subscriptions.short_description = "Cancel selected subscriptions"
     
     def extend_subscription_month(self, request, queryset):
@@ -3,6 +3,7 @@ import json
 import logging
 import uuid
 from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
 from datetime import timedelta
 from .models import Payment, UserSubscription, PricingPlan
@@ -344,6 +345,7 @@ class SumUpPaymentService:
             
             payment.gateway_response = webhook_data
             payment.save()
+            EntitlementService.invalidate(payment.user_id)
             
             logger.info(f"Updated payment {payment.id} status to {payment.status}")
             
@@ -629,4 +631,88 @@ class SubscriptionManagementService:
                 subscription.save()
                 logger.info(f"Subscription {subscription.id} marked as expired")
         
-        return expired_subscriptions.count() 
\ No newline at end of file
+        return expired_subscriptions.count() 
+
+
+class EntitlementService:
+    """
+    Service for cached per-user subscription entitlements.
+    A user's entitlements (the exam IDs of their active subscriptions) are cached until
+    the earliest end_date of those subscriptions, or the start_date of one that has not
+    started yet, so permission checks cost no subscription queries in the common case.
+    Subscription saves, deletes and webhook processing invalidate the cached entry.
+    Callers about to deny access pass refresh=True to re-read the subscriptions, since
+    with a process-local cache another worker's invalidation never reaches this one.
+    """
+
+    @staticmethod
+    def _cache_key(user_id):
+        return f"subscription_entitlements_{user_id}"
+
+    @classmethod
+    def get_entitlements(cls, user_id, refresh=False):
+        """
+        Get the user's entitlements as a dict with 'exam_ids' (a frozenset) and
+        'has_active_subscription'. With refresh=True the cached entry is rebuilt
+        from the database.
+        """
+        key = cls._cache_key(user_id)
+        entitlements = None if refresh else cache.get(key)
+        if entitlements is not None:
+            return entitlements
+
+        now = timezone.now()
+        max_timeout = getattr(settings, 'ENTITLEMENT_CACHE_TIMEOUT_SECONDS', 300)
+        expires_at = now + timedelta(seconds=max_timeout)
+        exam_ids = set()
+        has_active_subscription = False
+
+        subscriptions = UserSubscription.objects.filter(
+            user_id=user_id,
+            status='ACTIVE',
+            end_date__gte=now
+        ).values_list('pricing_plan__exam_id', 'start_date', 'end_date')
+
+        for exam_id, start_date, end_date in subscriptions:
+            if start_date <= now:
+                has_active_subscription = True
+                if exam_id is not None:
+                    exam_ids.add(exam_id)
+                expires_at = min(expires_at, end_date)
+            else:
+                # Becomes active later - the cached entry must not outlive that moment
+                expires_at = min(expires_at, start_date)
+
+        entitlements = {
+            'exam_ids': frozenset(exam_ids),
+            'has_active_subscription': has_active_subscription,
+        }
+        timeout = (expires_at - now).total_seconds()
+        if timeout >= 1:
+            cache.set(key, entitlements, int(timeout))
+        return entitlements
+
+    @classmethod
+    def has_active_subscription(cls, user_id, refresh=False):
+        """Check if the user has any active subscription."""
+        return cls.get_entitlements(user_id, refresh=refresh)['has_active_subscription']
+
+    @classmethod
+    def has_exam_access(cls, user_id, exam_id, refresh=False):
+        """Check if the user has an active subscription for the given exam."""
+        try:
+            exam_id = int(exam_id)
+        except (TypeError, ValueError):
+            return False
+        return exam_id in cls.get_entitlements(user_id, refresh=refresh)['exam_ids']
+
+    @classmethod
+    def invalidate(cls, user_id):
+        """Drop the cached entitlements of a user."""
+        if user_id is not None:
+            cache.delete(cls._cache_key(user_id))
+
+    @classmethod
+    def invalidate_many(cls, user_ids):
+        """Drop the cached entitlements of several users."""
+        cache.delete_many([cls._cache_key(user_id) for user_id in set(user_ids)])
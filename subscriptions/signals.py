@@ -0,0 +1,36 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import UserSubscription, PricingPlan
+from exam_prep_platform.cache import SharedCache
+from .services import EntitlementService
+
+
+def _invalidate_entitlements(user_ids):
+    """Invalidate now, and again after commit so a concurrent read cannot re-cache the old state."""
+    user_ids = list(user_ids)
+    EntitlementService.invalidate_many(user_ids)
+    transaction.on_commit(lambda: EntitlementService.invalidate_many(user_ids))
+
+
+@receiver(post_save, sender=UserSubscription)
+@receiver(post_delete, sender=UserSubscription)
+def invalidate_entitlements_on_subscription_change(sender, instance, **kwargs):
+    """Invalidate the cached entitlements of the subscription's user."""
+    _invalidate_entitlements([instance.user_id])
+
+
+@receiver(post_save, sender=PricingPlan)
+def invalidate_entitlements_on_plan_change(sender, instance, created, **kwargs):
+    """A plan moved to another exam changes the entitlements of all its subscribers."""
+    if not created:
+        _invalidate_entitlements(
+            UserSubscription.objects.filter(pricing_plan=instance).order_by().values_list('user_id', flat=True).distinct()
+        )
+
+
+@receiver(post_save, sender=PricingPlan)
+@receiver(post_delete, sender=PricingPlan)
+def invalidate_pricing_plan_cache(sender, instance, **kwargs):
+    """Invalidate cached pricing plan lists."""
+    SharedCache.invalidate_namespace('pricing_plans')
@@ -1,6 +1,10 @@
+from datetime import timedelta
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
 from django.contrib.auth import get_user_model
-from .models import PricingPlan
+from .models import PricingPlan, UserSubscription
+from .services import EntitlementService
 from exams.models import Exam
 
 User = get_user_model()
@@ -35,4 +39,74 @@ class SubscriptionTestCase(TestCase):
         self.assertEqual(plan.name, 'Test Plan')
         self.assertEqual(plan.slug, 'test-plan')
         self.assertEqual(float(plan.price), 9.99)
-        self.assertEqual(plan.exam, self.exam) 
\ No newline at end of file
+        self.assertEqual(plan.exam, self.exam) 
+
+    def test_admin_bulk_deactivation_invalidates_plan_lists(self):
+        """Test that the admin actions, which use update(), invalidate the cached plan lists"""
+        from django.contrib.admin.sites import site
+        from exam_prep_platform.cache import SharedCache
+
+        plan = PricingPlan.objects.create(
+            name='Test Plan', slug='test-plan', exam=self.exam, price=9.99, billing_cycle='MONTHLY',
+            features_list=[]
+        )
+        version = SharedCache.get_version('pricing_plans')
+        with self.captureOnCommitCallbacks(execute=True):
+            site._registry[PricingPlan].deactivate_plans(None, PricingPlan.objects.filter(pk=plan.pk))
+        self.assertNotEqual(SharedCache.get_version('pricing_plans'), version)
+
+
+class EntitlementServiceTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='subscriber',
+            email='subscriber@example.com',
+            password='testpass123'
+        )
+        self.exam = Exam.objects.create(name='Entitled Exam', slug='entitled-exam', is_active=True)
+        self.plan = PricingPlan.objects.create(
+            name='Entitled Plan', slug='entitled-plan', exam=self.exam, price=9.99, billing_cycle='MONTHLY', features_list=[]
+        )
+        self.subscription = UserSubscription.objects.create(
+            user=self.user,
+            pricing_plan=self.plan,
+            status='ACTIVE',
+            start_date=timezone.now() - timedelta(days=1),
+            end_date=timezone.now() + timedelta(days=30)
+        )
+
+    def test_entitlements_are_cached_until_a_subscription_changes(self):
+        """Test that repeated checks run no queries and a subscription save invalidates them"""
+        self.assertTrue(EntitlementService.has_exam_access(self.user.id, self.exam.id))
+        with self.assertNumQueries(0):
+            self.assertTrue(EntitlementService.has_exam_access(self.user.id, str(self.exam.id)))
+            self.assertTrue(EntitlementService.has_active_subscription(self.user.id))
+
+        self.subscription.status = 'CANCELED'
+        self.subscription.save()
+
+        self.assertFalse(EntitlementService.has_exam_access(self.user.id, self.exam.id))
+        self.assertFalse(EntitlementService.has_active_subscription(self.user.id))
+
+    def test_permission_rechecks_the_database_before_denying(self):
+        """Test that a subscription missing from stale cached entitlements still grants access"""
+        from .permissions import HasActiveExamSubscription
+
+        other_exam = Exam.objects.create(name='Other Exam', slug='other-exam', is_active=True)
+        other_plan = PricingPlan.objects.create(
+            name='Other Plan', slug='other-plan', exam=other_exam, price=9.99, billing_cycle='MONTHLY', features_list=[]
+        )
+        self.assertFalse(EntitlementService.has_exam_access(self.user.id, other_exam.id))
+
+        # Paid through another worker: the bulk create bypasses this worker's invalidation
+        UserSubscription.objects.bulk_create([UserSubscription(
+            user=self.user,
+            pricing_plan=other_plan,
+            status='ACTIVE',
+            start_date=timezone.now() - timedelta(minutes=1),
+            end_date=timezone.now() + timedelta(days=30)
+        )])
+        self.assertFalse(EntitlementService.has_exam_access(self.user.id, other_exam.id))
+        self.assertTrue(HasActiveExamSubscription()._check_exam_access(self.user, other_exam.id))
+        self.assertTrue(EntitlementService.has_exam_access(self.user.id, other_exam.id))
@@ -2,6 +2,7 @@ from rest_framework import generics, status, filters, viewsets
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from exam_prep_platform.permissions import IsAdminUser
+from exam_prep_platform.cache import CachedListMixin
 from rest_framework.exceptions import ValidationError
 from rest_framework.decorators import action
 from django.utils import timezone
@@ -15,7 +16,7 @@ import logging
 from .models import PricingPlan, UserSubscription, ReferralProgram, UserReferral, Payment
 from users.models import User
 from exams.models import Exam
-from .services import SumUpPaymentService, SubscriptionManagementService
+from .services import SumUpPaymentService, SubscriptionManagementService, EntitlementService
 from .serializers import (
     PricingPlanSerializer,
     PricingPlanDetailSerializer,
@@ -47,12 +48,13 @@ from .serializers import (
 logger = logging.getLogger(__name__)
 
 
-class PricingPlanListView(generics.ListAPIView):
+class PricingPlanListView(CachedListMixin, generics.ListAPIView):
     serializer_class = PricingPlanSerializer
+    cache_namespace = 'pricing_plans'
     permission_classes = [AllowAny]  # Make pricing plans publicly accessible
     
     def get_queryset(self):
-        queryset = PricingPlan.objects.filter(is_active=True).order_by('display_order')
+        queryset = PricingPlan.objects.filter(is_active=True).select_related('exam').order_by('display_order')
         
         # Filter by exam if provided
         exam_id = self.request.query_params.get('exam_id')
@@ -363,6 +365,9 @@ class SumUpWebhookHandlerView(SumUpWebhookVerificationMixin, generics.GenericAPI
                 elif mapped_status == 'REFUNDED':
                     self.handle_refunded_payment(payment)
                 
+                # Subscription changes must be visible on the user's next request
+                EntitlementService.invalidate(payment.user_id)
+                
                 return Response({'status': 'success'}, status=status.HTTP_200_OK)
                 
             else:
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from exam_prep_platform.cache import SharedCache
+from .models import FAQItem
+
+
+@receiver(post_save, sender=FAQItem)
+@receiver(post_delete, sender=FAQItem)
+def invalidate_faq_cache(sender, instance, **kwargs):
+    """Invalidate cached FAQ lists."""
+    SharedCache.invalidate_namespace('faq')
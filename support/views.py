@@ -5,6 +5,7 @@ from rest_framework.decorators import api_view, permission_classes
 from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import get_object_or_404
 from django.db.models import F
+from exam_prep_platform.cache import CachedListMixin
 from .models import FAQItem, SupportTicket, TicketReply
 from .serializers import (
     FAQItemSerializer,
@@ -15,8 +16,9 @@ from .serializers import (
 )
 
 
-class FAQItemListView(generics.ListAPIView):
+class FAQItemListView(CachedListMixin, generics.ListAPIView):
     """List published FAQ items with filtering and ordering."""
+    cache_namespace = 'faq'
     serializer_class = FAQItemSerializer
     permission_classes = [AllowAny]  # Allow anonymous access to FAQ items
     filter_backends = [DjangoFilterBackend]
@@ -61,13 +61,13 @@ sudo -u "$USER" bash -c "
 
 # Restart services
 echo "???? Restarting services..."
-supervisorctl restart testimus
+supervisorctl restart testimus testimus-stream
 sleep 3
 
 # Check service status
 echo "???? Checking service status..."
 echo "Supervisor status:"
-supervisorctl status testimus
+supervisorctl status testimus testimus-stream
 
 echo "Nginx status:"
 systemctl is-active nginx
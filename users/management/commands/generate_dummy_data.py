@@ -63,63 +63,51 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         self.stdout.write('Starting dummy data generation...')
         
-        # Disable signals during dummy data generation to avoid Celery issues
-        from django.db.models.signals import post_save
-        from assessment.models import UserAnswer
-        from ai_integration.signals import queue_user_answer_evaluation
+        # Check if database tables exist
+        if not self.check_database_ready():
+            return
         
-        # Disconnect the signal temporarily
-        post_save.disconnect(queue_user_answer_evaluation, sender=UserAnswer)
+        # Clear existing data if requested
+        if options['clear_data']:
+            self.clear_existing_data()
+        
+        # Create basic data structure
+        self.create_exams()
+        self.create_topics()
+        self.create_tags()
+        self.create_pricing_plans()
+        self.create_referral_programs()
+        self.create_ai_feedback_templates()
+        self.create_faq_items()
+        self.create_scan_configs()
+        
+        # Create users and related data
+        self.create_users(options['users'])
+        
+        # Create complete user if requested
+        if options['complete_user']:
+            self.create_complete_user()
+        
+        # Create questions after topics and exams
+        self.create_questions()
+        
+        # Create user-related data
+        self.create_subscriptions()
+        self.create_exam_sessions()
+        self.create_user_answers()
+        self.create_analytics_data()
+        self.create_support_tickets()
+        self.create_notifications()
+        self.create_affiliate_data()
+        self.create_ai_integration_data()
+        
+        # Create comprehensive data for complete user after all other data exists
+        if options['complete_user']:
+            self.create_complete_user_data()
         
-        try:
-            # Check if database tables exist
-            if not self.check_database_ready():
-                return
-            
-            # Clear existing data if requested
-            if options['clear_data']:
-                self.clear_existing_data()
-            
-            # Create basic data structure
-            self.create_exams()
-            self.create_topics()
-            self.create_tags()
-            self.create_pricing_plans()
-            self.create_referral_programs()
-            self.create_ai_feedback_templates()
-            self.create_faq_items()
-            self.create_scan_configs()
-            
-            # Create users and related data
-            self.create_users(options['users'])
-            
-            # Create complete user if requested
-            if options['complete_user']:
-                self.create_complete_user()
-            
-            # Create questions after topics and exams
-            self.create_questions()
-            
-            # Create user-related data
-            self.create_subscriptions()
-            self.create_exam_sessions()
-            self.create_user_answers()
-            self.create_analytics_data()
-            self.create_support_tickets()
-            self.create_notifications()
-            self.create_affiliate_data()
-            self.create_ai_integration_data()
-            
-            # Create comprehensive data for complete user after all other data exists
-            if options['complete_user']:
-                self.create_complete_user_data()
-            
-            self.stdout.write(
-                self.style.SUCCESS('Successfully generated dummy data!')
-            )
-        finally:
-            # Reconnect the signal after dummy data generation
-            post_save.connect(queue_user_answer_evaluation, sender=UserAnswer)
+        self.stdout.write(
+            self.style.SUCCESS('Successfully generated dummy data!')
+        )
 
     def check_database_ready(self):
         """Check if database tables exist and migrations have been run"""